@@ -0,0 +1,85 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark the creation of Elk classes.
+
+Report the cost of creating a class that declares ``n`` attributes,
+a subclass that adds one attribute to a base with ``n`` attributes,
+and a class that consumes a role with ``n`` attributes, for several
+``n``.  The cost of a subclass should not grow with the size of its
+base.  The last column is the cost of creating the class and then
+one object of it.
+
+Run from the top of the source tree::
+
+    python bench/class_creation.py [classes]
+
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from elk import elk  # noqa: E402
+
+
+def attributes(n, prefix='a'):
+    return {
+        '{}{}'.format(prefix, i): elk.ElkAttribute(
+            type=int, default=i, handles={'h{}{}'.format(prefix, i): 'real'})
+        for i in range(n)
+    }
+
+
+def flat(n):
+    def make():
+        return elk.ElkMeta(str('Flat'), (elk.Elk,), attributes(n))
+    return make
+
+
+def subclass(n):
+    base = elk.ElkMeta(str('Base'), (elk.Elk,), attributes(n))
+
+    def make():
+        return elk.ElkMeta(str('Sub'), (base,), attributes(1, 'b'))
+    return make
+
+
+def role(n):
+    role = elk.ElkRoleMeta(str('Role'), (elk.ElkRole,), attributes(n))
+
+    def make():
+        d = {'__with__': role}
+        return elk.ElkMeta(str('Consumer'), (elk.Elk,), d)
+    return make
+
+
+def main(classes=200):
+    for scenario in (flat, subclass, role):
+        for n in (1, 10, 100):
+            make = scenario(n)
+            create = min(timeit.repeat(make, number=classes, repeat=3))
+            use = min(timeit.repeat(
+                lambda: make()(), number=classes, repeat=3))
+            print('{:<10} n={:<4} {:8.1f} us/class {:8.1f} us/class+object'
+                  .format(scenario.__name__, n,
+                          create / classes * 1e6, use / classes * 1e6))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
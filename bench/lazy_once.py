@@ -0,0 +1,89 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark lazy='once' attributes under contention.
+
+Several threads read the lazy attributes of the same objects at the
+same time.  Report the time taken and the number of builder runs for
+``lazy=True`` and ``lazy='once'``, and the cost of reading a value
+that has already been generated.
+
+Run from the top of the source tree::
+
+    python bench/lazy_once.py [threads] [objects]
+
+"""
+
+import os
+import sys
+import threading
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from elk import elk  # noqa: E402
+
+
+def make_class(lazy, runs):
+    class Parsed(elk.Elk):
+        value = elk.ElkAttribute(lazy=lazy, builder='_build_value')
+
+        def _build_value(self):
+            runs.append(None)
+            time.sleep(0.0001)  # a builder that releases the GIL
+            return sum(range(100))
+
+    return Parsed
+
+
+def contend(cls, n_threads, n_objects):
+    objs = [cls() for _ in range(n_objects)]
+    start = threading.Event()
+
+    def read():
+        start.wait()
+        for obj in objs:
+            obj.value
+
+    threads = [threading.Thread(target=read) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    t0 = time.time()
+    start.set()
+    for thread in threads:
+        thread.join()
+    return time.time() - t0
+
+
+def main(n_threads=8, n_objects=2000):
+    print('{} threads reading {} objects'.format(n_threads, n_objects))
+    for lazy in (True, 'once'):
+        runs = []
+        cls = make_class(lazy, runs)
+        elapsed = contend(cls, n_threads, n_objects)
+        obj = cls()
+        obj.value
+        read = min(timeit.repeat(lambda: obj.value, number=100000, repeat=5))
+        print(
+            'lazy={!r:7} {:.3f}s, {} builder runs, '
+            '{:.0f} ns per read once generated'
+            .format(lazy, elapsed, len(runs), read * 1e4)
+        )
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
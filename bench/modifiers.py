@@ -0,0 +1,82 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark calls of methods with modifiers.
+
+Report the cost of calling a method with no modifiers, and with
+several ``before``, ``after`` and ``around`` modifiers.
+
+Run from the top of the source tree::
+
+    python bench/modifiers.py [calls]
+
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from elk import elk  # noqa: E402
+
+
+class Plain(elk.Elk):
+    def method(self, x):
+        return x
+
+
+class Modified(Plain):
+    @elk.before('method')
+    def _before1(self, x):
+        pass
+
+    @elk.before('method')
+    def _before2(self, x):
+        pass
+
+    @elk.after('method')
+    def _after1(self, x):
+        pass
+
+    @elk.after('method')
+    def _after2(self, x):
+        pass
+
+
+class Around(Plain):
+    @elk.around('method')
+    def _around(self, orig, x):
+        return orig(x)
+
+
+class Everything(Modified):
+    @elk.around('method')
+    def _around(self, orig, x):
+        return orig(x)
+
+
+def main(calls=200000):
+    for cls in (Plain, Modified, Around, Everything):
+        obj = cls()
+        best = min(timeit.repeat(
+            lambda: obj.method(1), number=calls, repeat=5))
+        print('{:<12} {:8.0f} ns/call'.format(
+            cls.__name__, best / calls * 1e9))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -16,25 +16,217 @@
 
 import collections
 import functools
+import itertools
+import keyword
+import re
+import threading
+import weakref
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+try:
+    from threading import get_ident
+except ImportError:
+    from thread import get_ident
+
+from .constraint import compile_constraint
+from . import validation
 
 
 viewitems = getattr(dict, 'viewitems', getattr(dict, 'items'))
 
+# marks a lazy attribute whose value has not yet been generated
+_PENDING = object()
+
+# marks an attribute that is not set
+_UNSET = object()
+
+
+class _Flight(object):
+    """The generation of a ``lazy='once'`` value by one thread."""
+    def __init__(self):
+        self.owner = get_ident()
+        self.lock = threading.Lock()
+        self.lock.acquire()
+
+    def wait(self):
+        self.lock.acquire()
+        self.lock.release()
+
+
+# Striped locks guarding the flights of lazy='once' values in
+# generation.  A stripe lock is only held while looking up or
+# starting a flight, never while a value is generated.
+_STRIPES = [(threading.Lock(), {}) for _ in range(64)]
+
+
+def _once(key, name, peek, generate):
+    """Generate a ``lazy='once'`` value, in one thread only.
+
+    ``key`` identifies the value, ``peek()`` returns it as stored
+    (``_PENDING`` if it is pending) and ``generate()`` generates,
+    stores and returns it.  The first thread to read the pending
+    value generates it; other threads wait for it to finish.  If the
+    generation fails, a waiting thread tries again.  Return the
+    stored value.
+
+    """
+    lock, flights = _STRIPES[hash(key) % len(_STRIPES)]
+    while True:
+        with lock:
+            value = peek()
+            if value is not _PENDING:
+                return value
+            flight = flights.get(key)
+            if flight is None:
+                flight = flights[key] = _Flight()
+                break
+        if flight.owner == get_ident():
+            raise RuntimeError(
+                '{!r} attribute depends on itself'.format(name))
+        flight.wait()
+    try:
+        value = generate()
+    finally:
+        with lock:
+            del flights[key]
+        flight.lock.release()
+    return value
+
+
+# the stacks of active batch scopes, per thread
+_scopes = threading.local()
+
+
+class ElkBatch(object):
+    """A scope in which many objects are loaded and updated at once.
+
+    When the value of an attribute with a ``batch_builder`` is first
+    read, the batch builder is given every object of the active
+    scopes whose value for the attribute is pending, rather than only
+    the object read.  Objects constructed while the scope is active
+    belong to it, as do the objects of any iterables given.
+
+    Triggers are not called while a scope is active.  When the
+    outermost scope exits, each trigger is called once per object
+    whose attribute was assigned, with the last value assigned and
+    the value before the first assignment.
+
+    Scopes are per thread, and may be nested.
+
+    """
+    def __init__(self, *iterables):
+        self._pending = {}  # id(attrdesc) -> [objects]
+        self._triggers = collections.OrderedDict()
+        for iterable in iterables:
+            for obj in iterable:
+                for attrdesc in type(obj).__elk_attrs__.values():
+                    if attrdesc._batch_builder \
+                            and attrdesc._peek(obj, None) is _PENDING:
+                        self._enlist(attrdesc, obj)
+
+    def _enlist(self, attrdesc, obj):
+        self._pending.setdefault(id(attrdesc), []).append(obj)
+
+    def _defer_trigger(self, attrdesc, obj, value, old):
+        key = id(obj), id(attrdesc)
+        if key in self._triggers:
+            old = self._triggers[key][3]
+        self._triggers[key] = attrdesc, obj, value, old
+
+    def __enter__(self):
+        stack = getattr(_scopes, 'stack', None)
+        if stack is None:
+            stack = _scopes.stack = []
+        stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _scopes.stack.remove(self)
+        self._pending.clear()
+        while self._triggers:
+            _, (attrdesc, obj, value, old) = self._triggers.popitem(False)
+            attrdesc._fire(obj, value, old)
+
+
+_CODE = {}
+
+
+def _compile(source, filename):
+    """Compile the lines of generated source.
+
+    Generated code depends only on the shape of a class (the names
+    and kinds of its attributes); the values it uses are given in the
+    namespace it is executed in.  So code is compiled once for each
+    distinct source and reused by every class with the same shape.
+
+    """
+    source = '\n'.join(source) + '\n'
+    code = _CODE.get(source)
+    if code is None:
+        code = _CODE[source] = compile(source, filename, 'exec')
+    return code
+
+
+_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _parse_target(target):
+    """Return the path and curried arguments of a delegation target.
+
+    A target is a dotted name, or a tuple (or list) of a dotted name
+    and the arguments to curry.
+
+    """
+    args = ()
+    if isinstance(target, (tuple, list)):
+        target, args = target[0], tuple(target[1:])
+    path = tuple(target.split('.')) if isinstance(target, str) else ()
+    if not path or not all(
+        _NAME.match(name) and not keyword.iskeyword(name) for name in path
+    ):
+        raise TypeError(
+            'delegation target must be a dotted name: {!r}'.format(target))
+    return path, args
+
 
 class DelegationDescriptor(object):
-    """Delegate to an attribute on the value of the given descriptor."""
+    """Delegate to an attribute on the value of the given descriptor.
+
+    This is the general (interpreted) form of delegation; attribute
+    descriptors compile their own delegations (see ``_delegation``).
+
+    """
     def __init__(self, name, attrdesc):
-        self.name = name
+        self.path, self.args = _parse_target(name)
         self.attrdesc = attrdesc
 
+    def _parent(self, instance):
+        obj = self.attrdesc.__get__(instance, None)
+        for name in self.path[:-1]:
+            obj = getattr(obj, name)
+        return obj
+
     def __get__(self, instance, owner):
-        return getattr(self.attrdesc.__get__(instance, None), self.name)
+        if instance is None:
+            return self
+        value = getattr(self._parent(instance), self.path[-1])
+        if self.args:
+            return functools.partial(value, *self.args)
+        return value
 
     def __set__(self, instance, value):
-        setattr(self.attrdesc.__get__(instance, None), self.name, value)
+        if self.args:
+            raise AttributeError('cannot set curried delegation')
+        setattr(self._parent(instance), self.path[-1], value)
 
     def __delete__(self, instance):
-        delattr(self.attrdesc.__get__(instance, None), self.name)
+        if self.args:
+            raise AttributeError('cannot delete curried delegation')
+        delattr(self._parent(instance), self.path[-1])
 
 
 def _key_error_to_attribute_error(method):
@@ -51,14 +243,26 @@ def _key_error_to_attribute_error(method):
 
 
 class AttributeDescriptor(object):
+    counter = itertools.count()
+
+    # whether any class has attributes that depend on this one
+    _has_dependents = False
+    # whether assignment must do more than check and store the value
+    _watched = False
+
     def __init__(
         self,
         mode='rw',
         required=False,
         lazy=False,
         builder=None,
+        batch_builder=None,
         type=None,
         handles=None,
+        depends_on=None,
+        trigger=None,
+        trigger_on_init=False,
+        weak_ref=False,
         **kwargs
     ):
         # check mode
@@ -69,7 +273,9 @@ class AttributeDescriptor(object):
         # store required
         self._required = required
 
-        # store lazy
+        # check and store lazy
+        if lazy not in (False, True, 'once', 'async'):
+            raise TypeError("lazy must be True, False, 'once' or 'async'")
         self._lazy = lazy
 
         # check and store default
@@ -88,8 +294,23 @@ class AttributeDescriptor(object):
             raise TypeError('builder must be a str')
         self._builder = builder
 
-        # store type
+        # check and store batch builder; its values are always lazy
+        if batch_builder is not None:
+            if not isinstance(batch_builder, str):
+                raise TypeError('batch_builder must be a str')
+            if self._has_default or builder is not None:
+                raise TypeError(
+                    'batch_builder cannot be combined with default or builder')
+            if lazy == 'async':
+                raise TypeError("batch_builder cannot be lazy='async'")
+            self._lazy = lazy or True
+        self._batch_builder = batch_builder
+
+        # store and compile type constraint
         self._type = type
+        self._type_check, self._type_classes = compile_constraint(type)
+        # the check made on assignment, according to validation policy
+        self._set_check = self._type_check
 
         # check and store init_arg
         self._has_init_arg = 'init_arg' in kwargs
@@ -101,15 +322,57 @@ class AttributeDescriptor(object):
         handles = handles if handles is not None else []
         self._handles = handles
 
+        # check and store dependencies
+        if depends_on is not None:
+            if isinstance(depends_on, str):
+                depends_on = (depends_on,)
+            depends_on = frozenset(depends_on)
+            if not (self._has_default or self._builder or batch_builder):
+                raise TypeError('depends_on requires a default or builder')
+        self._depends_on = depends_on
+
+        # check and store trigger
+        if trigger is not None and not callable(trigger):
+            raise TypeError('trigger must be callable')
+        if trigger_on_init and trigger is None:
+            raise TypeError('trigger_on_init requires a trigger')
+        self._trigger = trigger
+        self._trigger_on_init = trigger_on_init
+        if trigger is not None:
+            self._watched = True
+
+        # store weak_ref; values are stored through _store
+        self._weak_ref = bool(weak_ref)
+        if weak_ref:
+            if lazy == 'async':
+                raise TypeError("weak_ref cannot be lazy='async'")
+            self._watched = True
+
         # perform whatever checks we can right now (compile-time!)
-        if self._type is not None and self._has_default \
-                and not isinstance(self._default, self._type):
+        # (callable defaults are checked when they are called)
+        if self._type_check is not None and self._has_default \
+                and not callable(self._default) \
+                and not self._type_check(self._default):
             raise TypeError('Attribute default has bad type.')
 
         # check for unrecognised keyword arguments
         if kwargs:
             raise TypeError('unrecognised option: {}'.format(kwargs.pop()))
 
+        # remember declaration order; the position is also the key of
+        # the value in attribute storage, which copies share
+        self._seq = self._key = next(self.counter)
+
+        if lazy == 'async':
+            if asyncio is None:
+                raise TypeError("lazy='async' requires asyncio")
+            if not self._builder and not callable(self._default):
+                raise TypeError(
+                    "lazy='async' requires a builder or callable default")
+            self.__class__ = AsyncAttributeDescriptor
+        elif weak_ref:
+            self.__class__ = WeakAttributeDescriptor
+
     def init_class(self, name, dict):
         """Initialise the attribute descriptor with respect to the class.
 
@@ -117,93 +380,521 @@ class AttributeDescriptor(object):
         could be looked up when it's needed but since we know it
         right now, we save the trouble and just remember it.
 
-        If a builder method is named, check that it exists on the
-        class.
-
         Set up descriptors required to handle attribute delegations.
 
         """
         # store name
         self._name = name
 
-        # check builder
-        if self._builder:
-            if self._builder not in dict:
-                raise AttributeError(
-                    '{!r} attribute builder method {!r} not found'
-                    .format(self._name, self._builder)
-                )
-            if not callable(dict[self._builder]):
-                raise AttributeError(
-                    '{!r} attribute builder {!r} is not callable'
-                    .format(self._name, self._builder)
-                )
-
         # set up delegation
+        for handle, target in self._delegations():
+            dict[handle] = self._delegation(handle, target)
+
+    def _delegations(self):
+        """Return (handle, target) pairs for the attribute's delegations.
+
+        A handle given by a dotted name in a sequence of handles is
+        named for the last part of the name.
+
+        """
         if isinstance(self._handles, collections.Mapping):
-            delegations = viewitems(self._handles)
+            return viewitems(self._handles)
+        return ((name.rsplit('.', 1)[-1], name) for name in self._handles)
+
+    def _delegation(self, handle, target):
+        """Compile a delegation to a property.
+
+        The getter reads the attribute's storage directly (falling
+        back on ``__get__`` for values that are pending or not set,
+        and for descriptors other than the ordinary ones), then
+        follows the path of the target.  A curried target gives a
+        ``functools.partial``; if the attribute is stored in the
+        instance dictionary, the partial is kept there, tagged with
+        the delegatee, so that it is made again only if the attribute
+        has been assigned another value.
+
+        """
+        path, args = _parse_target(target)
+        ns = {
+            'read': self.__get__,
+            '_PENDING': _PENDING,
+            'partial': functools.partial,
+            'args': args,
+        }
+        if type(self) is AttributeDescriptor:
+            ns['k'] = self._key
+            read = [
+                '_elk_attrs = _elk_self.__elk_attrs__',
+                '_elk_v = _elk_attrs.get(k, _PENDING)',
+            ]
+        elif type(self) is SlotAttributeDescriptor:
+            read = [
+                'try:',
+                '    _elk_v = _elk_self.%s' % self._slot_name,
+                'except AttributeError:',
+                '    _elk_v = _PENDING',
+            ]
+        else:
+            read = ['_elk_v = _PENDING']
+        read += [
+            'if _elk_v is _PENDING:',
+            '    _elk_v = read(_elk_self, None)',
+        ]
+        parent = '.'.join(('_elk_v',) + path[:-1])
+        expr = parent + '.' + path[-1]
+        if not args:
+            get = read + ['return ' + expr]
+        elif type(self) is AttributeDescriptor and len(path) == 1:
+            ns['c'] = object()  # key of the partial in storage
+            get = read + [
+                '_elk_c = _elk_attrs.get(c)',
+                'if _elk_c is not None and _elk_c[0] is _elk_v:',
+                '    return _elk_c[1]',
+                '_elk_t = partial(%s, *args)' % expr,
+                '_elk_attrs[c] = (_elk_v, _elk_t)',
+                'return _elk_t',
+            ]
         else:
-            delegations = ((name, name) for name in self._handles)
-        for handle, target in delegations:
-            dict[handle] = DelegationDescriptor(target, self)
+            get = read + ['return partial(%s, *args)' % expr]
+        source = ['def get(_elk_self):'] + ['    ' + x for x in get]
+        if not args:
+            source += ['def set(_elk_self, _elk_value):']
+            source += ['    ' + x for x in read + [expr + ' = _elk_value']]
+            source += ['def delete(_elk_self):']
+            source += ['    ' + x for x in read + ['del ' + expr]]
+        code = _compile(
+            source, '<elk delegation {}>'.format('.'.join(path)))
+        exec(code, ns)
+        return property(
+            ns['get'], ns.get('set'), ns.get('delete'),
+            'Delegates to {}.{}'.format(self._name, '.'.join(path))
+        )
+
+    def _defer(self, instance):
+        """Arrange for a lazy value to be generated when read.
+
+        Rather than keeping a closure over the instance (which would
+        make a reference cycle), mark the value as pending; the
+        descriptor knows how to generate it.
 
-    def init_instance_value(self, instance, value):
-        if value:
-            self.__set__(instance, value[0], force=True)
-            return True
+        """
+        instance.__elk_attrs__[self._key] = _PENDING
+
+    def _peek(self, instance, default):
+        """Return the stored value without generating lazy values.
 
-    def init_instance_default(self, instance, value):
+        Return ``_PENDING`` if the attribute is lazy and has not yet
+        been read, or ``default`` if the attribute is not set.
+
+        """
+        return instance.__elk_attrs__.get(self._key, default)
+
+    def _store(self, instance, value):
+        """Store a value that is known to be acceptable."""
+        instance.__elk_attrs__[self._key] = value
+
+    def _check(self, value, force=False):
+        """Raise if ``value`` may not be assigned to the attribute."""
+        if self._mode == 'ro' and not force:
+            raise AttributeError('{!r} attribute is read-only')
+        if self._set_check is not None and not self._set_check(value):
+            raise TypeError(
+                '{!r} attribute must be a {!r}'
+                .format(self._name, self._type)
+            )
+
+    def _set_validation(self, level, rate):
+        """Swap in the assignment check for the validation policy."""
+        check = self._type_check
+        if check is None or level == validation.FULL:
+            self._set_check = check
+        elif level == validation.TRUSTED:
+            self._set_check = None
+        else:
+            self._set_check = validation.sampled(check, rate)
+
+    def _generate(self, instance):
+        """Generate the value of a lazy attribute."""
+        if self._batch_builder:
+            return self._generate_batch(instance)
         if self._has_default:
             default = self._default
-            if self._lazy:
-                if callable(default):
-                    f = functools.partial(default, instance)
-                else:
-                    f = lambda: default
-                instance.__elk_lazy__[id(self)] = f
-            else:
-                self.__set__(
-                    instance,
-                    default(instance) if callable(default) else default,
-                    force=True
-                )
-            return True
+            return default(instance) if callable(default) else default
+        return getattr(instance, self._builder)()
 
-    def init_instance_builder(self, instance, value):
-        if self._builder:
-            builder = getattr(instance, self._builder)
-            if self._lazy:
-                instance.__elk_lazy__[id(self)] = builder
-            else:
-                self.__set__(instance, builder(), force=True)
-            return True
+    def _enlist(self, instance):
+        """Add a new object to the innermost batch scope, if any."""
+        stack = getattr(_scopes, 'stack', None)
+        if stack:
+            stack[-1]._enlist(self, instance)
 
-    def init_instance_required(self, instance, value):
-        if self._required:
-            # value required, but not provided, and no default or builder
-            raise AttributeError('required attribute not provided')
+    def _generate_batch(self, instance):
+        """Generate the value for an object and its batch.
+
+        The batch builder is given the object along with every other
+        object of the active batch scopes whose value is pending, and
+        their values are stored.  Return the value for ``instance``.
+
+        """
+        objects = [instance]
+        seen = set([id(instance)])
+        for scope in getattr(_scopes, 'stack', ()):
+            for obj in scope._pending.pop(id(self), ()):
+                if id(obj) not in seen \
+                        and self._peek(obj, None) is _PENDING:
+                    seen.add(id(obj))
+                    objects.append(obj)
+        values = self._build_batch(type(instance), objects)
+        for obj, value in zip(objects[1:], values[1:]):
+            self._store(obj, value)
+        return values[0]
+
+    def _build_batch(self, owner, objects):
+        """Call the batch builder for ``objects`` and check the values."""
+        values = list(getattr(owner, self._batch_builder)(objects))
+        if len(values) != len(objects):
+            raise ValueError(
+                '{!r} attribute batch builder gave {} values for {} objects'
+                .format(self._name, len(values), len(objects))
+            )
+        for value in values:
+            self._check(value, force=True)
+        return values
+
+    def _generate_once(self, instance):
+        """Generate a ``lazy='once'`` value, in one thread only."""
+        def generate():
+            value = self._generate(instance)
+            self._set_generated(instance, value)
+            return value
+        return _once(
+            (id(instance), id(self)), self._name,
+            functools.partial(self._peek, instance, _PENDING), generate)
+
+    def _set_generated(self, instance, value):
+        """Check and store a generated value.
+
+        Unlike assignment, storing a generated value does not fire the
+        trigger or update dependent attributes.
+
+        """
+        self._check(value, force=True)
+        self._store(instance, value)
+
+    def _set_watched(self, instance, value):
+        """Store a checked value, then update dependents and fire triggers."""
+        if self._trigger is not None:
+            old = self._peek(instance, _UNSET)
+        self._store(instance, value)
+        if self._has_dependents:
+            self._invalidate(instance)
+        if self._trigger is not None:
+            self._fire(instance, value, old)
+
+    def _fire(self, instance, value, old=_UNSET):
+        """Call the trigger, or defer it to the outermost batch scope."""
+        stack = getattr(_scopes, 'stack', None)
+        if stack:
+            stack[0]._defer_trigger(self, instance, value, old)
+        elif old is _UNSET or old is _PENDING:
+            self._trigger(instance, value)
+        else:
+            self._trigger(instance, value, old)
+
+    def _invalidate(self, instance, regenerate=True):
+        """Update the attributes that depend on this one.
+
+        Generated lazy values are reset, to be generated again when
+        read, and (if ``regenerate``) non-lazy values are generated
+        again.  Either counts as a change to the dependent attribute,
+        so dependencies are followed transitively.
+
+        """
+        dependents = type(instance).__elk_dependents__.get(self._name, ())
+        for attrdesc in dependents:
+            attrdesc._stale(instance, regenerate)
+
+    def _stale(self, instance, regenerate):
+        """Update the value of this attribute after a dependency changed."""
+        if self._lazy:
+            if self._peek(instance, _PENDING) is not _PENDING:
+                self._defer(instance)
+                self._invalidate(instance, regenerate)
+        elif regenerate:
+            self.__set__(instance, self._generate(instance), force=True)
+
+    def _copy(self):
+        """Return a copy of this descriptor.
+
+        A class consuming a role gets its own copies of the role's
+        attributes, so that what it sets up on them (the assignment
+        check for its validation policy, its dependents) does not
+        leak into the other consumers; so does a subclass of inherited
+        attributes that it sets up differently.  The copy keeps the
+        storage key, so an object's value is found by either.
+
+        """
+        attrdesc = type(self).__new__(type(self))
+        attrdesc.__dict__.update(self.__dict__)
+        return attrdesc
+
+    def _with_slot(self, slot_name):
+        """Return a copy of this descriptor that uses slot storage."""
+        attrdesc = self._slot_class.__new__(self._slot_class)
+        attrdesc.__dict__.update(self.__dict__)
+        attrdesc._slot_name = slot_name
+        return attrdesc
 
     @_key_error_to_attribute_error
     def __get__(self, instance, owner):
         if instance is None:
             return self
-        _id = id(self)
-        if _id not in instance.__elk_attrs__ and _id in instance.__elk_lazy__:
-            self.__set__(instance, instance.__elk_lazy__[_id](), force=True)
-        return instance.__elk_attrs__[id(self)]
+        value = instance.__elk_attrs__[self._key]
+        if value is _PENDING:
+            if self._lazy == 'once':
+                return self._generate_once(instance)
+            value = self._generate(instance)
+            self._set_generated(instance, value)
+        return value
 
     def __set__(self, instance, value, force=False):
         if self._mode == 'ro' and not force:
             raise AttributeError('{!r} attribute is read-only')
-        if self._type is not None and not isinstance(value, self._type):
+        if self._set_check is not None and not self._set_check(value):
             raise TypeError(
                 '{!r} attribute must be a {!r}'
                 .format(self._name, self._type)
             )
-        instance.__elk_attrs__[id(self)] = value
+        if self._watched:
+            return self._set_watched(instance, value)
+        instance.__elk_attrs__[self._key] = value
 
     @_key_error_to_attribute_error
     def __delete__(self, instance):
         if self._required:
             raise AttributeError('cannot delete required attribute')
-        del instance.__elk_attrs__[id(self)]
+        _id = self._key
+        if self._lazy:
+            # the value will be generated again when next read
+            if instance.__elk_attrs__[_id] is _PENDING:
+                raise KeyError(_id)
+            instance.__elk_attrs__[_id] = _PENDING
+        else:
+            del instance.__elk_attrs__[_id]
+        if self._has_dependents:
+            self._invalidate(instance, regenerate=False)
+
+
+class SlotAttributeDescriptor(AttributeDescriptor):
+    """Attribute descriptor that keeps its value in a slot.
+
+    Classes that set ``__elk_slots__`` have ``__slots__`` generated
+    by the Elk metaclass, which then substitutes these descriptors
+    for ordinary attribute descriptors and gives each one the member
+    descriptor of its slot (``_slot``).  Lazy attributes that have
+    not yet been read hold ``_PENDING`` in their slot.
+
+    """
+    def _defer(self, instance):
+        self._slot.__set__(instance, _PENDING)
+
+    def _store(self, instance, value):
+        self._slot.__set__(instance, value)
+
+    def _peek(self, instance, default):
+        try:
+            return self._slot.__get__(instance, None)
+        except AttributeError:
+            return default
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            value = self._slot.__get__(instance, owner)
+        except AttributeError:
+            raise AttributeError(
+                '{!r} object {!r} attribute is not set'
+                .format(type(instance).__name__, self._name)
+            )
+        if value is _PENDING:
+            if self._lazy == 'once':
+                return self._generate_once(instance)
+            value = self._generate(instance)
+            self._set_generated(instance, value)
+        return value
+
+    def __set__(self, instance, value, force=False):
+        self._check(value, force)
+        if self._watched:
+            return self._set_watched(instance, value)
+        self._slot.__set__(instance, value)
+
+    def __delete__(self, instance):
+        if self._required:
+            raise AttributeError('cannot delete required attribute')
+        try:
+            if not self._lazy:
+                self._slot.__delete__(instance)
+            elif self._slot.__get__(instance, None) is _PENDING:
+                raise AttributeError
+            else:
+                self._slot.__set__(instance, _PENDING)
+        except AttributeError:
+            raise AttributeError(
+                '{!r} object {!r} attribute is not set'
+                .format(type(instance).__name__, self._name)
+            )
+        if self._has_dependents:
+            self._invalidate(instance, regenerate=False)
+
+
+class _InFlight(object):
+    """Storage marker for an ``lazy='async'`` value being generated."""
+    __slots__ = ('future',)
+
+    def __init__(self, future):
+        self.future = future
+
+
+class _Resolved(object):
+    """An awaitable that immediately gives the value it holds."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __await__(self):
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        raise StopIteration(self.value)
+
+    next = __next__
+
+
+class _AsyncMixin(object):
+    """Descriptor methods for ``lazy='async'`` attributes.
+
+    Reading the attribute gives an awaitable.  The first read of a
+    pending value starts a task that awaits the builder (or default);
+    reads while the task is running share its result (each through
+    ``asyncio.shield``, so that cancelling one reader does not cancel
+    the others).  Once stored, the value is given by an awaitable that
+    completes immediately.  If the builder fails, or its result is not
+    acceptable, the value is pending again.
+
+    """
+    def _peek(self, instance, default):
+        value = super(_AsyncMixin, self)._peek(instance, default)
+        return _PENDING if isinstance(value, _InFlight) else value
+
+    def _stale(self, instance, regenerate):
+        if isinstance(super(_AsyncMixin, self)._peek(instance, None),
+                      _InFlight):
+            # the value being generated may come from the old values
+            self._defer(instance)
+        super(_AsyncMixin, self)._stale(instance, regenerate)
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = super(_AsyncMixin, self)._peek(instance, _UNSET)
+        if value is _UNSET:
+            raise AttributeError(
+                '{!r} object {!r} attribute is not set'
+                .format(type(instance).__name__, self._name)
+            )
+        if value is _PENDING:
+            loop = asyncio.get_event_loop()
+            task = asyncio.ensure_future(self._generate(instance), loop=loop)
+            value = _InFlight(loop.create_future())
+            self._store(instance, value)
+            task.add_done_callback(
+                functools.partial(self._finish, instance, value))
+        if isinstance(value, _InFlight):
+            return asyncio.shield(value.future)
+        return _Resolved(value)
+
+    def _finish(self, instance, flight, task):
+        """Store the generated value and pass it on to the readers."""
+        # the attribute may have been assigned or deleted meanwhile
+        current = super(_AsyncMixin, self)._peek(instance, None) is flight
+        if task.cancelled():
+            if current:
+                self._defer(instance)
+            flight.future.cancel()
+            return
+        exc = task.exception()
+        if exc is None:
+            value = task.result()
+            try:
+                self._check(value, force=True)
+            except TypeError as e:
+                exc = e
+        if exc is not None:
+            if current:
+                self._defer(instance)
+            flight.future.set_exception(exc)
+            return
+        if current:
+            self._store(instance, value)
+        flight.future.set_result(value)
+
+
+class AsyncAttributeDescriptor(_AsyncMixin, AttributeDescriptor):
+    """Attribute descriptor for ``lazy='async'`` attributes."""
+
+
+class AsyncSlotAttributeDescriptor(_AsyncMixin, SlotAttributeDescriptor):
+    """Slot attribute descriptor for ``lazy='async'`` attributes."""
+
+
+def _weak(value):
+    """Return what a ``weak_ref`` attribute stores for ``value``."""
+    return None if value is None else weakref.ref(value)
+
+
+class _WeakMixin(object):
+    """Descriptor methods for ``weak_ref`` attributes.
+
+    Values (other than ``None``) are stored as weak references, and
+    dereferenced when read.  Once the referent is collected the
+    attribute is not set.
+
+    """
+    def _peek(self, instance, default):
+        value = super(_WeakMixin, self)._peek(instance, default)
+        if isinstance(value, weakref.ref):
+            value = value()
+            if value is None:
+                return default
+        return value
+
+    def _store(self, instance, value):
+        super(_WeakMixin, self)._store(instance, _weak(value))
+
+    @_key_error_to_attribute_error
+    def __get__(self, instance, owner):
+        value = super(_WeakMixin, self).__get__(instance, owner)
+        if isinstance(value, weakref.ref):
+            value = value()
+            if value is None:
+                raise KeyError(self._name)
+        return value
+
+
+class WeakAttributeDescriptor(_WeakMixin, AttributeDescriptor):
+    """Attribute descriptor for ``weak_ref`` attributes."""
+
+
+class WeakSlotAttributeDescriptor(_WeakMixin, SlotAttributeDescriptor):
+    """Slot attribute descriptor for ``weak_ref`` attributes."""
+
+
+AttributeDescriptor._slot_class = SlotAttributeDescriptor
+AsyncAttributeDescriptor._slot_class = AsyncSlotAttributeDescriptor
+WeakAttributeDescriptor._slot_class = WeakSlotAttributeDescriptor
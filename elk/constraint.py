@@ -0,0 +1,316 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Type constraints for attributes, and their compilation into checks.
+
+The ``type`` option of an attribute may be a class, a tuple of
+classes, one of the constraints defined here (``Union``,
+``Optional``, ``ListOf``, ``TupleOf``, ``SetOf``, ``DictOf`` and
+``Predicate``), a ``typing`` construct such as ``List[int]`` or
+``Optional[str]``, or a function, which is used as a predicate.
+``compile_constraint`` turns the option into a function that
+returns whether a value is acceptable.
+
+"""
+
+import collections
+import types
+
+try:
+    import typing
+except ImportError:
+    typing = None
+
+abc = getattr(collections, 'abc', collections)
+
+_NoneType = type(None)
+
+# old-style classes are classes too
+_CLASS_TYPES = (type, getattr(types, 'ClassType', type))
+
+# the callables that are used as predicates
+_FUNCTION_TYPES = (types.FunctionType, types.BuiltinFunctionType)
+
+
+class Constraint(object):
+    """Base class of type constraints that are not classes."""
+    def compile(self):
+        """Return a function that returns whether a value is acceptable."""
+        raise NotImplementedError
+
+
+def _repr(spec):
+    if isinstance(spec, _CLASS_TYPES):
+        return spec.__name__
+    return repr(spec)
+
+
+class Union(Constraint):
+    """Accept a value that satisfies any of the given constraints."""
+    def __init__(self, *specs):
+        if not specs:
+            raise TypeError('Union requires at least one constraint')
+        self.specs = specs
+
+    def __repr__(self):
+        return 'Union({})'.format(', '.join(map(_repr, self.specs)))
+
+    def compile(self):
+        return _compile_union(self.specs)
+
+
+class Optional(Union):
+    """Accept ``None`` or a value that satisfies the given constraint."""
+    def __init__(self, spec):
+        super(Optional, self).__init__(spec, _NoneType)
+
+    def __repr__(self):
+        return 'Optional({})'.format(_repr(self.specs[0]))
+
+
+class _Collection(Constraint):
+    container = None
+
+    def __init__(self, item):
+        self.item = item
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, _repr(self.item))
+
+    def compile(self):
+        return _items_check(self.container, self.item)
+
+
+class ListOf(_Collection):
+    """Accept a list whose items all satisfy the given constraint."""
+    container = list
+
+
+class TupleOf(_Collection):
+    """Accept a tuple whose items all satisfy the given constraint."""
+    container = tuple
+
+
+class SetOf(_Collection):
+    """Accept a set or frozenset whose items satisfy the constraint."""
+    container = (set, frozenset)
+
+
+class DictOf(Constraint):
+    """Accept a dict whose keys and values satisfy the constraints."""
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+
+    def __repr__(self):
+        return 'DictOf({}, {})'.format(_repr(self.key), _repr(self.value))
+
+    def compile(self):
+        return _mapping_check(dict, self.key, self.value)
+
+
+class Predicate(Constraint):
+    """Accept a value for which ``function`` returns true."""
+    def __init__(self, function, description=None):
+        self.function = function
+        self.description = description
+
+    def __repr__(self):
+        if self.description is not None:
+            return self.description
+        return 'Predicate({})'.format(
+            getattr(self.function, '__name__', self.function))
+
+    def compile(self):
+        function = self.function
+        return lambda value: bool(function(value))
+
+
+def compile_constraint(spec):
+    """Compile a type constraint.
+
+    Return ``(check, classes)``.  ``check`` is a function that returns
+    whether a value satisfies the constraint, or ``None`` if every
+    value does.  ``classes`` is a tuple of classes if the constraint
+    is satisfied exactly by instances of those classes (so a check of
+    the class of a value suffices), or else ``None``.
+
+    """
+    if spec is None or _is_any(spec):
+        return None, None
+    classes = _classes(spec)
+    if classes is not None:
+        return _class_check(classes), classes
+    return _compile(spec), None
+
+
+def _is_any(spec):
+    return typing is not None and spec is getattr(typing, 'Any', None)
+
+
+def _supertype(spec):
+    """Return the type that a ``typing.NewType`` stands for."""
+    while hasattr(spec, '__supertype__'):
+        spec = spec.__supertype__
+    return spec
+
+
+def _classes(spec):
+    """Return the classes of a class-only constraint, or ``None``."""
+    spec = _supertype(spec)
+    union_args = _typing_union_args(spec)
+    if union_args is not None:
+        return _classes(Union(*union_args))
+    if getattr(spec, '__origin__', None) is not None:
+        # parametrised generics may pass for classes, but are not
+        return None
+    if isinstance(spec, _CLASS_TYPES):
+        return (spec,)
+    if isinstance(spec, tuple) and spec \
+            and all(isinstance(x, _CLASS_TYPES) for x in spec):
+        return spec
+    if isinstance(spec, Union):
+        specs = [_classes(x) for x in spec.specs]
+        if all(x is not None for x in specs):
+            return tuple(c for x in specs for c in x)
+    return None
+
+
+def _class_check(classes):
+    """Return a check of the class of a value.
+
+    The check has a fast path for the exact classes named by the
+    constraint, and caches the other classes it has accepted, so that
+    repeated checks against abstract base classes are a set lookup.
+
+    """
+    if len(classes) == 1 and type(classes[0]) is type:
+        # isinstance for an ordinary class is fast enough on its own
+        return classes[0].__instancecheck__
+    accepted = set(c for c in classes if type(c) is type)
+
+    def check(value):
+        cls = type(value)
+        if cls in accepted:
+            return True
+        if isinstance(value, classes):
+            # isinstance can be fooled by __class__; only cache real types
+            if issubclass(cls, classes):
+                accepted.add(cls)
+            return True
+        return False
+    return check
+
+
+def _compile(spec):
+    """Compile a constraint that is not satisfied by classes alone."""
+    spec = _supertype(spec)
+    if isinstance(spec, Constraint):
+        return spec.compile()
+    if isinstance(spec, tuple):
+        return _compile_union(spec)
+    union_args = _typing_union_args(spec)
+    if union_args is not None:
+        return _compile_union(union_args)
+    origin = getattr(spec, '__origin__', None)
+    if isinstance(origin, type):
+        return _compile_generic(origin, getattr(spec, '__args__', ()))
+    if isinstance(spec, _FUNCTION_TYPES):
+        return Predicate(spec).compile()
+    # other callables include typing constructs that are not supported
+    raise TypeError('unsupported type constraint: {!r}'.format(spec))
+
+
+def _compile_union(specs):
+    classes = tuple(c for x in specs for c in (_classes(x) or ()))
+    checks = [_compile(x) for x in specs if _classes(x) is None]
+    if classes:
+        checks.insert(0, _class_check(classes))
+
+    def check(value):
+        for c in checks:
+            if c(value):
+                return True
+        return False
+    return check
+
+
+def _typing_union_args(spec):
+    """Return the members of a ``typing`` union, or ``None``."""
+    if typing is None:
+        return None
+    if getattr(spec, '__origin__', None) is getattr(typing, 'Union', None) \
+            or type(spec).__name__ == 'UnionType':
+        return spec.__args__
+    return None
+
+
+def _compile_generic(origin, args):
+    """Compile a parametrised ``typing`` (or builtin) generic."""
+    type_var = getattr(typing, 'TypeVar', ())
+    args = tuple(arg for arg in args if not isinstance(arg, type_var))
+    if not args:
+        return _class_check((origin,))
+    if issubclass(origin, tuple):
+        if len(args) == 2 and args[1] is Ellipsis:
+            return _items_check(origin, args[0])
+        if args == ((),):
+            args = ()
+        return _fixed_tuple_check(origin, args)
+    if issubclass(origin, abc.Mapping) and len(args) == 2:
+        return _mapping_check(origin, args[0], args[1])
+    if issubclass(origin, (abc.Sequence, abc.Set)) and len(args) == 1 \
+            and not issubclass(origin, (str, bytes)):
+        return _items_check(origin, args[0])
+    # other generics (iterators, callables, ...) are checked by class
+    return _class_check((origin,))
+
+
+def _item_check(spec):
+    check, _ = compile_constraint(spec)
+    return check or (lambda value: True)
+
+
+def _items_check(container, item):
+    is_container = _class_check(
+        container if isinstance(container, tuple) else (container,))
+    item_check = _item_check(item)
+
+    def check(value):
+        return is_container(value) and all(map(item_check, value))
+    return check
+
+
+def _fixed_tuple_check(container, items):
+    is_container = _class_check((container,))
+    item_checks = [_item_check(item) for item in items]
+
+    def check(value):
+        return is_container(value) and len(value) == len(item_checks) \
+            and all(c(x) for c, x in zip(item_checks, value))
+    return check
+
+
+def _mapping_check(container, key, value):
+    is_container = _class_check((container,))
+    key_check = _item_check(key)
+    value_check = _item_check(value)
+
+    def check(mapping):
+        return is_container(mapping) and all(
+            key_check(k) and value_check(v) for k, v in mapping.items()
+        )
+    return check
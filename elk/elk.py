@@ -17,8 +17,15 @@
 """Convenience module for loading public API."""
 
 from .attribute import AttributeDescriptor as ElkAttribute
-from .meta import ElkRole, Elk
-from .modifier import before, after, around
+from .attribute import SlotAttributeDescriptor, ElkBatch
+from .constraint import (
+    Constraint, Union, Optional, ListOf, TupleOf, SetOf, DictOf, Predicate
+)
+from .meta import ElkRole, Elk, ElkMeta, ElkRoleMeta, apply_role, meta
+from .modifier import before, after, around, augment, augmentable
+from .pool import ElkPool
+from .validation import set_validation
+from .table import ElkTable
 
 attr = ElkAttribute
 
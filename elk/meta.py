@@ -15,9 +15,25 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import collections
+import itertools
+import keyword
+import random
+import re
+import sys
+
+try:
+    import copyreg
+except ImportError:
+    import copy_reg as copyreg
+
+try:
+    from types import MappingProxyType as _frozen
+except ImportError:
+    _frozen = None
 
 from . import attribute
 from . import modifier
+from . import validation
 
 
 viewitems = getattr(dict, 'viewitems', getattr(dict, 'items'))
@@ -28,117 +44,355 @@ viewvalues = getattr(dict, 'viewvalues', getattr(dict, 'values'))
 class ElkMeta(type):
     def __new__(mcs, name, bases, dict):
         # initialise roles
-        roles = dict.get('__with__', ())
-        if not isinstance(roles, collections.Iterable):
-            roles = (roles,)
-        badroles = [
-            role for role in roles
-            if not issubclass(type(role), ElkRoleMeta)
-        ]
-        if badroles:
-            raise TypeError(
-                'Non-roles in __roles__: {}'.format(badroles)
-            )
+        roles = _roles(dict)
         dict['__elk_roles__'] = roles
         for role in roles:
             ElkRoleMeta.apply_to_class_dict(dict, role)
+        dict['__elk_does__'] = _does(bases, roles)
 
-        # initialise attributes
+        # collect the attributes, modifiers and augments in one pass
+        own = {}
+        modifiers = []
+        augmentables = []
+        augments = []
+        for k, v in viewitems(dict):
+            if isinstance(v, attribute.AttributeDescriptor):
+                own[k] = v
+            elif isinstance(v, modifier.Modifier):
+                modifiers.append(v)
+            elif isinstance(v, modifier.Augmentable):
+                augmentables.append((k, v))
+            elif isinstance(v, modifier.Augment):
+                augments.append(v)
+        elk_bases = [base for base in bases if hasattr(base, '__elk_attrs__')]
         attrdescs = {}
-        for base in reversed(bases):
-            if hasattr(base, '__elk_attrs__'):
-                attrdescs.update(base.__elk_attrs__)
-        attrdescs.update({
-            k: v for k, v in dict.items()
-            if isinstance(v, attribute.AttributeDescriptor)
-        })
-        for k in attrdescs:
-            attrdescs[k].init_class(k, dict)
-        dict['__elk_attrs__'] = attrdescs
+        for base in reversed(elk_bases):
+            attrdescs.update(base.__elk_attrs__)
+        # the metadata of a single base can be extended rather than
+        # computed again if no inherited attribute is overridden
+        incremental = len(elk_bases) == 1 and not any(
+            k in attrdescs for k in own)
+        attrdescs.update(own)
 
-        init_args = set(
-            v._init_arg or k for k, v in viewitems(attrdescs)
-            if not v._has_init_arg or v._init_arg is not None
+        # set up slot storage
+        slotted = dict.get('__elk_slots__', any(
+            getattr(base, '__elk_slots__', False) for base in bases
+        ))
+        if slotted:
+            slots = _make_slots(attrdescs, bases)
+            for k, attrdesc in viewitems(slots):
+                dict[k] = attrdescs[k] = own[k] = attrdesc
+            own_slots = dict.get('__slots__', ())
+            if isinstance(own_slots, str):
+                own_slots = (own_slots,)
+            dict['__slots__'] = tuple(own_slots) + tuple(
+                attrdesc._slot_name for attrdesc in viewvalues(slots)
+            )
+            incremental = incremental and not any(
+                k in elk_bases[0].__elk_attrs__ for k in slots)
+
+        # set up frozen classes
+        inherited = any(
+            getattr(base, '__elk_frozen__', False) for base in bases
         )
+        frozen = dict['__elk_frozen__'] = dict.get(
+            '__elk_frozen__', inherited)
+        if inherited and not frozen:
+            raise TypeError('subclass of frozen class must be frozen')
+        if frozen:
+            dict.setdefault('__setattr__', _frozen_setattr)
+            dict.setdefault('__delattr__', _frozen_delattr)
+            if slotted and not any(
+                _find_in_mro(base, '_elk_hash') for base in bases
+            ):
+                dict['__slots__'] += ('_elk_hash',)
+
+        # inherited attributes were initialised with their classes
+        for k in own:
+            own[k].init_class(k, dict)
+        dict['__elk_attrs__'] = attrdescs
+        for k, attrdesc in viewitems(own):
+            unknown = set(attrdesc._depends_on or ()) - viewkeys(attrdescs)
+            if unknown:
+                raise AttributeError(
+                    '{!r} attribute depends on unknown attributes: {}'
+                    .format(k, sorted(unknown))
+                )
+
+        # a cycle would include an attribute of this class
+        cycle = _dependency_cycle(attrdescs, own)
+        if cycle:
+            raise TypeError(
+                'attributes depend on each other: {}'
+                .format(' -> '.join(cycle))
+            )
+
+        # the attributes to update when each attribute changes, and
+        # the init args
+        if incremental:
+            base = elk_bases[0]
+            dependents = {
+                k: list(v) for k, v in viewitems(base.__elk_dependents__)
+            }
+            init_args = set(base.__elk_init_args__)
+            new = own
+        else:
+            dependents = {}
+            init_args = set()
+            new = attrdescs
+        for attrdesc in sorted(viewvalues(new), key=_seq):
+            for k in attrdesc._depends_on or ():
+                dependents.setdefault(k, []).append(attrdesc)
+            if not attrdesc._has_init_arg or attrdesc._init_arg is not None:
+                init_args.add(attrdesc._init_arg or attrdesc._name)
+        dict['__elk_dependents__'] = {
+            k: tuple(sorted(v, key=_seq)) for k, v in viewitems(dependents)
+        }
         dict['__elk_init_args__'] = init_args
 
         cls = type.__new__(mcs, name, bases, dict)
 
-        # check role requirements
-        for role in roles:
+        # give slot attribute descriptors their slots
+        if slotted:
+            for attrdesc in viewvalues(slots):
+                attrdesc._slot = vars(cls)[attrdesc._slot_name]
+
+        # inherited attributes are checked on assignment by the policy
+        # of the class that owns them, so the class gets copies of its
+        # own of those from a base whose policy may be different
+        source = _policy_source(cls)
+        copied = False
+        for base in elk_bases:
+            if _policy_source(base) == source:
+                continue
+            for k, attrdesc in viewitems(base.__elk_attrs__):
+                if attrdescs.get(k) is attrdesc:
+                    attrdescs[k] = attrdesc._copy()
+                    type.__setattr__(cls, k, attrdescs[k])
+                    copied = True
+
+        # flag the attributes that others depend on; an inherited one is
+        # copied first, so that its class does not pay for the updates
+        for k in dependents:
+            attrdesc = attrdescs[k]
+            if attrdesc._has_dependents:
+                continue
+            if vars(cls).get(k) is not attrdesc:
+                attrdesc = attrdescs[k] = attrdesc._copy()
+                type.__setattr__(cls, k, attrdesc)
+                copied = True
+            attrdesc._has_dependents = attrdesc._watched = True
+        if copied:
+            dependents = dict['__elk_dependents__']
+            for k, v in viewitems(dependents):
+                dependents[k] = tuple(attrdescs[a._name] for a in v)
+
+        # check role requirements (including those of composed roles)
+        for role in set().union(*(role.__elk_does__ for role in roles)):
             ElkRoleMeta.check_requirements(cls, role)
 
-        # apply method modifiers
-        modifiers = sorted(
-            v for v in viewvalues(dict)
-            if isinstance(v, modifier.Modifier)
-        )
-        for mod in modifiers:
-            mod.apply(cls)
+        # check builders and batch builders (which may be inherited)
+        for k, attrdesc in viewitems(own):
+            if attrdesc._builder:
+                builder = getattr(cls, attrdesc._builder, _MISSING)
+                if builder is _MISSING:
+                    raise AttributeError(
+                        '{!r} attribute builder method {!r} not found'
+                        .format(k, attrdesc._builder)
+                    )
+                if not callable(builder):
+                    raise AttributeError(
+                        '{!r} attribute builder {!r} is not callable'
+                        .format(k, attrdesc._builder)
+                    )
+            if attrdesc._batch_builder \
+                    and not hasattr(cls, attrdesc._batch_builder):
+                raise AttributeError(
+                    '{!r} attribute batch builder {!r} not found'
+                    .format(k, attrdesc._batch_builder)
+                )
+
+        # set up augmented methods, then apply method modifiers
+        if augmentables or augments:
+            modifier.apply_augments(cls, augmentables, augments)
+        modifier.apply_modifiers(cls, modifiers)
+
+        # generate checks and constructor, and comparison for frozen classes
+        _apply_validation(cls)
+        validation._classes.add(cls)
+        if frozen:
+            _make_comparison(cls)
 
         return cls
 
-    def __call__(cls, *args, **kwargs):
-        try:
-            buildargs = cls.__buildargs__
-        except AttributeError:
-            buildargs = lambda **kwargs: kwargs
-        kwargs = buildargs(*args, **kwargs)
-
-        # build a mapping of attribute descriptors
-        attrdescs = cls.__elk_attrs__
-
-        # extract attribute values from kwargs
-        values = {k: kwargs[k] for k in set(kwargs) & cls.__elk_init_args__}
-
-        # create new object
-        obj = type.__call__(cls)
-
-        # initialise attributes
-        obj.__elk_attrs__ = {}
-        obj.__elk_lazy__ = {}
-        finished = set()
-        for method in (
-            'init_instance_value',
-            'init_instance_default',
-            'init_instance_builder',
-            'init_instance_required',
-        ):
-            for k in viewkeys(attrdescs) - finished:
-                init_arg = attrdescs[k]._init_arg or k
-                value = (values[init_arg],) if init_arg in values else ()
-                if getattr(attrdescs[k], method)(obj, value):
-                    finished.add(k)
-
-        # call __build__
-        obj.__build__(**kwargs)
-        return obj
+    def __call__(_elk_cls, *args, **kwargs):
+        return _elk_cls.__elk_new__(*args, **kwargs)
+
+    def pool(cls, size=64):
+        """Return a new ``ElkPool`` of up to ``size`` reusable objects."""
+        from .pool import ElkPool
+        return ElkPool(cls, size=size)
+
+    def build_many(cls, records, errors=None):
+        """Construct a list of objects from an iterable of records.
+
+        See ``build_iter``.
+
+        """
+        return list(cls.build_iter(records, errors=errors))
+
+    def build_iter(cls, records, errors=None, chunk_size=1000):
+        """Construct objects from an iterable of records.
+
+        Each record is either a mapping of init args to values, or a
+        tuple of values for the init args in the order in which the
+        attributes were declared.  Records are processed in chunks;
+        the types of the values in each chunk are checked a column
+        at a time and, if they are all acceptable, the objects are
+        initialised without checking each value again.
+
+        If ``errors`` is a list, a record that cannot be constructed
+        is skipped and ``(index, exception)`` is appended to the list.
+        Otherwise the exception is raised.
+
+        Return a generator of the constructed objects.
+
+        """
+        attrdescs = _attributes(cls)
+        init_args = tuple(
+            _init_arg(attrdesc) for attrdesc in attrdescs
+            if _init_arg(attrdesc) is not None
+        )
+        checks = [
+            (i, _init_arg(attrdesc), attrdesc)
+            for i, attrdesc in enumerate(
+                attrdesc for attrdesc in attrdescs
+                if _init_arg(attrdesc) is not None
+            )
+            if attrdesc._type_check is not None
+        ]
+        if validation.policy(cls)[0] == validation.TRUSTED:
+            checks = []
+        buildargs = _find_in_mro(cls, '__buildargs__') is not None
+        default_build = _has_default_build(cls)
+        # tuples can be passed straight to the generated initialiser
+        # if its parameters are the init args, in order
+        positional = not buildargs and default_build and all(
+            _is_param_name(init_arg) for init_arg in init_args
+        )
+        new = cls.__new__
+
+        def kwargs_from_record(record):
+            if isinstance(record, tuple):
+                if len(record) > len(init_args):
+                    raise TypeError(
+                        '{} values given for {} init args'
+                        .format(len(record), len(init_args))
+                    )
+                record = dict(zip(init_args, record))
+            if buildargs:
+                return cls.__buildargs__(**record)
+            return record
+
+        def column_ok(rows, i, k, attrdesc):
+            if rows and isinstance(rows[0], tuple):
+                values = (row[i] for row in rows if len(row) > i)
+            else:
+                values = (row[k] for row in rows if k in row)
+            classes = attrdesc._type_classes
+            if classes is None:
+                return all(map(attrdesc._type_check, values))
+            return all(
+                issubclass(value_type, classes)
+                for value_type in set(map(type, values))
+            )
+
+        index = 0
+        records = iter(records)
+        while True:
+            chunk = list(itertools.islice(records, chunk_size))
+            if not chunk:
+                break
+
+            if positional and all(
+                type(record) is tuple and len(record) <= len(init_args)
+                for record in chunk
+            ):
+                rows = chunk
+                failed = {}
+            else:
+                rows = []
+                failed = {}
+                for i, record in enumerate(chunk):
+                    try:
+                        rows.append(kwargs_from_record(record))
+                    except Exception as e:
+                        if errors is None:
+                            raise
+                        rows.append({})
+                        failed[i] = e
+
+            # check types a column at a time
+            checked = all(
+                column_ok(rows, i, k, attrdesc)
+                for i, k, attrdesc in checks
+            )
+            init = cls.__elk_init_unchecked__ if checked else cls.__elk_init__
+
+            for i, row in enumerate(rows):
+                if i in failed:
+                    errors.append((index + i, failed[i]))
+                    continue
+                try:
+                    obj = new(cls)
+                    if rows is chunk:
+                        init(obj, *row)
+                    else:
+                        init(obj, **row)
+                        if not default_build:
+                            obj.__build__(**row)
+                except Exception as e:
+                    if errors is None:
+                        raise
+                    errors.append((index + i, e))
+                    continue
+                yield obj
+            index += len(chunk)
 
 
 class ElkRoleMeta(type):
     def __new__(mcs, name, bases, role_dict):
-        # IronPython 2.7.0.40 does not expose descriptors in
-        # dictproxy iteration, so copy the dict.
-        role_dict['__elk_role_attrs__'] = dict(role_dict)
-        return type.__new__(mcs, name, bases, role_dict)
+        # compose the roles this role consumes
+        roles = _roles(role_dict)
+        for role in roles:
+            mcs.apply_to_class_dict(role_dict, role)
+        # Keep the members to compose into consumers, once, rather
+        # than filtering the role's entries for each consumer.  (This
+        # also works around IronPython 2.7.0.40, which does not expose
+        # descriptors in dictproxy iteration.)
+        role_dict['__elk_role_attrs__'] = {
+            k: v for k, v in viewitems(role_dict) if k not in _ROLE_META
+        }
+        cls = type.__new__(mcs, name, bases, role_dict)
+        cls.__elk_does__ = _does((), roles) | frozenset([cls])
+        return cls
 
     def __call__(self, *args, **kwargs):
         raise TypeError('Roles cannot be instantiated directly.')
 
     def __instancecheck__(cls, instance):
-        return issubclass(type(instance), cls)
+        return cls in getattr(type(instance), '__elk_does__', ())
 
     def __subclasscheck__(cls, subclass):
-        roles = getattr(subclass, '__with__', ())
-        if not isinstance(roles, collections.Iterable):
-            roles = (roles,)
-        return cls in roles
+        return cls in getattr(subclass, '__elk_does__', ())
 
     @classmethod
     def apply_to_class_dict(mcs, dict, role):
         """Apply a role to a class."""
         for k, v in viewitems(role.__elk_role_attrs__):
             if k not in dict:
+                if isinstance(v, attribute.AttributeDescriptor):
+                    v = v._copy()
                 dict[k] = v
 
     @classmethod
@@ -151,13 +405,1104 @@ class ElkRoleMeta(type):
                 raise TypeError('{} requires {}'.format(role, require))
 
 
+# role entries that describe the role rather than being composed
+_ROLE_META = frozenset([
+    '__doc__', '__module__', '__qualname__', '__require__', '__with__',
+])
+
+
+def _roles(dict):
+    """Return the roles named by ``__with__`` in a class dict."""
+    roles = dict.get('__with__', ())
+    if not isinstance(roles, collections.Iterable):
+        roles = (roles,)
+    badroles = [
+        role for role in roles
+        if not issubclass(type(role), ElkRoleMeta)
+    ]
+    if badroles:
+        raise TypeError(
+            'Non-roles in __roles__: {}'.format(badroles)
+        )
+    return roles
+
+
+def _does(bases, roles):
+    """Return every role done by a class with these bases and roles.
+
+    That is the roles themselves, the roles composed into them and
+    the roles done by the bases.  Membership checks (``isinstance``
+    and ``issubclass`` with a role) are a lookup in this set.
+
+    """
+    does = set()
+    for base in bases:
+        does.update(getattr(base, '__elk_does__', ()))
+    for role in roles:
+        does.update(role.__elk_does__)
+    return frozenset(does)
+
+
+def _dependency_cycle(attrdescs, names):
+    """Return a cycle of ``depends_on`` from one of ``names``, or ``None``.
+
+    The cycle is a list of attribute names that begins and ends with
+    the same name.
+
+    """
+    done = set()
+
+    def visit(name, path):
+        if name in path:
+            return path[path.index(name):] + [name]
+        if name in done:
+            return None
+        path.append(name)
+        for k in sorted(attrdescs[name]._depends_on or ()):
+            cycle = visit(k, path)
+            if cycle:
+                return cycle
+        path.pop()
+        done.add(name)
+
+    for name in sorted(names):
+        cycle = visit(name, [])
+        if cycle:
+            return cycle
+
+
+def _make_slots(attrdescs, bases):
+    """Return slot attribute descriptors for a slotted class.
+
+    Attributes that already have a slot in one of the bases keep it.
+    Every other attribute (whether declared in the class, consumed
+    from a role or inherited from a class without slots) gets a copy
+    of its descriptor that stores the value in a new slot.
+
+    """
+    slots = {}
+    for k, attrdesc in viewitems(attrdescs):
+        if isinstance(attrdesc, attribute.SlotAttributeDescriptor) and any(
+            issubclass(base, attrdesc._slot.__objclass__) for base in bases
+        ):
+            continue
+        slots[k] = attrdesc._with_slot('_elk_slot_' + k)
+    return slots
+
+
+_MISSING = object()
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# the globals of generated constructors and pools (other than those
+# named for an attribute's index), and the builtins they call
+_RESERVED = frozenset([
+    'cls', 'new', 'free', 'size', 'random', 'rate', 'setattr', 'dh',
+    '_weak', '_MISSING', '_PENDING',
+    'isinstance', 'getattr', 'set', 'len', 'type',
+    'TypeError', 'AttributeError', 'IndexError',
+])
+
+# the globals named for an attribute's index (k0, t0, v0, ...)
+_INDEXED = re.compile(r'^[dfkmptv][0-9]+$')
+
+
+def _is_param_name(name):
+    """Return whether an init arg can appear in a generated signature.
+
+    Other init args are popped from the keyword arguments, so that
+    they cannot hide a name that the generated code uses.
+
+    """
+    return (
+        _IDENTIFIER.match(name) is not None
+        and not keyword.iskeyword(name)
+        and name not in ('None', 'True', 'False')
+        and name not in _RESERVED
+        and _INDEXED.match(name) is None
+        and not name.startswith('_elk_')
+        and not name.startswith('__elk_')
+    )
+
+
+def _policy_source(cls):
+    """Return the classes that set the validation policy of ``cls``.
+
+    That is the classes that define its validation level and sample
+    rate (``None`` for the global policy).
+
+    """
+    return tuple(
+        next((base for base in cls.__mro__ if k in vars(base)), None)
+        for k in ('__elk_validation__', '__elk_sample_rate__')
+    )
+
+
+def _find_in_mro(cls, name):
+    for base in cls.__mro__:
+        if name in vars(base):
+            return vars(base)[name]
+
+
+def _seq(attrdesc):
+    return attrdesc._seq
+
+
+def _attributes(cls):
+    """Return the attribute descriptors of a class in declared order."""
+    return sorted(viewvalues(cls.__elk_attrs__), key=_seq)
+
+
+def _init_arg(attrdesc):
+    """Return the init arg of an attribute, or ``None`` if it has none."""
+    if attrdesc._has_init_arg and attrdesc._init_arg is None:
+        return None
+    return attrdesc._init_arg or attrdesc._name
+
+
+def _has_default_build(cls):
+    build = _find_in_mro(cls, '__build__')
+    return getattr(build, '__func__', build) is _elk_build
+
+
+def _indent(lines):
+    return ['    ' + line for line in lines]
+
+
+def _unless_given(p, lines):
+    """Guard initialisation lines so they only run if no value given."""
+    if p is None:
+        return lines
+    return ['if %s is _MISSING:' % p] + _indent(lines)
+
+
+def _apply_validation(cls):
+    """Apply the validation policy of a class.
+
+    Swap in the assignment checks of the attributes the class itself
+    declares, and generate its constructor again.
+
+    """
+    level, rate = validation.policy(cls)
+    attrs = cls.__elk_attrs__
+    for k, v in vars(cls).items():
+        if isinstance(v, attribute.AttributeDescriptor) and attrs.get(k) is v:
+            v._set_validation(level, rate)
+    for name in _CONSTRUCTORS:
+        type.__setattr__(cls, name, _Unmade(name))
+
+
+_CONSTRUCTORS = '__elk_init__', '__elk_init_unchecked__', '__elk_new__'
+
+
+class _Unmade(object):
+    """Stand-in for a constructor function that is not yet generated.
+
+    Generating a constructor means compiling code, which is most of
+    the cost of creating a class, so it is left until the class is
+    first used.  Looking up any of the constructor functions generates
+    them all and replaces the stand-ins.
+
+    """
+    def __init__(self, name):
+        self._name = name
+
+    def __get__(self, instance, owner):
+        _make_constructor(owner)
+        return getattr(owner if instance is None else instance, self._name)
+
+
+def _make_constructor(cls, free=None, size=0):
+    """Generate the constructor for an Elk class.
+
+    Rather than interpreting the attribute descriptors every time an
+    object is created, write out a function that initialises each
+    attribute in turn (values, then defaults, then builders, then
+    required checks, then the triggers of given values that ask for
+    them) and compile it once, at class creation.
+
+    Three functions are installed on the class (when it is first
+    used; see ``_Unmade``).  ``__elk_init__``
+    initialises the attributes of an object and has a real keyword
+    signature.  ``__elk_init_unchecked__`` is the same except that it
+    does not check the types of the values given to it; it is for
+    callers that have already done so.  ``__elk_new__`` performs the
+    whole construction: ``__buildargs__``, allocation, initialisation
+    and ``__build__``.
+
+    If ``free`` is a list, install nothing and instead return the
+    acquire and release functions of a pool of up to ``size`` objects
+    (see ``_pool_source``).
+
+    """
+    attrdescs = _attributes(cls)
+    buildargs = _find_in_mro(cls, '__buildargs__') is not None
+    default_build = _has_default_build(cls)
+
+    ns = {
+        'cls': cls,
+        'new': cls.__new__,
+        '_MISSING': _MISSING,
+        '_PENDING': attribute._PENDING,
+    }
+    params = []
+    pops = []
+    values = []
+    unchecked_values = []
+    defaults = []
+    builders = []
+    requireds = []
+    triggers = []
+    for i, attrdesc in enumerate(attrdescs):
+        k, t, m, v = 'k%d' % i, 't%d' % i, 'm%d' % i, 'v%d' % i
+        if isinstance(attrdesc, attribute.SlotAttributeDescriptor):
+            ns[k] = attrdesc._slot.__set__
+            put = k + '(_elk_self, %s)'
+        else:
+            ns[k] = attrdesc._key
+            put = '_elk_attrs[' + k + '] = %s'
+        classes = attrdesc._type_classes
+        if classes is not None and len(classes) == 1 \
+                and type(classes[0]) is type:
+            # inline the check for an ordinary class
+            ns[t] = classes[0]
+            test = 'isinstance(_elk_v, %s)' % t
+        else:
+            ns[t] = attrdesc._type_check
+            test = '%s(_elk_v)' % t
+        ns[m] = '{!r} attribute must be a {!r}'.format(
+            attrdesc._name, attrdesc._type)
+        if attrdesc._weak_ref:
+            ns['_weak'] = attribute._weak
+            put_value = put % '_weak(%s)'
+        else:
+            put_value = put
+
+        def store(expr, check=True):
+            if attrdesc._type_check is None or not check:
+                return [put_value % expr]
+            return [
+                '_elk_v = %s' % expr,
+                'if not %s:' % test,
+                '    raise TypeError(%s)' % m,
+                put_value % '_elk_v',
+            ]
+
+        # p is the local variable holding the value (if any)
+        init_arg = _init_arg(attrdesc)
+        if init_arg is None:
+            p = None
+        else:
+            if _is_param_name(init_arg):
+                p = init_arg
+                params.append(p)
+            else:
+                p = 'p%d' % i
+                pops.append(
+                    '%s = _elk_kwargs.pop(%r, _MISSING)' % (p, init_arg))
+            values.append('if %s is not _MISSING:' % p)
+            values.extend(_indent(store(p)))
+            unchecked_values.append('if %s is not _MISSING:' % p)
+            unchecked_values.extend(_indent(store(p, check=False)))
+            if attrdesc._trigger_on_init:
+                # fired once every attribute is initialised
+                ns['f%d' % i] = attrdesc._fire
+                triggers.append('if %s is not _MISSING:' % p)
+                triggers.append('    f%d(_elk_self, %s)' % (i, p))
+
+        default = attrdesc._default
+        if attrdesc._has_default and attrdesc._lazy:
+            # generated by the descriptor when read
+            defaults.extend(_unless_given(p, [put % '_PENDING']))
+        elif attrdesc._has_default:
+            ns[v] = default
+            if callable(default):
+                lines = store('%s(_elk_self)' % v)
+            else:
+                # non-callable defaults were checked at declaration
+                lines = store(v, check=False)
+            defaults.extend(_unless_given(p, lines))
+        elif attrdesc._builder:
+            ns[v] = attrdesc._builder
+            builder = 'getattr(_elk_self, %s)' % v
+            if attrdesc._lazy:
+                lines = [put % '_PENDING']
+            else:
+                lines = store(builder + '()')
+            builders.extend(_unless_given(p, lines))
+        elif attrdesc._batch_builder:
+            ns[v] = attrdesc._enlist
+            builders.extend(_unless_given(p, [
+                put % '_PENDING',
+                '%s(_elk_self)' % v,
+            ]))
+        elif attrdesc._required:
+            requireds.extend(_unless_given(p, [
+                "raise AttributeError('required attribute not provided')"
+            ]))
+
+    new_storage = []
+    reused_storage = []
+    if not all(
+        isinstance(attrdesc, attribute.SlotAttributeDescriptor)
+        for attrdesc in attrdescs
+    ):
+        if cls.__elk_frozen__:
+            ns['setattr'] = object.__setattr__
+            new_storage += [
+                '_elk_attrs = {}',
+                "setattr(_elk_self, '__elk_attrs__', _elk_attrs)",
+            ]
+        else:
+            new_storage += ['_elk_self.__elk_attrs__ = _elk_attrs = {}']
+        reused_storage += ['_elk_attrs = _elk_self.__elk_attrs__']
+    unknown = []
+    if default_build:
+        unknown += [
+            'if _elk_kwargs:',
+            '    raise TypeError(',
+            "        'unknown attributes: {}'.format(set(_elk_kwargs)))",
+        ]
+    checked_body = (
+        pops + values + defaults + builders + requireds + unknown + triggers
+    )
+    unchecked_body = (
+        pops + unchecked_values + defaults + builders + requireds + unknown
+        + triggers
+    )
+    # body initialises according to the validation policy; init_body
+    # is for __elk_init__, which callers may use to have values checked
+    level, rate = validation.policy(cls)
+    sampled = level == validation.SAMPLED and checked_body != unchecked_body
+    if level == validation.TRUSTED:
+        body = init_body = unchecked_body
+    elif sampled:
+        ns['random'] = random.random
+        ns['rate'] = rate
+        body = ['if random() < rate:'] + _indent(checked_body)
+        body += ['else:'] + _indent(unchecked_body)
+        init_body = checked_body
+    else:
+        body = init_body = checked_body
+    signature = ''.join('%s=_MISSING, ' % p for p in params)
+    inline = not buildargs and default_build and params \
+        and sys.version_info >= (3,)
+
+    # the steps of construction either side of initialisation
+    prepare = []
+    if buildargs:
+        prepare += [
+            '_elk_kwargs = cls.__buildargs__(*_elk_args, **_elk_kwargs)',
+        ]
+    else:
+        prepare += [
+            'if _elk_args:',
+            '    raise TypeError(',
+            "        '{}() takes no positional arguments'",
+            '        .format(cls.__name__))',
+        ]
+    finish = []
+    if not default_build:
+        finish += ['_elk_self.__build__(**_elk_kwargs)']
+    finish += ['return _elk_self']
+
+    source = ['def __elk_init__(_elk_self, %s**_elk_kwargs):' % signature]
+    source += _indent(new_storage + init_body or ['pass'])
+    if free is not None:
+        source += _pool_source(
+            cls, attrdescs, ns, free, size, signature, inline,
+            new_storage, reused_storage, body, prepare, finish)
+    else:
+        source += [
+            'def __elk_init_unchecked__(_elk_self, %s**_elk_kwargs):'
+            % signature
+        ]
+        source += _indent(new_storage + unchecked_body or ['pass'])
+        if inline:
+            # do everything inline, with keyword-only arguments
+            source += ['def __elk_new__(*, %s**_elk_kwargs):' % signature]
+            source += _indent(
+                ['_elk_self = new(cls)'] + new_storage + body + finish)
+        else:
+            init = ['__elk_init__(_elk_self, **_elk_kwargs)']
+            if sampled:
+                init = ['if random() < rate:'] + _indent(init) + [
+                    'else:',
+                    '    __elk_init_unchecked__(_elk_self, **_elk_kwargs)',
+                ]
+            source += ['def __elk_new__(*_elk_args, **_elk_kwargs):']
+            source += _indent(
+                prepare + ['_elk_self = new(cls)'] + init + finish)
+
+    code = attribute._compile(source, '<elk constructor>')
+    exec(code, ns)
+    if free is not None:
+        return ns['__elk_acquire__'], ns['__elk_release__']
+    type.__setattr__(cls, '__elk_init__', ns['__elk_init__'])
+    type.__setattr__(
+        cls, '__elk_init_unchecked__', ns['__elk_init_unchecked__'])
+    type.__setattr__(cls, '__elk_new__', staticmethod(ns['__elk_new__']))
+
+
+def _pool_source(
+    cls, attrdescs, ns, free, size, signature, inline,
+    new_storage, reused_storage, body, prepare, finish
+):
+    """Return the source of the acquire and release functions of a pool.
+
+    ``__elk_acquire__`` is like ``__elk_new__``, except that it takes
+    an object from ``free`` if there is one and reuses its (cleared)
+    attribute storage.  ``__elk_release__`` clears the attributes of
+    an object and appends it to ``free`` if it holds fewer than
+    ``size`` objects.
+
+    """
+    ns['free'] = free
+    ns['size'] = size
+    source = []
+    if inline:
+        source += ['def __elk_acquire__(*, %s**_elk_kwargs):' % signature]
+        source += _indent([
+            'try:',
+            '    _elk_self = free.pop()',
+            'except IndexError:',
+            '    _elk_self = new(cls)',
+        ] + _indent(new_storage) + [
+            'else:',
+        ] + _indent(reused_storage or ['pass']) + body + finish)
+    else:
+        source += [
+            'def __elk_reinit__(_elk_self, %s**_elk_kwargs):' % signature
+        ]
+        source += _indent(reused_storage + body or ['pass'])
+        source += ['def __elk_acquire__(*_elk_args, **_elk_kwargs):']
+        source += _indent(prepare + [
+            'try:',
+            '    _elk_self = free.pop()',
+            'except IndexError:',
+            '    _elk_self = new(cls)',
+            '    __elk_init__(_elk_self, **_elk_kwargs)',
+            'else:',
+            '    __elk_reinit__(_elk_self, **_elk_kwargs)',
+        ] + finish)
+
+    clear = []
+    for i, attrdesc in enumerate(attrdescs):
+        if isinstance(attrdesc, attribute.SlotAttributeDescriptor):
+            ns['d%d' % i] = attrdesc._slot.__delete__
+            clear += [
+                'try:',
+                '    d%d(_elk_self)' % i,
+                'except AttributeError:',
+                '    pass',
+            ]
+    hash_slot = _find_in_mro(cls, '_elk_hash')
+    if hash_slot is not None:
+        ns['dh'] = hash_slot.__delete__
+        clear += [
+            'try:',
+            '    dh(_elk_self)',
+            'except AttributeError:',
+            '    pass',
+        ]
+    if reused_storage:
+        # keep the storage dict; drop anything else in __dict__
+        clear += [
+            '_elk_state = _elk_self.__dict__',
+            "_elk_attrs = _elk_state['__elk_attrs__']",
+            '_elk_attrs.clear()',
+            'if len(_elk_state) != 1:',
+            '    _elk_state.clear()',
+            "    _elk_state['__elk_attrs__'] = _elk_attrs",
+        ]
+    elif cls.__dictoffset__:
+        clear += ['_elk_self.__dict__.clear()']
+    source += ['def __elk_release__(_elk_self):']
+    source += _indent([
+        'if type(_elk_self) is not cls:',
+        '    raise TypeError(',
+        "        'cannot release {!r} object to pool of {!r}'",
+        '        .format(type(_elk_self).__name__, cls.__name__))',
+        'if len(free) >= size:',
+        '    return',
+    ] + clear + ['free.append(_elk_self)'])
+    return source
+
+
+def _make_comparison(cls):
+    """Generate ``__eq__``, ``__ne__`` and ``__hash__`` for a frozen class.
+
+    Objects are compared by the values of their non-lazy attributes.
+    The hash of an object is computed when first needed and kept in
+    its ``_elk_hash`` attribute (a slot, if the class has slots).
+    Methods defined by the class or its bases (rather than generated)
+    are left alone.
+
+    """
+    ns = {'_MISSING': _MISSING, 'setattr': object.__setattr__}
+    lines = []
+    values = []
+    for i, attrdesc in enumerate(_attributes(cls)):
+        if attrdesc._lazy:
+            continue
+        if isinstance(attrdesc, attribute.SlotAttributeDescriptor):
+            values.append(
+                'getattr(_elk_self, %r, _MISSING)' % attrdesc._slot_name)
+        else:
+            if not lines:
+                lines.append('_elk_attrs = _elk_self.__elk_attrs__')
+            ns['k%d' % i] = attrdesc._key
+            values.append('_elk_attrs.get(k%d, _MISSING)' % i)
+    lines.append('return (%s)' % ''.join(value + ', ' for value in values))
+
+    source = ['def __elk_values__(_elk_self):'] + _indent(lines)
+    source += [
+        'def __eq__(_elk_self, other):',
+        '    if other.__class__ is not _elk_self.__class__:',
+        '        return NotImplemented',
+        '    return _elk_self.__elk_values__() == other.__elk_values__()',
+        'def __ne__(_elk_self, other):',
+        '    if other.__class__ is not _elk_self.__class__:',
+        '        return NotImplemented',
+        '    return _elk_self.__elk_values__() != other.__elk_values__()',
+        'def __hash__(_elk_self):',
+        '    try:',
+        '        return _elk_self._elk_hash',
+        '    except AttributeError:',
+        '        _elk_hash = hash(_elk_self.__elk_values__())',
+        "        setattr(_elk_self, '_elk_hash', _elk_hash)",
+        '        return _elk_hash',
+    ]
+    code = attribute._compile(source, '<elk comparison>')
+    exec(code, ns)
+    # __elk_values__ is looked up on the object, so that table rows
+    # (whose values are in the table's columns) can provide their own
+    type.__setattr__(cls, '__elk_values__', ns['__elk_values__'])
+    for name in ('__eq__', '__ne__', '__hash__'):
+        owner = next(
+            (base for base in cls.__mro__ if name in vars(base)), object)
+        if owner is object \
+                or getattr(vars(owner)[name], '_elk_generated', False):
+            ns[name]._elk_generated = True
+            type.__setattr__(cls, name, ns[name])
+
+
+def _frozen_setattr(self, name, value):
+    raise AttributeError(
+        'cannot set attribute of frozen {!r} object'
+        .format(type(self).__name__)
+    )
+
+
+def _frozen_delattr(self, name):
+    raise AttributeError(
+        'cannot delete attribute of frozen {!r} object'
+        .format(type(self).__name__)
+    )
+
+
 def _elk_build(self, **kwargs):
     unknown_attrs = viewkeys(kwargs) - self.__elk_init_args__
     if unknown_attrs:
         raise TypeError("unknown attributes: {}".format(unknown_attrs))
 
+
+def _class_plan(cls):
+    """Return what ``evolve`` and pickling need to know about ``cls``.
+
+    That is the attributes of ``cls``, a map of init args to them, a
+    map of attribute names to the names of the attributes that depend
+    on them (directly or indirectly), whether instances of ``cls``
+    have an attribute storage dict, and a map of the names of the
+    slots declared in ``__slots__`` by ``cls`` and its bases (other
+    than Elk's own) to their member descriptors.  The plan is computed
+    once per class.
+
+    """
+    plan = vars(cls).get('__elk_class_plan__')
+    if plan is None:
+        attrdescs = _attributes(cls)
+        init_args = {
+            _init_arg(attrdesc): attrdesc for attrdesc in attrdescs
+            if _init_arg(attrdesc) is not None
+        }
+        dependents = {}
+        for attrdesc in attrdescs:
+            stale = set()
+            new = set([attrdesc._name])
+            while new:
+                stale |= new
+                new = set(
+                    other._name for other in attrdescs
+                    if other._name not in stale and (
+                        not other._depends_on.isdisjoint(new)
+                        if other._depends_on is not None else other._lazy
+                    )
+                )
+            stale.discard(attrdesc._name)
+            dependents[attrdesc._name] = stale
+        storage = not all(
+            isinstance(attrdesc, attribute.SlotAttributeDescriptor)
+            for attrdesc in attrdescs
+        )
+        slots = {}
+        for base in reversed(cls.__mro__):
+            names = vars(base).get('__slots__', ())
+            if isinstance(names, str):
+                names = (names,)
+            for name in names:
+                if name.startswith('__') and not name.endswith('__'):
+                    name = '_' + base.__name__.lstrip('_') + name
+                if name in ('__dict__', '__weakref__') \
+                        or name.startswith('_elk_'):
+                    continue
+                slots[name] = vars(base)[name]
+        plan = attrdescs, init_args, dependents, storage, slots
+        type.__setattr__(cls, '__elk_class_plan__', plan)
+    return plan
+
+
+if _frozen is None:
+    class _frozen(collections.Mapping):
+        """Read-only view of a dict (for Python 2)."""
+        __slots__ = ('_dict',)
+
+        def __init__(self, dict):
+            self._dict = dict
+
+        def __getitem__(self, key):
+            return self._dict[key]
+
+        def __iter__(self):
+            return iter(self._dict)
+
+        def __len__(self):
+            return len(self._dict)
+
+        def __repr__(self):
+            return '{}({!r})'.format(type(self).__name__, self._dict)
+
+
+ClassMeta = collections.namedtuple('ClassMeta', [
+    'cls', 'attributes', 'by_name', 'init_args', 'by_init_arg',
+    'required', 'lazy', 'defaults', 'roles', 'modifiers',
+])
+
+AttributeMeta = collections.namedtuple('AttributeMeta', [
+    'name', 'init_arg', 'type', 'mode', 'required', 'lazy', 'has_default',
+    'default', 'builder', 'batch_builder', 'depends_on', 'handles',
+    'trigger', 'weak_ref', 'descriptor',
+])
+
+ModifierMeta = collections.namedtuple('ModifierMeta', [
+    'kind', 'names', 'function', 'owner',
+])
+
+_MODIFIER_KINDS = {
+    modifier.BeforeModifier: 'before',
+    modifier.AfterModifier: 'after',
+    modifier.AroundModifier: 'around',
+}
+
+
+def meta(cls):
+    """Return the metaobject of an Elk class (or of an Elk object's class).
+
+    The metaobject describes the class for generic code, such as
+    serialisers, without reaching into private descriptor fields.  It
+    is computed when first asked for and kept by the class.  It is a
+    ``ClassMeta`` named tuple of:
+
+    ``cls``
+      the class
+    ``attributes``
+      an ``AttributeMeta`` for each attribute, in declared order
+    ``by_name``
+      a read-only mapping of attribute names to their ``AttributeMeta``
+    ``init_args``
+      the init args of the attributes that have them, in declared order
+    ``by_init_arg``
+      a read-only mapping of init args to their ``AttributeMeta``
+    ``required``, ``lazy``, ``defaults``
+      the attributes that must be given to the constructor, that are
+      generated when first read, and that are generated by the
+      constructor when not given (from a default or builder)
+    ``roles``
+      a frozenset of every role the class does, directly or not
+    ``modifiers``
+      a ``ModifierMeta`` (``kind``, the ``names`` of the methods it
+      modifies, ``function`` and the ``owner`` class that declares
+      it) for each method modifier of the class and its bases, base
+      classes first
+
+    """
+    if not isinstance(cls, ElkMeta):
+        cls = type(cls)
+        if not isinstance(cls, ElkMeta):
+            raise TypeError('{!r} is not an Elk class'.format(cls))
+    metaobject = vars(cls).get('__elk_meta__')
+    if metaobject is not None:
+        return metaobject
+
+    attributes = tuple(
+        AttributeMeta(
+            name=attrdesc._name,
+            init_arg=_init_arg(attrdesc),
+            type=attrdesc._type,
+            mode=attrdesc._mode,
+            required=attrdesc._required,
+            lazy=attrdesc._lazy,
+            has_default=attrdesc._has_default,
+            default=attrdesc._default,
+            builder=attrdesc._builder,
+            batch_builder=attrdesc._batch_builder,
+            depends_on=attrdesc._depends_on or frozenset(),
+            handles=(
+                _frozen(dict(attrdesc._handles))
+                if isinstance(attrdesc._handles, collections.Mapping)
+                else tuple(attrdesc._handles)
+            ),
+            trigger=attrdesc._trigger,
+            weak_ref=attrdesc._weak_ref,
+            descriptor=attrdesc,
+        )
+        for attrdesc in _attributes(cls)
+    )
+    lazy = tuple(a for a in attributes if a.lazy)
+    defaults = tuple(
+        a for a in attributes
+        if not a.lazy and (a.has_default or a.builder)
+    )
+    required = tuple(
+        a for a in attributes
+        if a.required and not a.lazy and not (a.has_default or a.builder)
+    )
+    modifiers = []
+    for owner in reversed(cls.__mro__):
+        found = [
+            v for v in vars(owner).values()
+            if isinstance(v, modifier.Modifier)
+        ]
+        modifiers.extend(
+            ModifierMeta(
+                _MODIFIER_KINDS[type(mod)], tuple(mod._names(owner)),
+                mod._f, owner,
+            )
+            for mod in sorted(found)
+        )
+    metaobject = ClassMeta(
+        cls=cls,
+        attributes=attributes,
+        by_name=_frozen({a.name: a for a in attributes}),
+        init_args=tuple(
+            a.init_arg for a in attributes if a.init_arg is not None),
+        by_init_arg=_frozen({
+            a.init_arg: a for a in attributes if a.init_arg is not None
+        }),
+        required=required,
+        lazy=lazy,
+        defaults=defaults,
+        roles=cls.__elk_does__,
+        modifiers=tuple(modifiers),
+    )
+    type.__setattr__(cls, '__elk_meta__', metaobject)
+    return metaobject
+
+
+def _elk_evolve(self, **changes):
+    """Return a copy of the object with the given attributes changed.
+
+    Changes are given by init arg, as to the constructor, and their
+    values are checked.  The values of other attributes are copied
+    rather than generated again, except that a lazy value that has
+    been generated is dropped (to be generated again when read) if
+    it depends on a changed attribute, and a non-lazy value with
+    ``depends_on`` is generated again if it depends on a changed
+    attribute.  Dependencies are followed transitively, and lazy
+    attributes without ``depends_on`` are taken to depend on every
+    other attribute.  ``__buildargs__`` and ``__build__`` are not
+    called; the rest of the object's state (the contents of its
+    ``__dict__`` and of its other slots) is copied as it is.
+
+    """
+    cls = type(self)
+    attrdescs, init_args, dependents, storage, slots = _class_plan(cls)
+    changed = {}
+    stale = set()
+    for k, value in viewitems(changes):
+        try:
+            attrdesc = init_args[k]
+        except KeyError:
+            raise TypeError('unknown attributes: {}'.format(set([k])))
+        attrdesc._check(value, force=True)
+        changed[attrdesc._name] = value
+        stale |= dependents[attrdesc._name]
+
+    obj = cls.__new__(cls)
+    if storage:
+        object.__setattr__(obj, '__elk_attrs__', {})
+    extra = _extra(self, slots)
+    if extra:
+        _set_extra(obj, extra, slots)
+    regenerate = []
+    for attrdesc in attrdescs:
+        name = attrdesc._name
+        if name in changed:
+            attrdesc._store(obj, changed[name])
+            continue
+        value = attrdesc._peek(self, _MISSING)
+        if value is _MISSING:
+            continue
+        if name in stale and value is not attribute._PENDING:
+            if attrdesc._lazy:
+                value = attribute._PENDING
+            else:
+                regenerate.append(attrdesc)
+                continue
+        if value is attribute._PENDING:
+            attrdesc._defer(obj)
+        else:
+            attrdesc._store(obj, value)
+    for attrdesc in regenerate:
+        attrdesc._set_generated(obj, attrdesc._generate(obj))
+    return obj
+
+
+def _elk_reduce_ex(self, protocol):
+    origin = vars(type(self)).get('__elk_role_origin__')
+    if origin is not None:
+        # the class was made by apply_role; make it again on load
+        return _new_with_roles, origin, self.__getstate__()
+    return copyreg.__newobj__, (type(self),), self.__getstate__()
+
+
+def _elk_getstate(self):
+    """Return the state of the object for pickling.
+
+    The state is a tuple of the attribute values in declared order,
+    the positions of attributes that are not set, the positions of
+    lazy attributes that have not been generated (their values are
+    not included), and a dict of the contents of the object's
+    ``__dict__`` other than attribute storage and the values in its
+    other slots (or ``None``).
+
+    """
+    attrdescs, _, _, _, slots = _class_plan(type(self))
+    values = []
+    unset = []
+    pending = []
+    for i, attrdesc in enumerate(attrdescs):
+        value = attrdesc._peek(self, _MISSING)
+        if value is _MISSING:
+            unset.append(i)
+            value = None
+        elif value is attribute._PENDING:
+            pending.append(i)
+            value = None
+        values.append(value)
+    return tuple(values), tuple(unset), tuple(pending), _extra(self, slots)
+
+
+def _extra(self, slots):
+    """Return the state of an object other than its attributes.
+
+    That is a dict of the contents of its ``__dict__`` other than
+    attribute storage and the values in its ``slots``, or ``None``.
+
+    """
+    extra = getattr(self, '__dict__', None)
+    if extra:
+        extra = {
+            k: v for k, v in viewitems(extra)
+            if k not in ('__elk_attrs__', '_elk_hash')
+        }
+    for name, member in viewitems(slots):
+        try:
+            value = member.__get__(self, None)
+        except AttributeError:
+            continue
+        if not extra:
+            extra = {}
+        extra[name] = value
+    return extra or None
+
+
+def _set_extra(self, extra, slots):
+    """Restore the state returned by ``_extra``."""
+    for k, value in viewitems(extra):
+        if k in slots:
+            slots[k].__set__(self, value)
+        else:
+            self.__dict__[k] = value
+
+
+def _elk_setstate(self, state):
+    """Restore the state of the object from ``_elk_getstate``.
+
+    Values are stored without being checked, and lazy attributes that
+    had not been generated are left to be generated when read.
+
+    """
+    cls = type(self)
+    attrdescs, _, _, storage, slots = _class_plan(cls)
+    values, unset, pending, extra = state
+    if len(values) != len(attrdescs):
+        raise ValueError(
+            'state does not match the attributes of {!r}'
+            .format(cls.__name__)
+        )
+    if storage:
+        object.__setattr__(self, '__elk_attrs__', {})
+    if unset or pending:
+        skip = set(unset)
+        skip.update(pending)
+        for i, attrdesc in enumerate(attrdescs):
+            if i not in skip:
+                attrdesc._store(self, values[i])
+    else:
+        for attrdesc, value in zip(attrdescs, values):
+            attrdesc._store(self, value)
+    for i in pending:
+        attrdescs[i]._defer(self)
+    if extra:
+        _set_extra(self, extra, slots)
+
+
+_ROLE_CLASSES = {}
+
+
+def _role_class(cls, roles):
+    """Return the subclass of ``cls`` that also does ``roles``.
+
+    The class is created on first use and cached, so every object of
+    ``cls`` that has the same roles applied shares it.  It remembers
+    where it came from (see ``_reduce_class``), so that it and its
+    objects pickle by reference to ``cls`` and the roles.
+
+    """
+    key = cls, roles
+    role_cls = _ROLE_CLASSES.get(key)
+    if role_cls is None:
+        name = '+'.join([cls.__name__] + [role.__name__ for role in roles])
+        role_cls = ElkMeta(str(name), (cls,), {
+            '__module__': cls.__module__,
+            '__with__': roles,
+            '__elk_role_origin__': key,
+        })
+        role_cls = _ROLE_CLASSES.setdefault(key, role_cls)
+    return role_cls
+
+
+def _new_with_roles(cls, roles):
+    role_cls = _role_class(cls, roles)
+    return role_cls.__new__(role_cls)
+
+
+def _reduce_class(cls):
+    origin = vars(cls).get('__elk_role_origin__')
+    if origin is None:
+        return getattr(cls, '__qualname__', cls.__name__)
+    return _role_class, origin
+
+
+def apply_role(obj, *roles, **kwargs):
+    """Apply roles to an existing object.
+
+    The object becomes an instance of a subclass of its class that
+    does the roles (created once for each class and combination of
+    roles).  Attributes that the roles add are initialised as the
+    constructor would: from ``kwargs`` (by init arg), then from their
+    defaults, then their builders.  Attributes the object already has
+    keep their values.  Roles the object already does are skipped.
+    Return the object.
+
+    Frozen objects, and objects with slot storage, can only be given
+    roles that add no attributes.  If the new attributes cannot be
+    initialised, the object keeps its original class.
+
+    """
+    cls = type(obj)
+    if not isinstance(cls, ElkMeta):
+        raise TypeError('{!r} is not an Elk object'.format(obj))
+    new = []
+    for role in roles:
+        if role not in cls.__elk_does__ and role not in new:
+            new.append(role)
+    if not new:
+        if kwargs:
+            raise TypeError('unknown attributes: {}'.format(set(kwargs)))
+        return obj
+    role_cls = _role_class(cls, tuple(new))
+    added = [
+        attrdesc for attrdesc in _attributes(role_cls)
+        if attrdesc._name not in cls.__elk_attrs__
+    ]
+    if added and cls.__elk_frozen__:
+        # the object's values (and so its hash) would change
+        raise TypeError(
+            'cannot apply roles that add attributes to frozen {!r} object'
+            .format(cls.__name__)
+        )
+    given = {}
+    for attrdesc in added:
+        init_arg = _init_arg(attrdesc)
+        if init_arg in kwargs:
+            value = given[attrdesc._name] = kwargs.pop(init_arg)
+            attrdesc._check(value, force=True)
+    if kwargs:
+        raise TypeError('unknown attributes: {}'.format(set(kwargs)))
+
+    try:
+        object.__setattr__(obj, '__class__', role_cls)
+    except TypeError:
+        raise TypeError(
+            'cannot apply roles that add attributes to {!r} object '
+            'with slot storage'.format(cls.__name__)
+        )
+    try:
+        for attrdesc in added:
+            if attrdesc._name in given:
+                attrdesc._store(obj, given[attrdesc._name])
+        for attrdesc in added:
+            if attrdesc._name in given or not attrdesc._has_default:
+                continue
+            if attrdesc._lazy:
+                attrdesc._defer(obj)
+            else:
+                attrdesc._set_generated(obj, attrdesc._generate(obj))
+        for attrdesc in added:
+            if attrdesc._name in given or attrdesc._has_default:
+                continue
+            if attrdesc._builder:
+                if attrdesc._lazy:
+                    attrdesc._defer(obj)
+                else:
+                    attrdesc._set_generated(obj, attrdesc._generate(obj))
+            elif attrdesc._batch_builder:
+                attrdesc._defer(obj)
+                attrdesc._enlist(obj)
+            elif attrdesc._required:
+                raise AttributeError('required attribute not provided')
+    except Exception:
+        for attrdesc in added:
+            obj.__elk_attrs__.pop(attrdesc._key, None)
+        object.__setattr__(obj, '__class__', cls)
+        raise
+    for attrdesc in added:
+        if attrdesc._name in given and attrdesc._trigger_on_init:
+            attrdesc._fire(obj, given[attrdesc._name])
+    return obj
+
+
 Elk = ElkMeta(str('Elk'), (object,), {
-    '__build__': _elk_build
+    '__slots__': (),
+    '__build__': _elk_build,
+    'evolve': _elk_evolve,
+    '__reduce_ex__': _elk_reduce_ex,
+    '__getstate__': _elk_getstate,
+    '__setstate__': _elk_setstate,
 })
 
 ElkRole = ElkRoleMeta(str('ElkRole'), (object,), {})
+
+copyreg.pickle(ElkMeta, _reduce_class)
@@ -16,6 +16,11 @@
 
 import functools
 import itertools
+import types
+
+
+# compiled combined functions, by the kinds of their modifiers
+_CODE = {}
 
 
 @functools.total_ordering
@@ -23,6 +28,8 @@ class Modifier(object):
     counter = itertools.count()
 
     def __init__(self, name, f):
+        if not isinstance(name, str) and not hasattr(name, 'search'):
+            name = tuple(name)
         self._name = name
         self._f = f
         self._seq = next(self.counter)
@@ -39,43 +46,238 @@ class Modifier(object):
         order_cmp = order.index(type(self)) - order.index(type(other))
         return self._seq < other._seq if order_cmp == 0 else order_cmp < 0
 
-
-class BeforeModifier(Modifier):
     def apply(self, cls):
-        target = getattr(cls, self._name)
+        apply_modifiers(cls, [self])
 
-        def wrapped(instance, *args, **kwargs):
-            self._f(instance, *args, **kwargs)
-            return target(instance, *args, **kwargs)
+    def _names(self, cls):
+        """Return the names of the methods of ``cls`` to modify.
 
-        setattr(cls, self._name, wrapped)
+        A regular expression matches the names of the functions
+        defined by ``cls`` and its bases (other than ``object``),
+        except for special (double underscore) methods.
 
+        """
+        if isinstance(self._name, str):
+            return (self._name,)
+        if isinstance(self._name, tuple):
+            return self._name
+        names = set()
+        seen = set()
+        for base in cls.__mro__[:-1]:
+            for name, value in vars(base).items():
+                if name in seen:
+                    continue
+                seen.add(name)
+                special = name.startswith('__') and name.endswith('__')
+                if isinstance(value, types.FunctionType) \
+                        and not special and self._name.search(name):
+                    names.add(name)
+        return sorted(names)
 
-class AfterModifier(Modifier):
-    def apply(self, cls):
-        target = getattr(cls, self._name)
 
-        def wrapped(instance, *args, **kwargs):
-            result = target(instance, *args, **kwargs)
-            self._f(instance, *args, **kwargs)
-            return result
+class BeforeModifier(Modifier):
+    pass
+
 
-        setattr(cls, self._name, wrapped)
+class AfterModifier(Modifier):
+    pass
 
 
 class AroundModifier(Modifier):
-    def apply(self, cls):
-        target = getattr(cls, self._name)
+    pass
+
+
+def apply_modifiers(cls, modifiers):
+    """Apply method modifiers to the methods of a class.
+
+    Rather than wrapping a method in a new function for each of its
+    modifiers, write out one function per method that calls the
+    ``before`` modifiers, the ``around`` modifiers (which wrap the
+    method in turn) and the ``after`` modifiers, in the order the
+    modifiers sort into.  ``orig`` is given to each ``around``
+    modifier as a bound method rather than a ``functools.partial``.
+
+    """
+    names = []
+    by_name = {}
+    for mod in sorted(modifiers):
+        for name in mod._names(cls):
+            if name not in by_name:
+                names.append(name)
+                by_name[name] = []
+            by_name[name].append(mod)
+    for name in names:
+        setattr(cls, name, _combine(name, getattr(cls, name), by_name[name]))
+
+
+def _combine(name, target, modifiers):
+    """Return a function that calls ``target`` with its modifiers.
+
+    The code of the function depends only on the kinds of the
+    modifiers, so it is compiled once for each sequence of kinds.
+
+    """
+    if getattr(target, '__self__', False) is None:
+        target = target.__func__  # unbound method (Python 2)
+    ns = {'method': types.MethodType, 's0': target}
+    ns.update(('f%d' % i, mod._f) for i, mod in enumerate(modifiers))
+    kinds = tuple(type(mod) for mod in modifiers)
+    code = _CODE.get(kinds)
+    if code is None:
+        code = _CODE[kinds] = _compile(kinds)
+    exec(code, ns)
+    modified = ns['modified']
+    modified.__name__ = name
+    modified.__doc__ = getattr(target, '__doc__', None)
+    return modified
+
+
+def _compile(kinds):
+    """Compile the combined function for modifiers of the given kinds."""
+    args = '*_elk_args, **_elk_kwargs'
+    call = 's0(_elk_self, %s)' % args
+    befores = []
+    afters = []
+    source = []
+    n = 0  # s<n> is the method wrapped by the first n around modifiers
+    for i, kind in enumerate(kinds):
+        f = 'f%d' % i
+        if kind is AroundModifier:
+            call = '%s(_elk_self, method(s%d, _elk_self), %s)' % (f, n, args)
+            n += 1
+            source += [
+                'def s%d(_elk_self, %s):' % (n, args),
+                '    return ' + call,
+            ]
+        elif kind is BeforeModifier:
+            befores.insert(0, '%s(_elk_self, %s)' % (f, args))
+        else:
+            afters.append('%s(_elk_self, %s)' % (f, args))
+    body = befores
+    if afters:
+        body += ['_elk_result = ' + call] + afters + ['return _elk_result']
+    else:
+        body += ['return ' + call]
+    source += ['def modified(_elk_self, %s):' % args]
+    source += ['    ' + line for line in body]
+    return compile('\n'.join(source) + '\n', '<elk modifiers>', 'exec')
+
+
+class Augmentable(object):
+    """A method whose subclasses may augment it.
+
+    The method is called with ``inner`` after ``self``.  Calling
+    ``inner`` (with any arguments) calls the augment of the next
+    subclass in the chain, or does nothing and gives ``None`` if
+    there is none.
+
+    """
+    def __init__(self, f):
+        self._f = f
+
+
+class Augment(object):
+    """The augment, by a subclass, of an augmentable method."""
+    def __init__(self, name, f):
+        self._name = name
+        self._f = f
+
+
+def _end_of_chain(*args, **kwargs):
+    """The ``inner`` of the last function of a chain."""
+    return None
+
+
+def _chain(name, functions):
+    """Return a method that calls a chain of augments.
+
+    Each function of the chain is called with an ``inner`` that is
+    the next step of the chain bound to the object, so that calling
+    ``inner`` is an indexed call, with no search of the MRO.
+
+    """
+    steps = []
+
+    def make_step(i, f):
+        if i == len(functions) - 1:
+            def step(self, *args, **kwargs):
+                return f(self, _end_of_chain, *args, **kwargs)
+        else:
+            def step(self, *args, **kwargs):
+                return f(
+                    self, types.MethodType(steps[i + 1], self),
+                    *args, **kwargs
+                )
+        return step
+
+    for i, f in enumerate(functions):
+        steps.append(make_step(i, f))
+    head = steps[0]
+    head.__name__ = name
+    head.__doc__ = functions[0].__doc__
+    return head
+
+
+def _modifies(cls, name):
+    """The sorted method modifiers that ``cls`` declares for ``name``."""
+    return sorted(
+        mod for mod in vars(cls).values()
+        if isinstance(mod, Modifier) and name in mod._names(cls)
+    )
+
+
+def apply_augments(cls, augmentables, augments):
+    """Set up the augmentable and augmented methods of a class.
+
+    ``augmentables`` is a list of (name, ``Augmentable``) pairs of
+    the class.  The chain of functions of each method (from the class
+    that made it augmentable down to ``cls``) is resolved here, once,
+    and kept in the ``__elk_augments__`` of the class.
+
+    An augment extends the chain of the nearest base that has one for
+    the method.  The method modifiers that the bases (from the class
+    that made the method augmentable down) applied to the method are
+    applied to the extended chain in the same order, so they still
+    wrap it; the modifiers of ``cls`` itself are applied after.
+
+    """
+    chains = {}
+    for name, augmentable in augmentables:
+        chains[name] = (augmentable._f,)
+    modified = {}
+    for aug in augments:
+        name = aug._name
+        if name in chains:
+            raise TypeError(
+                '{!r} method is augmented more than once'.format(name))
+        bases = [
+            base for base in cls.__mro__[1:]
+            if name in vars(base).get('__elk_augments__', ())
+        ]
+        owner = next(
+            (base for base in cls.__mro__[1:] if name in vars(base)), None)
+        if not bases or not (owner in bases or _modifies(owner, name)):
+            raise TypeError('{!r} method is not augmentable'.format(name))
+        chains[name] = vars(bases[0])['__elk_augments__'][name] + (aug._f,)
+        mro = cls.__mro__
+        modified[name] = mro[1:mro.index(bases[-1]) + 1]
+    if chains:
+        type.__setattr__(cls, '__elk_augments__', chains)
+        for name, functions in chains.items():
+            method = _chain(name, functions)
+            for base in reversed(modified.get(name, ())):
+                modifiers = _modifies(base, name)
+                if modifiers:
+                    method = _combine(name, method, modifiers)
+            setattr(cls, name, method)
+
+
+def augmentable(f):
+    return Augmentable(f)
 
-        def wrapped(instance, *args, **kwargs):
-            return self._f(
-                instance,
-                functools.partial(target, instance),
-                *args,
-                **kwargs
-            )
 
-        setattr(cls, self._name, wrapped)
+def augment(name):
+    return functools.partial(Augment, name)
 
 
 def before(name):
@@ -0,0 +1,74 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Pools of reusable objects of one Elk class."""
+
+import contextlib
+
+from .meta import _make_constructor
+
+
+class ElkPool(object):
+    """A pool of released objects of one Elk class, for reuse.
+
+    ``acquire`` takes the same arguments as the class constructor and
+    constructs an object, reinitialising a released object if there
+    is one rather than allocating a new object and its attribute
+    storage.  ``release`` clears an object's attributes (including
+    lazy state) and keeps it for reuse, unless the pool already holds
+    ``size`` objects.
+
+    A released object must not be used again by its previous owner.
+
+    """
+    def __init__(self, cls, size=64):
+        if size < 0:
+            raise ValueError('pool size must not be negative')
+        self._cls = cls
+        self._size = size
+        self._free = []
+        # acquire and release are generated for the class, and set on
+        # the pool directly to avoid the cost of a method call
+        self.acquire, self.release = _make_constructor(
+            cls, free=self._free, size=size)
+
+    @property
+    def size(self):
+        """The maximum number of released objects held by the pool."""
+        return self._size
+
+    def __len__(self):
+        """Return the number of released objects held by the pool."""
+        return len(self._free)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.clear()
+
+    @contextlib.contextmanager
+    def borrow(self, *args, **kwargs):
+        """Context manager that acquires an object and releases it."""
+        obj = self.acquire(*args, **kwargs)
+        try:
+            yield obj
+        finally:
+            self.release(obj)
+
+    def clear(self):
+        """Discard the released objects held by the pool."""
+        del self._free[:]
@@ -0,0 +1,455 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Columnar storage for many objects of one Elk class."""
+
+import array
+import functools
+import itertools
+
+try:
+    import copyreg
+except ImportError:
+    import copy_reg as copyreg
+
+from . import attribute
+from .meta import _attributes, _class_plan
+
+
+# marks a row that has no value for an attribute
+_UNSET = attribute._UNSET
+
+
+def _int_typecode():
+    try:
+        array.array('q')
+    except ValueError:
+        return 'l'
+    return 'q'
+
+
+_TYPECODES = ((bool, 'b'), (int, _int_typecode()), (float, 'd'))
+
+
+def _typecode(attrdesc):
+    """Return the array typecode for an attribute's column, or None.
+
+    Only attributes restricted to exactly ``int``, ``float`` or
+    ``bool`` whose value is always generated at construction can be
+    stored unboxed.
+
+    """
+    if attrdesc._lazy or not (
+        attrdesc._required or attrdesc._has_default or attrdesc._builder
+    ):
+        return None
+    for type_, typecode in _TYPECODES:
+        if attrdesc._type is type_:
+            return typecode
+
+
+class ColumnDescriptor(object):
+    """Descriptor that reads and writes a table row's attribute."""
+    def __init__(self, attrdesc):
+        self.attrdesc = attrdesc
+        self.name = attrdesc._name
+
+    def __get__(self, row, owner):
+        if row is None:
+            return self
+        table = row._elk_table
+        value = table._columns[self.name][row._elk_index]
+        if value is _UNSET:
+            raise AttributeError(
+                '{!r} object {!r} attribute is not set'
+                .format(type(row).__name__, self.name)
+            )
+        if value is attribute._PENDING:
+            if self.attrdesc._lazy == 'once':
+                # rows are made afresh, so the flight is the position's
+                return attribute._once(
+                    (id(table), row._elk_index, self.name), self.name,
+                    functools.partial(self._peek, row),
+                    functools.partial(self._generate, row))
+            return self._generate(row)
+        if table._unboxed.get(self.name) is bool:
+            value = bool(value)
+        return value
+
+    def _peek(self, row):
+        """Return the value of a row, or ``_PENDING`` if it has none."""
+        table = row._elk_table
+        value = table._columns[self.name][row._elk_index]
+        if value is _UNSET:
+            return attribute._PENDING
+        if table._unboxed.get(self.name) is bool:
+            value = bool(value)
+        return value
+
+    def _generate(self, row):
+        """Generate, check and store the value of a row."""
+        value = self.attrdesc._generate(row)
+        self.attrdesc._check(value, force=True)
+        row._elk_table._put(self.name, row._elk_index, value)
+        return value
+
+    def __set__(self, row, value, force=False):
+        attrdesc = self.attrdesc
+        attrdesc._check(value, force)
+        table = row._elk_table
+        if attrdesc._watched:
+            old = table._columns[self.name][row._elk_index]
+            if table._unboxed.get(self.name) is bool:
+                old = bool(old)
+        table._put(self.name, row._elk_index, value)
+        if attrdesc._has_dependents:
+            self._invalidate(row)
+        if attrdesc._trigger is not None:
+            attrdesc._fire(row, value, old)
+
+    def __delete__(self, row):
+        if self.attrdesc._required:
+            raise AttributeError('cannot delete required attribute')
+        table = row._elk_table
+        value = table._columns[self.name][row._elk_index]
+        if value is _UNSET or value is attribute._PENDING:
+            raise AttributeError(
+                '{!r} object {!r} attribute is not set'
+                .format(type(row).__name__, self.name)
+            )
+        if self.attrdesc._lazy:
+            # the value will be generated again when next read
+            table._put(self.name, row._elk_index, attribute._PENDING)
+        else:
+            table._put(self.name, row._elk_index, _UNSET)
+        if self.attrdesc._has_dependents:
+            self._invalidate(row, regenerate=False)
+
+    def _invalidate(self, row, regenerate=True):
+        """Update the columns that depend on this one, for a row."""
+        for column in type(row).__elk_dependents__.get(self.name, ()):
+            column._stale(row, regenerate)
+
+    def _stale(self, row, regenerate):
+        if self.attrdesc._lazy:
+            value = row._elk_table._columns[self.name][row._elk_index]
+            if value is not _UNSET and value is not attribute._PENDING:
+                row._elk_table._put(
+                    self.name, row._elk_index, attribute._PENDING)
+                self._invalidate(row, regenerate)
+        elif regenerate:
+            self.__set__(row, self.attrdesc._generate(row), force=True)
+
+
+def _row_values(cls):
+    """Return the ``__elk_values__`` method of rows of a frozen class.
+
+    Rows are compared by the values of their non-lazy attributes, as
+    objects of the class are.
+
+    """
+    names = tuple(
+        attrdesc._name for attrdesc in _attributes(cls)
+        if not attrdesc._lazy
+    )
+
+    def __elk_values__(row):
+        columns = row._elk_table._columns
+        index = row._elk_index
+        return tuple(columns[name][index] for name in names)
+    return __elk_values__
+
+
+def _detach(row):
+    """Return an object of the table's class with the values of a row.
+
+    Lazy values that have not been generated are left to be generated
+    when read, as they would be on the row.
+
+    """
+    table = row._elk_table
+    cls = table._cls
+    attrdescs, _, _, storage, _ = _class_plan(cls)
+    obj = cls.__new__(cls)
+    if storage:
+        object.__setattr__(obj, '__elk_attrs__', {})
+    for attrdesc in attrdescs:
+        name = attrdesc._name
+        value = table._columns[name][row._elk_index]
+        if value is _UNSET:
+            continue
+        if value is attribute._PENDING:
+            attrdesc._defer(obj)
+        else:
+            if table._unboxed.get(name) is bool:
+                value = bool(value)
+            attrdesc._store(obj, value)
+    return obj
+
+
+def _row_evolve(row, **changes):
+    return _detach(row).evolve(**changes)
+
+
+def _new(cls):
+    return cls.__new__(cls)
+
+
+def _row_reduce_ex(row, protocol):
+    reconstruct, args, state = _detach(row).__reduce_ex__(protocol)
+    # pickle only accepts __newobj__ for an object of the class itself
+    if reconstruct is copyreg.__newobj__:
+        reconstruct = _new
+    return reconstruct, args, state
+
+
+def _row_class(cls):
+    """Return the class of row proxies for tables of ``cls``.
+
+    The row class is a subclass of ``cls`` whose attributes read and
+    write the columns of a table, so rows have the methods (and
+    delegations) of ``cls``.  It is created once per class.
+
+    """
+    row_class = vars(cls).get('__elk_row_class__')
+    if row_class is None:
+        ns = {
+            '__slots__': ('_elk_table', '_elk_index'),
+            '__module__': cls.__module__,
+        }
+        for attrdesc in _attributes(cls):
+            column = ColumnDescriptor(attrdesc)
+            ns[attrdesc._name] = column
+            for handle, target in attrdesc._delegations():
+                ns[handle] = attribute.DelegationDescriptor(target, column)
+        ns['__elk_dependents__'] = {
+            k: tuple(ns[attrdesc._name] for attrdesc in v)
+            for k, v in cls.__elk_dependents__.items()
+        }
+        # a modified (or pickled or copied) row is an object of cls
+        ns['evolve'] = _row_evolve
+        ns['__reduce_ex__'] = _row_reduce_ex
+        if cls.__elk_frozen__:
+            ns['__elk_values__'] = _row_values(cls)
+            # the values a row refers to change when the table is
+            # sorted, so the hash of a row is not kept
+            ns['_elk_hash'] = property(
+                lambda row: hash(row.__elk_values__()))
+        row_class = type.__new__(
+            type(cls), str(cls.__name__ + 'Row'), (cls,), ns)
+        type.__setattr__(cls, '__elk_row_class__', row_class)
+    return row_class
+
+
+class ElkTable(object):
+    """A columnar container of objects of one Elk class.
+
+    Rather than keeping an object (with its own storage) per row, an
+    ``ElkTable`` keeps one column per attribute.  Columns of ``int``,
+    ``float`` and ``bool`` attributes that are always set are arrays
+    of unboxed values; other columns are lists.
+
+    Objects are added with ``append`` (which takes constructor
+    arguments) and ``extend`` (which takes records, as for
+    ``build_many``), and are validated by the class as usual.
+    Indexing or iterating a table gives row proxies that behave like
+    instances of the class.  Row proxies refer to a position in the
+    table, so sorting the table changes the row they refer to.
+    Classes with ``lazy='async'`` or ``weak_ref`` attributes cannot
+    be held in a table.
+
+    """
+    def __init__(self, cls, records=()):
+        self._cls = cls
+        self._attrdescs = _attributes(cls)
+        for attrdesc in self._attrdescs:
+            # the values of a column must be at hand, and a column
+            # would keep the referents of weak_ref values alive
+            if attrdesc._lazy == 'async':
+                raise TypeError(
+                    "table cannot hold lazy='async' attribute {!r}"
+                    .format(attrdesc._name)
+                )
+            if attrdesc._weak_ref:
+                raise TypeError(
+                    'table cannot hold weak_ref attribute {!r}'
+                    .format(attrdesc._name)
+                )
+        self._columns = {}
+        self._unboxed = {}  # types of the values in array columns
+        self._holes = {}  # number of unset or lazy values in columns
+        for attrdesc in self._attrdescs:
+            typecode = _typecode(attrdesc)
+            if typecode is None:
+                self._columns[attrdesc._name] = []
+            else:
+                self._columns[attrdesc._name] = array.array(typecode)
+                self._unboxed[attrdesc._name] = attrdesc._type
+            self._holes[attrdesc._name] = 0
+        self._len = 0
+        self._row_class = row_class = _row_class(cls)
+        self._set_table = vars(row_class)['_elk_table'].__set__
+        self._set_index = vars(row_class)['_elk_index'].__set__
+        self.extend(records)
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError('table index out of range')
+        return self._row(index)
+
+    def __iter__(self):
+        return (self._row(i) for i in range(self._len))
+
+    def _row(self, index):
+        row = self._row_class.__new__(self._row_class)
+        self._set_table(row, self)
+        self._set_index(row, index)
+        return row
+
+    def append(self, *args, **kwargs):
+        """Construct an object and add it to the table."""
+        self._add(self._cls(*args, **kwargs))
+
+    def extend(self, records, errors=None):
+        """Construct objects from records and add them to the table.
+
+        Records and ``errors`` are treated as by ``build_many``.
+
+        """
+        for obj in self._cls.build_iter(records, errors=errors):
+            self._add(obj)
+
+    def _add(self, obj):
+        values = [
+            (attrdesc._name, attrdesc._peek(obj, _UNSET))
+            for attrdesc in self._attrdescs
+        ]
+        for name, value in values:
+            column = self._columns[name]
+            if value is _UNSET or value is attribute._PENDING:
+                self._holes[name] += 1
+            if isinstance(column, array.array):
+                try:
+                    if type(value) is self._unboxed[name]:
+                        column.append(value)
+                        continue
+                except OverflowError:
+                    pass
+                column = self._unbox(name)
+            column.append(value)
+        self._len += 1
+
+    def _unbox(self, name):
+        """Convert an array column to a list column."""
+        column = self._columns[name].tolist()
+        if self._unboxed.pop(name) is bool:
+            column = [bool(value) for value in column]
+        self._columns[name] = column
+        return column
+
+    def _put(self, name, index, value):
+        column = self._columns[name]
+        old = column[index]
+        self._holes[name] += (
+            (value is _UNSET or value is attribute._PENDING)
+            - (old is _UNSET or old is attribute._PENDING)
+        )
+        if isinstance(column, array.array):
+            try:
+                if type(value) is self._unboxed[name]:
+                    column[index] = value
+                    return
+            except OverflowError:
+                pass
+            column = self._unbox(name)
+        column[index] = value
+
+    def column(self, name):
+        """Return the column of values of the named attribute.
+
+        Lazy values are generated first (with a single call to the
+        batch builder of the attribute, if it has one).
+        ``AttributeError`` is raised if any row does not have a value
+        for the attribute.  The column is returned directly rather
+        than copied (columns of ``bool`` attributes may hold 0 and 1)
+        and must not be modified.
+
+        """
+        if self._holes[name]:
+            pending = [
+                i for i, value in enumerate(self._columns[name])
+                if value is attribute._PENDING
+            ]
+            attrdesc = self._cls.__elk_attrs__[name]
+            if pending and attrdesc._batch_builder:
+                # one call to the batch builder for the whole column
+                values = attrdesc._build_batch(
+                    self._row_class, [self._row(i) for i in pending])
+                for i, value in zip(pending, values):
+                    self._put(name, i, value)
+            else:
+                for i in pending:
+                    getattr(self._row(i), name)
+            if self._holes[name]:
+                raise AttributeError(
+                    '{!r} attribute is not set in every row'.format(name))
+        return self._columns[name]
+
+    def sum(self, name, start=0):
+        """Return the sum of the values of the named attribute."""
+        return sum(self.column(name), start)
+
+    def filter(self, name, predicate):
+        """Return a new table of the rows for which predicate is true.
+
+        ``predicate`` is called with the value of the named attribute
+        of each row.
+
+        """
+        mask = [bool(predicate(value)) for value in self.column(name)]
+        table = ElkTable(self._cls)
+        for k, column in self._columns.items():
+            if isinstance(column, array.array):
+                selected = array.array(
+                    column.typecode, itertools.compress(column, mask))
+            else:
+                selected = list(itertools.compress(column, mask))
+                table._holes[k] = sum(
+                    1 for value in selected
+                    if value is _UNSET or value is attribute._PENDING
+                )
+            table._columns[k] = selected
+        table._unboxed = dict(self._unboxed)
+        table._len = sum(mask)
+        return table
+
+    def sort(self, name, reverse=False):
+        """Sort the rows of the table by the named attribute."""
+        column = self.column(name)
+        order = sorted(
+            range(self._len), key=column.__getitem__, reverse=reverse)
+        for k, column in self._columns.items():
+            values = [column[i] for i in order]
+            if isinstance(column, array.array):
+                values = array.array(column.typecode, values)
+            self._columns[k] = values
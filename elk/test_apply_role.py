@@ -0,0 +1,191 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import copy
+import pickle
+import sys
+import unittest
+
+from . import elk
+
+
+class Breakable(elk.ElkRole):
+    is_broken = elk.ElkAttribute(type=bool, default=False)
+    reason = elk.ElkAttribute(type=str, builder='_build_reason')
+    report = elk.ElkAttribute(lazy=True, builder='_build_report')
+
+    def break_(self):
+        self.is_broken = True
+
+    def _build_reason(self):
+        return 'wear on ' + self.name
+
+    def _build_report(self):
+        return '{}: {}'.format(self.name, self.reason)
+
+
+class Labelled(elk.ElkRole):
+    label = elk.ElkAttribute(type=str, required=True)
+
+
+class Named(elk.ElkRole):
+    def greet(self):
+        return 'hello ' + self.name
+
+
+class Part(elk.Elk):
+    __with__ = Named
+
+    name = elk.ElkAttribute(type=str, default='part')
+
+
+class SlotPart(elk.Elk):
+    __elk_slots__ = True
+
+    name = elk.ElkAttribute(type=str, default='part')
+
+
+class FrozenPart(elk.Elk):
+    __elk_frozen__ = True
+
+    name = elk.ElkAttribute(type=str, default='part')
+
+
+class ApplyRoleTestCase(unittest.TestCase):
+    def test_object_does_role(self):
+        part = elk.apply_role(Part(), Breakable)
+        self.assertTrue(isinstance(part, Breakable))
+        self.assertTrue(isinstance(part, Part))
+        self.assertFalse(isinstance(Part(), Breakable))
+        part.break_()
+        self.assertTrue(part.is_broken)
+
+    def test_keeps_existing_roles(self):
+        part = elk.apply_role(Part(), Breakable)
+        self.assertTrue(isinstance(part, Named))
+        self.assertEqual(part.greet(), 'hello part')
+
+    def test_existing_values_kept(self):
+        part = Part(name='wheel')
+        elk.apply_role(part, Breakable)
+        self.assertEqual(part.name, 'wheel')
+
+    def test_new_attributes_initialised(self):
+        part = elk.apply_role(Part(name='wheel'), Breakable)
+        self.assertIs(part.is_broken, False)
+        self.assertEqual(part.reason, 'wear on wheel')
+        part.name = 'axle'
+        self.assertEqual(part.report, 'axle: wear on wheel')
+
+    def test_init_args(self):
+        part = elk.apply_role(Part(), Breakable, is_broken=True)
+        self.assertIs(part.is_broken, True)
+
+    def test_init_arg_type_checked(self):
+        part = Part()
+        with self.assertRaises(TypeError):
+            elk.apply_role(part, Breakable, is_broken='yes')
+        self.assertIs(type(part), Part)
+
+    def test_unknown_init_arg(self):
+        part = Part()
+        with self.assertRaises(TypeError):
+            elk.apply_role(part, Breakable, colour='red')
+        with self.assertRaises(TypeError):
+            elk.apply_role(part, Breakable, name='wheel')
+        self.assertIs(type(part), Part)
+
+    def test_required(self):
+        part = Part()
+        with self.assertRaises(AttributeError):
+            elk.apply_role(part, Labelled)
+        self.assertIs(type(part), Part)
+        elk.apply_role(part, Labelled, label='front')
+        self.assertEqual(part.label, 'front')
+
+    def test_class_shared(self):
+        a = elk.apply_role(Part(), Breakable)
+        b = elk.apply_role(Part(), Breakable)
+        self.assertIs(type(a), type(b))
+        self.assertEqual(type(a).__name__, 'Part+Breakable')
+        self.assertIsNot(
+            type(elk.apply_role(Part(), Breakable, Labelled, label='x')),
+            type(a),
+        )
+
+    def test_apply_twice(self):
+        part = elk.apply_role(Part(), Breakable)
+        elk.apply_role(part, Labelled, label='front')
+        self.assertTrue(isinstance(part, Breakable))
+        self.assertTrue(isinstance(part, Labelled))
+        self.assertEqual(part.label, 'front')
+
+    def test_roles_done_skipped(self):
+        part = elk.apply_role(Part(), Breakable)
+        cls = type(part)
+        self.assertIs(elk.apply_role(part, Breakable), part)
+        self.assertIs(type(part), cls)
+        elk.apply_role(part, Breakable, Named, Labelled, Labelled, label='x')
+        self.assertEqual(type(part).__name__, 'Part+Breakable+Labelled')
+        plain = Part()
+        self.assertIs(elk.apply_role(plain, Named), plain)
+        self.assertIs(type(plain), Part)
+        with self.assertRaises(TypeError):
+            elk.apply_role(plain, Named, label='x')
+
+    def test_not_elk(self):
+        with self.assertRaises(TypeError):
+            elk.apply_role(object(), Breakable)
+
+    def test_slots(self):
+        part = elk.apply_role(SlotPart(name='wheel'), Named)
+        self.assertEqual(part.greet(), 'hello wheel')
+        with self.assertRaises(TypeError):
+            elk.apply_role(SlotPart(), Breakable)
+
+    def test_copy(self):
+        part = elk.apply_role(Part(name='wheel'), Breakable)
+        part.break_()
+        other = copy.copy(part)
+        self.assertIs(type(other), type(part))
+        self.assertIs(other.is_broken, True)
+
+    def test_pickle(self):
+        part = elk.apply_role(Part(name='wheel'), Labelled, label='front')
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            other = pickle.loads(pickle.dumps(part, protocol))
+            self.assertIs(type(other), type(part))
+            self.assertEqual(other.name, 'wheel')
+            self.assertEqual(other.label, 'front')
+
+    @unittest.skipIf(sys.version_info < (3,), 'classes pickle by name')
+    def test_pickle_class(self):
+        cls = type(elk.apply_role(Part(), Breakable))
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            self.assertIs(pickle.loads(pickle.dumps(cls, protocol)), cls)
+        self.assertIs(pickle.loads(pickle.dumps(Part)), Part)
+
+    def test_frozen(self):
+        a, b = FrozenPart(name='wheel'), FrozenPart(name='wheel')
+        hash(a)
+        with self.assertRaises(TypeError):
+            elk.apply_role(a, Breakable)
+        self.assertIs(type(a), FrozenPart)
+        elk.apply_role(a, Named)
+        elk.apply_role(b, Named)
+        self.assertEqual(a.greet(), 'hello wheel')
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
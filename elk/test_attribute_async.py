@@ -0,0 +1,156 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pickle
+import unittest
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+from . import elk
+
+
+def _later(value, delay=0.01):
+    """Return a future that gives ``value`` (or raises it) later."""
+    loop = asyncio.get_event_loop()
+    future = loop.create_future()
+    if isinstance(value, Exception):
+        loop.call_later(delay, future.set_exception, value)
+    else:
+        loop.call_later(delay, future.set_result, value)
+    return future
+
+
+if asyncio is not None:
+    class Remote(elk.Elk):
+        calls = 0
+        failures = 0
+        value = elk.ElkAttribute(lazy='async', builder='_fetch')
+
+        def _fetch(self):
+            type(self).calls += 1
+            if type(self).failures:
+                type(self).failures -= 1
+                return _later(RuntimeError('unavailable'))
+            return _later(42)
+
+    # async def is a syntax error on Python 2, so compile it here
+    _ns = {'_later': _later}
+    exec(
+        'async def fetch(self):\n'
+        '    type(self).calls += 1\n'
+        '    first = await _later(20)\n'
+        '    return first + await _later(22)\n',
+        _ns
+    )
+
+    class Coroutine(elk.Elk):
+        calls = 0
+        value = elk.ElkAttribute(lazy='async', type=int, builder='_fetch')
+        _fetch = _ns['fetch']
+
+    class SlotRemote(elk.Elk):
+        __elk_slots__ = True
+        value = elk.ElkAttribute(
+            lazy='async', type=int, default=lambda self: _later(7))
+
+
+@unittest.skipIf(
+    asyncio is None or not hasattr(asyncio, 'ensure_future'),
+    'asyncio not available')
+class AsyncLazyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        Remote.calls = Remote.failures = Coroutine.calls = 0
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def run_all(self, *awaitables):
+        return self.loop.run_until_complete(asyncio.gather(*awaitables))
+
+    def test_concurrent_reads_share_one_build(self):
+        obj = Remote()
+        self.assertEqual(self.run_all(*[obj.value for _ in range(10)]),
+                         [42] * 10)
+        self.assertEqual(Remote.calls, 1)
+
+    def test_value_is_stored(self):
+        obj = Remote()
+        self.run_all(obj.value)
+        self.assertEqual(self.run_all(obj.value), [42])
+        self.assertEqual(Remote.calls, 1)
+
+    def test_failure_is_retried(self):
+        Remote.failures = 1
+        obj = Remote()
+        with self.assertRaises(RuntimeError):
+            self.run_all(obj.value, obj.value)
+        self.assertEqual(Remote.calls, 1)
+        self.assertEqual(self.run_all(obj.value), [42])
+        self.assertEqual(Remote.calls, 2)
+
+    def test_cancelled_reader_does_not_cancel_build(self):
+        obj = Remote()
+        first = asyncio.ensure_future(obj.value)
+        second = obj.value
+        first.cancel()
+        self.assertEqual(self.run_all(second), [42])
+
+    def test_assignment_wins_over_build(self):
+        obj = Remote()
+        pending = obj.value
+        obj.value = 1
+        self.run_all(pending)
+        self.assertEqual(self.run_all(obj.value), [1])
+
+    def test_slots(self):
+        obj = SlotRemote()
+        self.assertEqual(self.run_all(obj.value, obj.value), [7, 7])
+        self.assertEqual(self.run_all(obj.value), [7])
+
+    def test_type_checked(self):
+        class Bad(elk.Elk):
+            x = elk.ElkAttribute(
+                lazy='async', type=int, default=lambda self: _later('no'))
+        obj = Bad()
+        with self.assertRaises(TypeError):
+            self.run_all(obj.x)
+
+    def test_pickle_while_in_flight(self):
+        obj = Remote()
+        pending = obj.value
+        copy = pickle.loads(pickle.dumps(obj))
+        self.run_all(pending)
+        self.assertEqual(self.run_all(copy.value), [42])
+        self.assertEqual(Remote.calls, 2)
+
+    def test_coroutine_builder(self):
+        obj = Coroutine()
+        self.assertEqual(self.run_all(*[obj.value for _ in range(5)]),
+                         [42] * 5)
+        self.assertEqual(self.run_all(obj.value), [42])
+        self.assertEqual(Coroutine.calls, 1)
+
+    def test_requires_builder_or_callable_default(self):
+        with self.assertRaises(TypeError):
+            elk.ElkAttribute(lazy='async')
+        with self.assertRaises(TypeError):
+            elk.ElkAttribute(lazy='async', default=1)
@@ -0,0 +1,134 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from . import elk
+
+
+class User(elk.Elk):
+    calls = []
+    id = elk.ElkAttribute(type=int)
+    name = elk.ElkAttribute(type=str, batch_builder='_load_names')
+
+    @classmethod
+    def _load_names(cls, users):
+        cls.calls.append([user.id for user in users])
+        return ['user{}'.format(user.id) for user in users]
+
+
+class SlotUser(User):
+    __elk_slots__ = True
+
+
+class BatchBuilderTestCase(unittest.TestCase):
+    def setUp(self):
+        del User.calls[:]
+
+    def test_without_scope(self):
+        users = [User(id=i) for i in range(3)]
+        self.assertEqual([user.name for user in users],
+                         ['user0', 'user1', 'user2'])
+        self.assertEqual(User.calls, [[0], [1], [2]])
+
+    def test_constructed_in_scope(self):
+        with elk.ElkBatch():
+            users = [User(id=i) for i in range(3)]
+            self.assertEqual(users[1].name, 'user1')
+        self.assertEqual(User.calls, [[1, 0, 2]])
+        self.assertEqual([user.name for user in users],
+                         ['user0', 'user1', 'user2'])
+        self.assertEqual(len(User.calls), 1)
+
+    def test_collection(self):
+        users = [User(id=i) for i in range(3)]
+        users[2].name
+        with elk.ElkBatch(users):
+            users[0].name
+        self.assertEqual(User.calls, [[2], [0, 1]])
+
+    def test_given_value_not_built(self):
+        with elk.ElkBatch():
+            given = User(id=0, name='root')
+            other = User(id=1)
+            other.name = 'set'
+            users = [User(id=i) for i in range(2, 4)]
+            users[0].name
+        self.assertEqual(given.name, 'root')
+        self.assertEqual(other.name, 'set')
+        self.assertEqual(User.calls, [[2, 3]])
+
+    def test_nested_scopes(self):
+        with elk.ElkBatch():
+            outer = User(id=0)
+            with elk.ElkBatch():
+                inner = User(id=1)
+                inner.name
+        self.assertEqual(outer.name, 'user0')
+        self.assertEqual(User.calls, [[1, 0]])
+
+    def test_slots(self):
+        with elk.ElkBatch():
+            users = [SlotUser(id=i) for i in range(3)]
+            users[0].name
+        self.assertEqual(User.calls, [[0, 1, 2]])
+        self.assertEqual(users[2].name, 'user2')
+
+    def test_values_checked(self):
+        class Bad(elk.Elk):
+            x = elk.ElkAttribute(type=int, batch_builder='_load')
+
+            @staticmethod
+            def _load(objs):
+                return ['no'] * len(objs)
+
+        with self.assertRaises(TypeError):
+            Bad().x
+
+    def test_wrong_number_of_values(self):
+        class Short(elk.Elk):
+            x = elk.ElkAttribute(batch_builder='_load')
+
+            @staticmethod
+            def _load(objs):
+                return []
+
+        with self.assertRaises(ValueError):
+            Short().x
+
+    def test_delete_builds_again(self):
+        user = User(id=5)
+        user.name
+        del user.name
+        self.assertEqual(user.name, 'user5')
+        self.assertEqual(User.calls, [[5], [5]])
+
+    def test_table_column(self):
+        table = elk.ElkTable(User, [{'id': i} for i in range(4)])
+        self.assertEqual(list(table.column('name')),
+                         ['user0', 'user1', 'user2', 'user3'])
+        self.assertEqual(User.calls, [[0, 1, 2, 3]])
+
+    def test_bad_options(self):
+        with self.assertRaises(TypeError):
+            elk.ElkAttribute(batch_builder=len)
+        with self.assertRaises(TypeError):
+            elk.ElkAttribute(batch_builder='_load', default=1)
+        with self.assertRaises(TypeError):
+            elk.ElkAttribute(batch_builder='_load', builder='_build')
+        with self.assertRaises(AttributeError):
+            class Missing(elk.Elk):
+                x = elk.ElkAttribute(batch_builder='_load')
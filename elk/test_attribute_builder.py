@@ -58,6 +58,18 @@ class BuilderTestCase(unittest.TestCase):
     def test_subclass_can_override_builder_method(self):
         self.assertEqual(B().x, 'let me down')
 
+    def test_subclass_inherits_builder_method(self):
+        class C(A):
+            pass
+
+        self.assertEqual(C().x, 'buttercup')
+
+    def test_builder_not_callable(self):
+        with self.assertRaises(AttributeError):
+            class C(elk.Elk):
+                x = elk.ElkAttribute(builder='_build_x')
+                _build_x = 'buttercup'
+
     def test_role_consumer_can_supply_builder_for_role_attribute(self):
         class HasSize(elk.ElkRole):
             size = elk.ElkAttribute(builder='_build_size')
@@ -134,3 +134,88 @@ class DelegationTestCase(unittest.TestCase):
         outer.inner = []
         outer.append(1)
         self.assertEqual(outer.inner, [1])
+
+
+class Spec(object):
+    def __init__(self, rpm):
+        self.rpm = rpm
+
+
+class Engine(object):
+    def __init__(self, rpm=3000):
+        self.spec = Spec(rpm)
+        self.log = []
+
+    def run(self, *args):
+        self.log.append(args)
+        return args
+
+
+class Car(elk.Elk):
+    engine = elk.ElkAttribute(
+        default=lambda self: Engine(),
+        handles={
+            'rpm': 'spec.rpm',
+            'start': ('run', 'start'),
+            'start_fast': ('run', 'start', 'fast'),
+            'run': 'run',
+        },
+    )
+
+
+class SlotCar(Car):
+    __elk_slots__ = True
+
+
+class Truck(elk.Elk):
+    engine = elk.ElkAttribute(handles=['spec.rpm'])
+
+
+class CompiledDelegationTestCase(unittest.TestCase):
+    cls = Car
+
+    def test_dotted_path(self):
+        car = self.cls()
+        self.assertEqual(car.rpm, 3000)
+        car.rpm = 4000
+        self.assertEqual(car.engine.spec.rpm, 4000)
+        del car.rpm
+        self.assertFalse(hasattr(car.engine.spec, 'rpm'))
+
+    def test_dotted_name_in_sequence(self):
+        truck = Truck(engine=Engine(5000))
+        self.assertEqual(truck.rpm, 5000)
+
+    def test_curried(self):
+        car = self.cls()
+        self.assertEqual(car.start(), ('start',))
+        self.assertEqual(car.start_fast(1), ('start', 'fast', 1))
+        self.assertEqual(car.run(2), (2,))
+
+    def test_curried_follows_reassignment(self):
+        car = self.cls()
+        first = car.engine
+        car.start()
+        car.engine = second = Engine()
+        car.start()
+        self.assertEqual(first.log, [('start',)])
+        self.assertEqual(second.log, [('start',)])
+
+    def test_cannot_assign_curried(self):
+        car = self.cls()
+        with self.assertRaises(AttributeError):
+            car.start = None
+
+    def test_unset_delegatee(self):
+        truck = Truck()
+        with self.assertRaises(AttributeError):
+            truck.rpm
+
+    def test_bad_target(self):
+        with self.assertRaises(TypeError):
+            class Bad(elk.Elk):
+                engine = elk.ElkAttribute(handles={'x': 'spec..rpm'})
+
+
+class SlotCompiledDelegationTestCase(CompiledDelegationTestCase):
+    cls = SlotCar
@@ -14,7 +14,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import gc
+import threading
+import time
 import unittest
+import weakref
 
 from . import elk
 
@@ -59,3 +63,269 @@ class BuilderTestCase(unittest.TestCase):
     def test_trivial_default(self):
         a = A()
         self.assertEqual(a.trivial_default, 'hi')
+
+
+class SlotA(elk.Elk):
+    __elk_slots__ = True
+    __slots__ = ('__weakref__',)
+    default = elk.ElkAttribute(lazy=True, default=checker)
+    builder = elk.ElkAttribute(lazy=True, builder='_build')
+
+    def _build(self):
+        return 'buttercup'
+
+
+class LazyStateTestCase(unittest.TestCase):
+    def test_delete_regenerates(self):
+        for cls in (A, SlotA):
+            a = cls()
+            self.assertEqual(a.builder, 'buttercup')
+            del a.builder
+            self.assertEqual(a.builder, 'buttercup')
+
+    def test_delete_unread(self):
+        for cls in (A, SlotA):
+            a = cls()
+            with self.assertRaises(AttributeError):
+                del a.builder
+            self.assertEqual(a.builder, 'buttercup')
+
+    def test_freed_without_cyclic_gc(self):
+        # pending lazy attributes must not hold references back to
+        # the object, so that it is freed as soon as it is unreferenced
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for cls in (A, SlotA):
+                for read in (False, True):
+                    a = cls()
+                    if read:
+                        a.default
+                    ref = weakref.ref(a)
+                    del a
+                    self.assertIsNone(ref(), (cls, read))
+        finally:
+            if enabled:
+                gc.enable()
+
+
+class Once(elk.Elk):
+    value = elk.ElkAttribute(lazy='once', builder='_build_value')
+    fail = elk.ElkAttribute(mode='rw', default=0)
+    loop = elk.ElkAttribute(lazy='once', builder='_build_loop')
+
+    def _build_value(self):
+        self.calls.append(threading.current_thread())
+        time.sleep(0.05)
+        if self.fail:
+            self.fail -= 1
+            raise ValueError('build failed')
+        return object()
+
+    def _build_loop(self):
+        return self.loop
+
+
+class SlotOnce(Once):
+    __elk_slots__ = True
+    value = elk.ElkAttribute(
+        lazy='once', default=lambda self: self._build_value())
+    loop = elk.ElkAttribute(
+        lazy='once', default=lambda self: self._build_loop())
+
+
+class LazyOnceTestCase(unittest.TestCase):
+    def read_concurrently(self, obj, n=8):
+        results = []
+        errors = []
+
+        def read():
+            try:
+                row = obj[0] if isinstance(obj, elk.ElkTable) else obj
+                results.append(row.value)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=read) for _ in range(n)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_built_once(self):
+        for cls in (Once, SlotOnce):
+            cls.calls = []
+            obj = cls()
+            results, errors = self.read_concurrently(obj)
+            self.assertEqual(len(cls.calls), 1)
+            self.assertEqual(len(results), 8)
+            self.assertTrue(all(result is obj.value for result in results))
+            self.assertEqual(errors, [])
+
+    def test_failure_retried(self):
+        for cls in (Once, SlotOnce):
+            cls.calls = []
+            obj = cls(fail=1)
+            results, errors = self.read_concurrently(obj)
+            self.assertEqual(len(cls.calls), 2)
+            self.assertEqual(len(errors), 1)
+            self.assertEqual(len(results), 7)
+            self.assertTrue(all(result is obj.value for result in results))
+
+    def test_table_rows(self):
+        for cls in (Once, SlotOnce):
+            cls.calls = []
+            table = elk.ElkTable(cls, [{'fail': 1}])
+            results, errors = self.read_concurrently(table)
+            self.assertEqual(len(cls.calls), 2)
+            self.assertEqual(len(errors), 1)
+            self.assertEqual(len(results), 7)
+            self.assertTrue(
+                all(result is table[0].value for result in results))
+            with self.assertRaises(RuntimeError):
+                table[0].loop
+
+    def test_self_dependency(self):
+        for cls in (Once, SlotOnce):
+            with self.assertRaises(RuntimeError):
+                cls().loop
+
+    def test_bad_option(self):
+        with self.assertRaises(TypeError):
+            elk.ElkAttribute(lazy='twice')
+
+
+class Shirt(elk.Elk):
+    builds = 0
+    chest = elk.ElkAttribute(type=int)
+    waist = elk.ElkAttribute(type=int, default=30)
+    size = elk.ElkAttribute(
+        lazy=True, depends_on='chest',
+        default=lambda self: self._build_size())
+    label = elk.ElkAttribute(
+        lazy=True, depends_on='size', default=lambda self: 'size ' + self.size)
+    tag = elk.ElkAttribute(depends_on='chest', default=lambda self: self.chest)
+    other = elk.ElkAttribute(lazy=True, default=lambda self: self.chest)
+
+    def _build_size(self):
+        type(self).builds += 1
+        return 'XL' if self.chest > 44 else 'M'
+
+
+class SlotShirt(Shirt):
+    __elk_slots__ = True
+
+
+class DependencyTestCase(unittest.TestCase):
+    cls = Shirt
+
+    def setUp(self):
+        self.cls.builds = 0
+        self.obj = self.cls(chest=40)
+
+    def test_assignment_drops_dependent_value(self):
+        self.assertEqual(self.obj.size, 'M')
+        self.obj.chest = 46
+        self.assertEqual(self.obj.size, 'XL')
+        self.assertEqual(self.cls.builds, 2)
+
+    def test_transitive(self):
+        self.assertEqual(self.obj.label, 'size M')
+        self.obj.chest = 46
+        self.assertEqual(self.obj.label, 'size XL')
+
+    def test_unrelated_assignment(self):
+        self.obj.size
+        self.obj.waist = 32
+        self.obj.size
+        self.assertEqual(self.cls.builds, 1)
+
+    def test_pending_value_not_built(self):
+        self.obj.chest = 46
+        self.assertEqual(self.cls.builds, 0)
+
+    def test_non_lazy_regenerated(self):
+        self.obj.chest = 46
+        self.assertEqual(self.obj.tag, 46)
+
+    def test_undeclared_not_dropped(self):
+        self.assertEqual(self.obj.other, 40)
+        self.obj.chest = 46
+        self.assertEqual(self.obj.other, 40)
+
+    def test_delete_drops_lazy_values(self):
+        self.obj.size
+        del self.obj.chest
+        self.assertEqual(self.obj.tag, 40)
+        with self.assertRaises(AttributeError):
+            self.obj.size
+        self.obj.chest = 50
+        self.assertEqual(self.obj.size, 'XL')
+
+    def test_table_rows(self):
+        table = elk.ElkTable(self.cls, [{'chest': 40}])
+        row = table[0]
+        self.assertEqual(row.label, 'size M')
+        row.chest = 46
+        self.assertEqual(row.label, 'size XL')
+        self.assertEqual(row.tag, 46)
+
+
+class SlotDependencyTestCase(DependencyTestCase):
+    cls = SlotShirt
+
+
+class InheritedDependencyTestCase(unittest.TestCase):
+    def test_base_class_unchanged(self):
+        for slots in (False, True):
+            class Base(elk.Elk):
+                __elk_slots__ = slots
+                chest = elk.ElkAttribute(
+                    type=int, handles={'bits': 'bit_length'})
+
+            class Sub(Base):
+                size = elk.ElkAttribute(
+                    lazy=True, depends_on='chest',
+                    default=lambda self: self.chest // 10)
+
+            self.assertFalse(Base.chest._watched)
+            self.assertFalse(Base.chest._has_dependents)
+            obj = Sub(chest=40)
+            self.assertEqual(obj.size, 4)
+            obj.chest = 50
+            self.assertEqual(obj.size, 5)
+            self.assertEqual(obj.bits(), 6)
+            self.assertEqual(Base.chest.__get__(obj, Base), 50)
+
+
+class DependencyCycleTestCase(unittest.TestCase):
+    def test_cycle_rejected(self):
+        with self.assertRaises(TypeError):
+            class A(elk.Elk):
+                a = elk.ElkAttribute(default=1, depends_on='b')
+                b = elk.ElkAttribute(default=2, depends_on='a')
+
+    def test_self_dependency_rejected(self):
+        with self.assertRaises(TypeError):
+            class A(elk.Elk):
+                a = elk.ElkAttribute(default=1, depends_on='a')
+
+    def test_cycle_through_inherited_attributes_rejected(self):
+        class A(elk.Elk):
+            a = elk.ElkAttribute(default=1)
+            b = elk.ElkAttribute(lazy=True, default=2, depends_on='a')
+
+        with self.assertRaises(TypeError):
+            class B(A):
+                a = elk.ElkAttribute(default=1, depends_on='b')
+
+    def test_shared_dependency_allowed(self):
+        class A(elk.Elk):
+            a = elk.ElkAttribute(default=1)
+            b = elk.ElkAttribute(default=2, depends_on='a')
+            c = elk.ElkAttribute(default=3, depends_on=['a', 'b'])
+
+        obj = A()
+        obj.a = 5
+        self.assertEqual((obj.b, obj.c), (2, 3))
@@ -0,0 +1,118 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from . import elk
+
+
+calls = []
+
+
+def record(obj, *args):
+    calls.append((type(obj).__name__,) + args)
+
+
+class Account(elk.Elk):
+    balance = elk.ElkAttribute(type=int, default=0, trigger=record)
+    owner = elk.ElkAttribute(trigger=record, trigger_on_init=True)
+    note = elk.ElkAttribute(
+        lazy=True, default=lambda self: 'new', trigger=record)
+
+
+class SlotAccount(Account):
+    __elk_slots__ = True
+
+
+class TriggerTestCase(unittest.TestCase):
+    cls = Account
+
+    def setUp(self):
+        del calls[:]
+        self.name = self.cls.__name__
+
+    def test_fired_on_assignment(self):
+        obj = self.cls()
+        obj.balance = 10
+        obj.balance = 20
+        self.assertEqual(calls, [
+            (self.name, 10, 0),
+            (self.name, 20, 10),
+        ])
+
+    def test_no_old_value(self):
+        obj = self.cls()
+        obj.owner = 'alice'
+        self.assertEqual(calls, [(self.name, 'alice')])
+
+    def test_not_fired_after_failed_check(self):
+        obj = self.cls()
+        with self.assertRaises(TypeError):
+            obj.balance = 'lots'
+        self.assertEqual(calls, [])
+
+    def test_not_fired_on_construction(self):
+        self.cls(balance=5)
+        self.assertEqual(calls, [])
+
+    def test_fired_on_construction_if_requested(self):
+        obj = self.cls(owner='bob', balance=5)
+        self.assertEqual(calls, [(self.name, 'bob')])
+        self.assertEqual(obj.owner, 'bob')
+
+    def test_not_fired_for_lazy_generation(self):
+        obj = self.cls()
+        self.assertEqual(obj.note, 'new')
+        self.assertEqual(calls, [])
+        obj.note = 'old'
+        self.assertEqual(calls, [(self.name, 'old', 'new')])
+
+    def test_batch_coalesces(self):
+        first, second = self.cls(), self.cls()
+        with elk.ElkBatch():
+            first.balance = 1
+            second.balance = 5
+            with elk.ElkBatch():
+                first.balance = 2
+            first.balance = 3
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, [
+            (self.name, 3, 0),
+            (self.name, 5, 0),
+        ])
+
+    def test_batch_fires_on_error(self):
+        obj = self.cls()
+        with self.assertRaises(ValueError):
+            with elk.ElkBatch():
+                obj.balance = 1
+                raise ValueError
+        self.assertEqual(calls, [(self.name, 1, 0)])
+
+    def test_table_row(self):
+        table = elk.ElkTable(self.cls, [{'balance': 1}])
+        table[0].balance = 2
+        self.assertEqual(calls[-1][1:], (2, 1))
+
+    def test_bad_options(self):
+        with self.assertRaises(TypeError):
+            elk.ElkAttribute(trigger='record')
+        with self.assertRaises(TypeError):
+            elk.ElkAttribute(trigger_on_init=True)
+
+
+class SlotTriggerTestCase(TriggerTestCase):
+    cls = SlotAccount
@@ -0,0 +1,104 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import gc
+import pickle
+import unittest
+
+from . import elk
+
+
+class Tree(elk.Elk):
+    name = elk.ElkAttribute(type=str, default='root')
+    parent = elk.ElkAttribute(
+        weak_ref=True, handles={'parent_name': 'name'})
+
+
+class SlotTree(elk.Elk):
+    __elk_slots__ = True
+    __slots__ = ('__weakref__',)
+    name = elk.ElkAttribute(type=str, default='root')
+    parent = elk.ElkAttribute(
+        weak_ref=True, handles={'parent_name': 'name'})
+
+
+class Typed(elk.Elk):
+    parent = elk.ElkAttribute(type=Tree, weak_ref=True)
+
+
+class WeakRefTestCase(unittest.TestCase):
+    cls = Tree
+
+    def test_constructor_value(self):
+        root = self.cls()
+        child = self.cls(name='child', parent=root)
+        self.assertIs(child.parent, root)
+        self.assertEqual(child.parent_name, 'root')
+
+    def test_assigned_value(self):
+        root = self.cls()
+        child = self.cls(name='child')
+        child.parent = root
+        self.assertIs(child.parent, root)
+
+    def test_does_not_keep_referent_alive(self):
+        root = self.cls()
+        child = self.cls(name='child', parent=root)
+        del root
+        gc.collect()
+        with self.assertRaises(AttributeError):
+            child.parent
+        with self.assertRaises(AttributeError):
+            child.parent_name
+
+    def test_none(self):
+        obj = self.cls(parent=None)
+        self.assertIsNone(obj.parent)
+
+    def test_value_must_be_weakly_referenceable(self):
+        with self.assertRaises(TypeError):
+            self.cls(parent=42)
+
+    def test_evolve(self):
+        root = self.cls()
+        child = self.cls(name='child', parent=root)
+        self.assertIs(child.evolve(name='other').parent, root)
+
+    def test_pickle(self):
+        root = self.cls()
+        pair = pickle.loads(pickle.dumps(
+            [root, self.cls(name='child', parent=root)]))
+        self.assertIs(pair[1].parent, pair[0])
+
+
+class SlotWeakRefTestCase(WeakRefTestCase):
+    cls = SlotTree
+
+
+class TypedWeakRefTestCase(unittest.TestCase):
+    def test_type_checked(self):
+        with self.assertRaises(TypeError):
+            Typed(parent=SlotTree())
+        tree = Tree()
+        obj = Typed(parent=tree)
+        with self.assertRaises(TypeError):
+            obj.parent = SlotTree()
+        self.assertIs(obj.parent, tree)
+
+    def test_bad_options(self):
+        with self.assertRaises(TypeError):
+            elk.ElkAttribute(weak_ref=True, lazy='async',
+                             default=lambda self: None)
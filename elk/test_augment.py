@@ -0,0 +1,152 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from . import elk
+
+
+class Document(elk.Elk):
+    @elk.augmentable
+    def render(self, inner, title):
+        return '<html>{}{}</html>'.format(title, inner(title.lower()) or '')
+
+
+class Page(Document):
+    @elk.augment('render')
+    def _render_page(self, inner, name):
+        return '<body>{}{}</body>'.format(name, inner() or '')
+
+
+class Home(Page):
+    @elk.augment('render')
+    def _render_home(self, inner):
+        return '<p>home</p>'
+
+
+class Plain(Page):
+    pass
+
+
+class AugmentTestCase(unittest.TestCase):
+    def test_augmentable_without_augments(self):
+        self.assertEqual(Document().render('T'), '<html>T</html>')
+
+    def test_chain_runs_from_base_down(self):
+        self.assertEqual(
+            Page().render('T'), '<html>T<body>t</body></html>')
+        self.assertEqual(
+            Home().render('T'),
+            '<html>T<body>t<p>home</p></body></html>'
+        )
+
+    def test_inherited_chain(self):
+        self.assertEqual(
+            Plain().render('T'), '<html>T<body>t</body></html>')
+
+    def test_chain_resolved_at_class_creation(self):
+        self.assertEqual(len(Home.__elk_augments__['render']), 3)
+        self.assertNotIn('__elk_augments__', vars(Plain))
+
+    def test_modifiers_wrap_augmented_method(self):
+        class Logged(Page):
+            log = elk.ElkAttribute(default=lambda self: [])
+
+            @elk.before('render')
+            def _log(self, title):
+                self.log.append(title)
+
+        obj = Logged()
+        self.assertEqual(obj.render('T'), '<html>T<body>t</body></html>')
+        self.assertEqual(obj.log, ['T'])
+
+    def test_augment_below_modified_method(self):
+        class Logged(Page):
+            log = elk.ElkAttribute(default=lambda self: [])
+
+            @elk.before('render')
+            def _log(self, title):
+                self.log.append(title)
+
+        class Titled(Logged):
+            @elk.after('render')
+            def _done(self, title):
+                self.log.append('done')
+
+        class Sub(Titled):
+            @elk.augment('render')
+            def _render_sub(self, inner):
+                return '<p>sub</p>'
+
+        obj = Sub()
+        self.assertEqual(
+            obj.render('T'), '<html>T<body>t<p>sub</p></body></html>')
+        self.assertEqual(obj.log, ['T', 'done'])
+        self.assertEqual(len(Sub.__elk_augments__['render']), 3)
+
+    def test_modifiers_of_augmentable_class_kept(self):
+        class Base(elk.Elk):
+            log = elk.ElkAttribute(default=lambda self: [])
+
+            @elk.augmentable
+            def run(self, inner):
+                self.log.append('base')
+                inner()
+
+            @elk.around('run')
+            def _around(self, orig):
+                self.log.append('around')
+                orig()
+
+        class Middle(Base):
+            @elk.augment('run')
+            def _run_middle(self, inner):
+                self.log.append('middle')
+                inner()
+
+        class Sub(Middle):
+            @elk.augment('run')
+            def _run_sub(self, inner):
+                self.log.append('sub')
+
+        obj = Middle()
+        obj.run()
+        self.assertEqual(obj.log, ['around', 'base', 'middle'])
+        obj = Sub()
+        obj.run()
+        self.assertEqual(obj.log, ['around', 'base', 'middle', 'sub'])
+
+    def test_cannot_augment_ordinary_method(self):
+        class Base(elk.Elk):
+            def render(self):
+                pass
+
+        with self.assertRaises(TypeError):
+            class Sub(Base):
+                @elk.augment('render')
+                def _render(self, inner):
+                    pass
+
+    def test_cannot_augment_overridden_method(self):
+        class Override(Page):
+            def render(self, title):
+                return title
+
+        with self.assertRaises(TypeError):
+            class Sub(Override):
+                @elk.augment('render')
+                def _render(self, inner):
+                    pass
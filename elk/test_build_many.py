@@ -0,0 +1,115 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import types
+import unittest
+
+from . import elk
+
+
+class Row(elk.Elk):
+    id = elk.ElkAttribute(mode='ro', type=int, required=True)
+    name = elk.ElkAttribute(type=str, default='')
+    score = elk.ElkAttribute(type=(int, float), builder='_build_score')
+
+    def _build_score(self):
+        return 0.0
+
+
+class BuildManyTestCase(unittest.TestCase):
+    def test_mappings(self):
+        rows = Row.build_many([{'id': 1, 'name': 'a'}, {'id': 2}])
+        self.assertEqual(
+            [(r.id, r.name, r.score) for r in rows],
+            [(1, 'a', 0.0), (2, '', 0.0)]
+        )
+
+    def test_tuples_follow_declared_order(self):
+        rows = Row.build_many([(1, 'a', 3), (2,)])
+        self.assertEqual(
+            [(r.id, r.name, r.score) for r in rows],
+            [(1, 'a', 3), (2, '', 0.0)]
+        )
+
+    def test_too_many_values_raises_TypeError(self):
+        with self.assertRaises(TypeError):
+            Row.build_many([(1, 'a', 3, 4)])
+
+    def test_bad_type_raises_TypeError(self):
+        with self.assertRaises(TypeError):
+            Row.build_many([{'id': 1}, {'id': 'two'}])
+
+    def test_missing_required_raises_AttributeError(self):
+        with self.assertRaises(AttributeError):
+            Row.build_many([{'name': 'a'}])
+
+    def test_unknown_attribute_raises_TypeError(self):
+        with self.assertRaises(TypeError):
+            Row.build_many([{'id': 1, 'colour': 'red'}])
+
+    def test_errors_are_collected(self):
+        errors = []
+        rows = Row.build_many(
+            [{'id': 1}, {'id': 'two'}, {'name': 'c'}, (4,), (5, 6, 7, 8)],
+            errors=errors
+        )
+        self.assertEqual([r.id for r in rows], [1, 4])
+        self.assertEqual([i for i, _ in errors], [1, 2, 4])
+        self.assertIsInstance(errors[0][1], TypeError)
+        self.assertIsInstance(errors[1][1], AttributeError)
+        self.assertIsInstance(errors[2][1], TypeError)
+
+    def test_build_iter_is_lazy_generator(self):
+        def records():
+            yield {'id': 1}
+            raise UserWarning
+
+        rows = Row.build_iter(records(), chunk_size=1)
+        self.assertIsInstance(rows, types.GeneratorType)
+        self.assertEqual(next(rows).id, 1)
+        with self.assertRaises(UserWarning):
+            next(rows)
+
+    def test_chunks_are_checked_separately(self):
+        errors = []
+        rows = list(Row.build_iter(
+            [{'id': 1}, {'id': 2}, {'id': 'three'}, {'id': 4}],
+            errors=errors,
+            chunk_size=2
+        ))
+        self.assertEqual([r.id for r in rows], [1, 2, 4])
+        self.assertEqual([i for i, _ in errors], [2])
+
+    def test_buildargs_and_build_are_used(self):
+        class Person(elk.Elk):
+            name = elk.ElkAttribute(type=str)
+
+            @classmethod
+            def __buildargs__(cls, **kwargs):
+                kwargs['name'] = kwargs['name'].title()
+                return kwargs
+
+            def __build__(self, **kwargs):
+                if self.name == 'Nobody':
+                    raise ValueError(self.name)
+
+        errors = []
+        people = Person.build_many(
+            [{'name': 'alice'}, ('nobody',)],
+            errors=errors
+        )
+        self.assertEqual([p.name for p in people], ['Alice'])
+        self.assertIsInstance(errors[0][1], ValueError)
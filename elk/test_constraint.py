@@ -0,0 +1,199 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import sys
+import unittest
+
+from . import elk
+from .constraint import compile_constraint
+
+try:
+    import typing
+except ImportError:
+    typing = None
+
+abc = getattr(collections, 'abc', collections)
+
+
+class ConstraintTestCase(unittest.TestCase):
+    def assertAccepts(self, spec, *values):
+        check, _ = compile_constraint(spec)
+        for value in values:
+            self.assertTrue(check(value), '{!r} {!r}'.format(spec, value))
+
+    def assertRejects(self, spec, *values):
+        check, _ = compile_constraint(spec)
+        for value in values:
+            self.assertFalse(check(value), '{!r} {!r}'.format(spec, value))
+
+    def test_no_constraint(self):
+        self.assertEqual(compile_constraint(None), (None, None))
+
+    def test_classes(self):
+        self.assertAccepts(int, 1, True)
+        self.assertRejects(int, 1.0, '1', None)
+        self.assertAccepts((int, str), 1, '1')
+        self.assertRejects((int, str), 1.0)
+        self.assertEqual(compile_constraint((int, str))[1], (int, str))
+
+    def test_abstract_classes_cached(self):
+        check, classes = compile_constraint(abc.Sequence)
+        self.assertEqual(classes, (abc.Sequence,))
+        self.assertTrue(check([1]))
+        self.assertTrue(check([]))
+        self.assertTrue(check(()))
+        self.assertFalse(check(set()))
+        self.assertFalse(check(1))
+
+    def test_union_and_optional(self):
+        self.assertAccepts(elk.Union(int, str), 1, 'a')
+        self.assertRejects(elk.Union(int, str), None, 1.0)
+        self.assertAccepts(elk.Optional(str), None, 'a')
+        self.assertRejects(elk.Optional(str), 1)
+        self.assertEqual(
+            compile_constraint(elk.Optional(str))[1], (str, type(None)))
+        self.assertAccepts(elk.Optional(elk.ListOf(int)), None, [1])
+        self.assertRejects(elk.Optional(elk.ListOf(int)), ['a'])
+
+    def test_containers(self):
+        self.assertAccepts(elk.ListOf(int), [], [1, 2])
+        self.assertRejects(elk.ListOf(int), (1,), [1, 'a'], None)
+        self.assertAccepts(elk.TupleOf(str), (), ('a', 'b'))
+        self.assertRejects(elk.TupleOf(str), ['a'], ('a', 1))
+        self.assertAccepts(elk.SetOf(int), set([1]), frozenset([1]))
+        self.assertRejects(elk.SetOf(int), [1], set(['a']))
+        self.assertAccepts(elk.DictOf(str, int), {}, {'a': 1})
+        self.assertRejects(elk.DictOf(str, int), {'a': 'b'}, {1: 1}, [])
+        self.assertAccepts(
+            elk.DictOf(str, elk.ListOf(int)), {'a': [1, 2]})
+        self.assertRejects(
+            elk.DictOf(str, elk.ListOf(int)), {'a': [1, None]})
+
+    def test_predicates(self):
+        positive = elk.Predicate(lambda x: x > 0, 'a positive number')
+        self.assertAccepts(positive, 1, 0.5)
+        self.assertRejects(positive, 0, -1)
+        self.assertEqual(repr(positive), 'a positive number')
+        self.assertAccepts(callable, len)
+        self.assertRejects(callable, 1)
+        self.assertAccepts(elk.Union(int, callable), 1, len)
+        self.assertRejects(elk.Union(int, callable), 'a')
+
+    def test_unsupported(self):
+        with self.assertRaises(TypeError):
+            compile_constraint(1)
+
+        class Callable(object):
+            def __call__(self, value):
+                return True
+
+        with self.assertRaises(TypeError):
+            compile_constraint(Callable())
+
+    @unittest.skipIf(typing is None, 'typing not available')
+    def test_typing(self):
+        self.assertEqual(compile_constraint(typing.Any), (None, None))
+        self.assertAccepts(typing.Optional[str], None, 'a')
+        self.assertRejects(typing.Optional[str], 1)
+        self.assertAccepts(typing.Union[int, str], 1, 'a')
+        self.assertAccepts(typing.List[int], [1])
+        self.assertRejects(typing.List[int], [1, 'a'], (1,))
+        self.assertAccepts(typing.Dict[str, int], {'a': 1})
+        self.assertRejects(typing.Dict[str, int], {'a': 'b'})
+        self.assertAccepts(typing.Tuple[int, str], (1, 'a'))
+        self.assertRejects(typing.Tuple[int, str], (1, 2), (1,))
+        self.assertAccepts(typing.Tuple[int, ...], (), (1, 2))
+        self.assertRejects(typing.Tuple[int, ...], (1, 'a'))
+        self.assertAccepts(typing.Sequence[int], [1], (1,))
+        self.assertRejects(typing.Sequence[int], ['a'])
+        self.assertAccepts(typing.Iterator[int], iter(['a']))
+        self.assertAccepts(typing.List, [1, 'a'])
+
+    @unittest.skipIf(typing is None, 'typing not available')
+    def test_typing_new_type(self):
+        user_id = typing.NewType('UserId', int)
+        self.assertEqual(compile_constraint(user_id)[1], (int,))
+        self.assertAccepts(user_id, 0, 1)
+        self.assertRejects(user_id, 'abc')
+        self.assertAccepts(typing.Optional[user_id], None, 0)
+        self.assertRejects(elk.ListOf(user_id), ['abc'])
+
+    @unittest.skipIf(not hasattr(typing, 'Literal'), 'typing.Literal')
+    def test_typing_unsupported(self):
+        with self.assertRaises(TypeError):
+            elk.ElkAttribute(type=typing.Literal['a'])
+
+    @unittest.skipIf(sys.version_info < (3, 9), 'builtin generics')
+    def test_builtin_generics(self):
+        self.assertAccepts(list.__class_getitem__(int), [1])
+        self.assertRejects(list.__class_getitem__(int), ['a'])
+
+
+class Inventory(elk.Elk):
+    counts = elk.ElkAttribute(
+        mode='rw', type=elk.DictOf(str, int), default=lambda self: {})
+    tags = elk.ElkAttribute(mode='rw', type=elk.ListOf(str))
+    owner = elk.ElkAttribute(mode='rw', type=elk.Optional(str))
+    items = elk.ElkAttribute(mode='rw', type=abc.Sequence)
+
+
+class SlotInventory(elk.Elk):
+    __elk_slots__ = True
+    tags = elk.ElkAttribute(mode='rw', type=elk.ListOf(str))
+    owner = elk.ElkAttribute(mode='rw', type=elk.Optional(str))
+
+
+class AttributeConstraintTestCase(unittest.TestCase):
+    def test_construction(self):
+        for cls in (Inventory, SlotInventory):
+            obj = cls(tags=['a'], owner=None)
+            self.assertEqual((obj.tags, obj.owner), (['a'], None))
+            with self.assertRaises(TypeError):
+                cls(tags=[1])
+            with self.assertRaises(TypeError):
+                cls(owner=1)
+
+    def test_assignment(self):
+        for cls in (Inventory, SlotInventory):
+            obj = cls()
+            obj.owner = 'a'
+            obj.owner = None
+            with self.assertRaises(TypeError):
+                obj.tags = ('a',)
+        obj = Inventory()
+        obj.items = (1, 2)
+        obj.items = [1]
+        with self.assertRaises(TypeError):
+            obj.items = 1
+
+    def test_error_message(self):
+        with self.assertRaises(TypeError) as cm:
+            Inventory(tags=['a', 2])
+        self.assertEqual(
+            str(cm.exception), "'tags' attribute must be a ListOf(str)")
+
+    def test_default_checked(self):
+        with self.assertRaises(TypeError):
+            elk.ElkAttribute(type=elk.Optional(int), default='a')
+        elk.ElkAttribute(type=elk.Optional(int), default=None)
+
+    def test_build_many(self):
+        objs = Inventory.build_many([{'tags': ['a']}, {'owner': 'b'}])
+        self.assertEqual(len(objs), 2)
+        errors = []
+        Inventory.build_many([{'tags': ['a', 1]}], errors=errors)
+        self.assertEqual(len(errors), 1)
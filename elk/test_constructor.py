@@ -0,0 +1,97 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from . import elk
+
+
+class A(elk.Elk):
+    x = elk.ElkAttribute(type=int)
+    y = elk.ElkAttribute(init_arg='not an identifier', default=2)
+    z = elk.ElkAttribute(init_arg='class')
+    _elk_v = elk.ElkAttribute()
+
+
+# names used by the generated code
+GENERATED_NAMES = (
+    'new', 'cls', 'isinstance', 'getattr', 'set', 'TypeError', 'k0', 't0',
+    'v0', 'p0', 'f0', 'm1', 'random', 'rate', 'free', 'size', 'setattr',
+    '_weak',
+)
+
+
+class B(elk.Elk):
+    locals().update(
+        (name, elk.ElkAttribute(type=int, default=i))
+        for i, name in enumerate(GENERATED_NAMES)
+    )
+    x = elk.ElkAttribute(type=int, builder='_build_x')
+
+    def _build_x(self):
+        return 42
+
+
+class GeneratedConstructorTestCase(unittest.TestCase):
+    def test_init_arg_need_not_be_identifier(self):
+        a = A(**{'not an identifier': 20, 'class': 30})
+        self.assertEqual(a.y, 20)
+        self.assertEqual(a.z, 30)
+
+    def test_init_arg_may_clash_with_generated_names(self):
+        a = A(_elk_v=3)
+        self.assertEqual(a._elk_v, 3)
+
+    def test_positional_args_raise_TypeError(self):
+        with self.assertRaises(TypeError):
+            A(1)
+
+    def test_unknown_args_raise_TypeError(self):
+        with self.assertRaises(TypeError):
+            A(x=1, w=2)
+
+    def test_type_checked(self):
+        with self.assertRaises(TypeError):
+            A(x='one')
+
+    def test_each_class_has_own_constructor(self):
+        class B(A):
+            w = elk.ElkAttribute(default=4)
+
+        b = B(x=1)
+        self.assertEqual((b.x, b.y, b.w), (1, 2, 4))
+        with self.assertRaises(AttributeError):
+            A(x=1).w
+        self.assertIsNot(A.__elk_new__, B.__elk_new__)
+
+    def test_custom_build_receives_unknown_args(self):
+        class B(A):
+            def __build__(self, **kwargs):
+                self.extra = kwargs['w']
+
+        self.assertEqual(B(x=1, w=2).extra, 2)
+
+    def test_init_args_may_clash_with_generated_globals(self):
+        for cls in (B, B.pool().acquire):
+            b = cls()
+            for i, name in enumerate(GENERATED_NAMES):
+                self.assertEqual(getattr(b, name), i)
+            self.assertEqual(b.x, 42)
+            b = cls(**{name: 100 for name in GENERATED_NAMES})
+            for name in GENERATED_NAMES:
+                self.assertEqual(getattr(b, name), 100)
+            with self.assertRaises(TypeError):
+                cls(new='three')
@@ -0,0 +1,176 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from . import elk
+
+
+class Point(elk.Elk):
+    x = elk.ElkAttribute(mode='ro', type=int, required=True)
+    y = elk.ElkAttribute(mode='ro', type=int, default=0)
+    tag = elk.ElkAttribute(mode='rw', init_arg='label')
+    norm = elk.ElkAttribute(mode='ro', lazy=True, builder='_build_norm')
+    size = elk.ElkAttribute(
+        mode='ro', lazy=True, builder='_build_size', depends_on=['x'])
+    double = elk.ElkAttribute(
+        mode='ro', lazy=True, builder='_build_double', depends_on='size')
+    stamp = elk.ElkAttribute(mode='ro', builder='_build_stamp')
+    area = elk.ElkAttribute(
+        mode='ro', builder='_build_area', depends_on=('x', 'y'))
+
+    calls = []
+
+    def _build_norm(self):
+        self.calls.append('norm')
+        return abs(self.x) + abs(self.y)
+
+    def _build_size(self):
+        self.calls.append('size')
+        return abs(self.x)
+
+    def _build_double(self):
+        self.calls.append('double')
+        return 2 * self.size
+
+    def _build_stamp(self):
+        self.calls.append('stamp')
+        return object()
+
+    def _build_area(self):
+        self.calls.append('area')
+        return self.x * self.y
+
+
+class SlotPoint(elk.Elk):
+    __elk_slots__ = True
+    x = elk.ElkAttribute(mode='ro', type=int, required=True)
+    size = elk.ElkAttribute(
+        mode='ro', lazy=True, builder='_build_size', depends_on=['x'])
+
+    def _build_size(self):
+        return abs(self.x)
+
+
+class EvolveTestCase(unittest.TestCase):
+    def setUp(self):
+        del Point.calls[:]
+
+    def test_changes(self):
+        p = Point(x=1, y=2, label='a')
+        q = p.evolve(y=3, label='b')
+        self.assertIsInstance(q, Point)
+        self.assertEqual((p.x, p.y, p.tag), (1, 2, 'a'))
+        self.assertEqual((q.x, q.y, q.tag), (1, 3, 'b'))
+
+    def test_no_changes_copies(self):
+        p = Point(x=1)
+        q = p.evolve()
+        self.assertIsNot(p, q)
+        self.assertEqual((q.x, q.y), (1, 0))
+        self.assertIs(q.stamp, p.stamp)
+
+    def test_changes_are_checked(self):
+        p = Point(x=1)
+        with self.assertRaises(TypeError):
+            p.evolve(x='1')
+        with self.assertRaises(TypeError):
+            p.evolve(tag='b')  # init arg is 'label'
+        with self.assertRaises(TypeError):
+            p.evolve(z=1)
+
+    def test_builders_not_run_again(self):
+        p = Point(x=1)
+        del Point.calls[:]
+        q = p.evolve(label='b')
+        self.assertEqual(Point.calls, [])
+        self.assertIs(q.stamp, p.stamp)
+
+    def test_dependent_builder_run_again(self):
+        p = Point(x=2, y=3)
+        self.assertEqual(p.area, 6)
+        del Point.calls[:]
+        q = p.evolve(y=4)
+        self.assertEqual(Point.calls, ['area'])
+        self.assertEqual(q.area, 8)
+        self.assertIs(q.stamp, p.stamp)
+
+    def test_lazy_values_kept_unless_dependent(self):
+        p = Point(x=-2, y=1)
+        self.assertEqual((p.norm, p.size, p.double), (3, 2, 4))
+        del Point.calls[:]
+        q = p.evolve(label='b')
+        # norm declares no dependencies, so is generated again
+        self.assertEqual((q.size, q.double, q.norm), (2, 4, 3))
+        self.assertEqual(Point.calls, ['norm'])
+        del Point.calls[:]
+        r = p.evolve(x=5)
+        self.assertEqual((r.double, r.norm), (10, 6))
+        self.assertEqual(Point.calls, ['area', 'double', 'size', 'norm'])
+
+    def test_unread_lazy_values(self):
+        p = Point(x=1)
+        q = p.evolve(x=4)
+        self.assertEqual((q.size, q.norm), (4, 4))
+        self.assertEqual((p.size, p.norm), (1, 1))
+
+    def test_unset_attributes(self):
+        p = Point(x=1)
+        q = p.evolve(y=2)
+        self.assertFalse(hasattr(q, 'tag'))
+
+    def test_slots(self):
+        p = SlotPoint(x=-3)
+        self.assertEqual(p.size, 3)
+        self.assertEqual(p.evolve().size, 3)
+        self.assertEqual(p.evolve(x=4).size, 4)
+
+    def test_other_state_copied(self):
+        class Cached(elk.Elk):
+            a = elk.ElkAttribute(type=int)
+
+            def __build__(self, **kwargs):
+                self.cache = {}
+
+        class SlotCached(elk.Elk):
+            __elk_slots__ = True
+            __slots__ = ('cache',)
+            a = elk.ElkAttribute(type=int)
+
+            def __build__(self, **kwargs):
+                self.cache = {}
+
+        class FrozenCached(Cached):
+            __elk_frozen__ = True
+
+            def __build__(self, **kwargs):
+                object.__setattr__(self, 'cache', {})
+
+        for cls in (Cached, SlotCached, FrozenCached):
+            obj = cls(a=1)
+            if cls is FrozenCached:
+                hash(obj)
+            copy = obj.evolve(a=2)
+            self.assertIs(copy.cache, obj.cache)
+            self.assertEqual(copy.a, 2)
+        self.assertNotEqual(hash(copy), hash(obj))
+
+    def test_depends_on_checked(self):
+        with self.assertRaises(TypeError):
+            elk.ElkAttribute(depends_on=['x'])
+        with self.assertRaises(AttributeError):
+            class Bad(elk.Elk):
+                a = elk.ElkAttribute(default=1, depends_on=['b'])
@@ -0,0 +1,145 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from . import elk
+
+
+class Key(elk.Elk):
+    __elk_frozen__ = True
+    name = elk.ElkAttribute(mode='rw', type=str, required=True)
+    version = elk.ElkAttribute(mode='rw', type=int, default=1)
+    note = elk.ElkAttribute(mode='rw')
+    label = elk.ElkAttribute(
+        mode='ro', lazy=True,
+        default=lambda self: '{}-{}'.format(self.name, self.version))
+
+
+class SlotKey(elk.Elk):
+    __elk_frozen__ = True
+    __elk_slots__ = True
+    name = elk.ElkAttribute(mode='rw', type=str, required=True)
+    version = elk.ElkAttribute(mode='rw', type=int, default=1)
+
+
+class SubKey(Key):
+    extra = elk.ElkAttribute(mode='rw', default=0)
+
+
+class FrozenTestCase(unittest.TestCase):
+    def test_cannot_set_or_delete(self):
+        for cls in (Key, SlotKey, SubKey):
+            key = cls(name='a')
+            with self.assertRaises(AttributeError):
+                key.name = 'b'
+            with self.assertRaises(AttributeError):
+                del key.version
+            with self.assertRaises(AttributeError):
+                key.other = 1
+            self.assertEqual(key.name, 'a')
+
+    def test_lazy_attributes(self):
+        key = Key(name='a', version=2)
+        self.assertEqual(key.label, 'a-2')
+
+    def test_equality(self):
+        for cls in (Key, SlotKey):
+            self.assertEqual(cls(name='a'), cls(name='a'))
+            self.assertNotEqual(cls(name='a'), cls(name='a', version=2))
+            self.assertFalse(cls(name='a') != cls(name='a'))
+        self.assertNotEqual(Key(name='a'), SlotKey(name='a'))
+        self.assertNotEqual(Key(name='a'), Key(name='a', note='x'))
+        self.assertNotEqual(Key(name='a'), SubKey(name='a'))
+
+    def test_lazy_attributes_not_compared(self):
+        a, b = Key(name='a'), Key(name='a')
+        a.label
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+
+    def test_hash(self):
+        for cls in (Key, SlotKey):
+            keys = {cls(name='a'): 1, cls(name='b'): 2}
+            self.assertEqual(keys[cls(name='a')], 1)
+            self.assertEqual(keys[cls(name='b')], 2)
+            self.assertNotIn(cls(name='c'), keys)
+
+    def test_hash_cached(self):
+        key = Key(name='a')
+        h = hash(key)
+        self.assertEqual(key._elk_hash, h)
+        self.assertEqual(hash(key), h)
+
+    def test_subclass_must_be_frozen(self):
+        with self.assertRaises(TypeError):
+            class Thawed(Key):
+                __elk_frozen__ = False
+
+    def test_own_methods_kept(self):
+        class Named(elk.Elk):
+            __elk_frozen__ = True
+            name = elk.ElkAttribute(mode='ro')
+
+            def __hash__(self):
+                return 42
+
+        self.assertEqual(hash(Named(name='x')), 42)
+        self.assertEqual(Named(name='x'), Named(name='x'))
+
+    def test_inherited_methods_kept(self):
+        class ByName(elk.Elk):
+            __elk_frozen__ = True
+            name = elk.ElkAttribute(mode='ro')
+            note = elk.ElkAttribute(mode='ro')
+
+            def __eq__(self, other):
+                return self.name == other.name
+
+            def __ne__(self, other):
+                return not self == other
+
+            def __hash__(self):
+                return hash(self.name)
+
+        class SubByName(ByName):
+            pass
+
+        for cls in (ByName, SubByName):
+            self.assertEqual(cls(name='x', note=1), cls(name='x', note=2))
+            self.assertFalse(cls(name='x', note=1) != cls(name='x', note=2))
+            self.assertEqual(hash(cls(name='x', note=1)), hash('x'))
+        # generated methods are generated again for the subclass
+        self.assertNotEqual(
+            SubKey(name='x', extra=1), SubKey(name='x', extra=2))
+
+    def test_evolve(self):
+        key = Key(name='a')
+        hash(key)
+        other = key.evolve(version=2)
+        self.assertEqual(other.version, 2)
+        self.assertEqual(other, Key(name='a', version=2))
+        self.assertEqual(hash(other), hash(Key(name='a', version=2)))
+
+    def test_pool(self):
+        for cls in (Key, SlotKey):
+            pool = cls.pool()
+            key = pool.acquire(name='a')
+            hash(key)
+            pool.release(key)
+            other = pool.acquire(name='b')
+            self.assertIs(key, other)
+            self.assertEqual(hash(other), hash(cls(name='b')))
@@ -27,6 +27,59 @@ class B(A):
     pass
 
 
+class C(A):
+    y = elk.ElkAttribute(lazy=True, depends_on=['x'], builder='_build_y')
+    z = elk.ElkAttribute(default=1, init_arg='zed')
+
+    def _build_y(self):
+        return self.x + 1
+
+
+class D(C):
+    w = elk.ElkAttribute(depends_on=['x', 'z'], builder='_build_w')
+
+    def _build_w(self):
+        return self.x + self.z
+
+
+class E(D):
+    z = elk.ElkAttribute(default=2, init_arg='zz')
+
+
 class ElkMetaTestCase(unittest.TestCase):
     def test_subclasses_inherit_elk_attributes(self):
         self.assertEqual(B().x, 10)
+
+    def test_subclasses_extend_metadata(self):
+        self.assertEqual(C.__elk_init_args__, set(['x', 'y', 'zed']))
+        self.assertEqual(D.__elk_init_args__, set(['x', 'y', 'zed', 'w']))
+        self.assertEqual(
+            D.__elk_dependents__['x'],
+            (C.__elk_attrs__['y'], D.__elk_attrs__['w']),
+        )
+        self.assertEqual(D.__elk_dependents__['z'], (D.__elk_attrs__['w'],))
+        self.assertNotIn('z', C.__elk_dependents__)
+
+    def test_subclass_overriding_attribute(self):
+        self.assertEqual(E.__elk_init_args__, set(['x', 'y', 'zz', 'w']))
+        e = E(x=1, zz=5)
+        self.assertEqual((e.y, e.z, e.w), (2, 5, 6))
+        e.x = 3
+        self.assertEqual((e.y, e.w), (4, 8))
+
+    def test_inherited_delegations(self):
+        class F(elk.Elk):
+            x = elk.ElkAttribute(handles={'upper': 'upper'})
+
+        class G(F):
+            pass
+
+        self.assertNotIn('upper', vars(G))
+        self.assertEqual(G(x='a').upper(), 'A')
+
+    def test_constructor_generated_when_used(self):
+        class F(A):
+            y = elk.ElkAttribute(default=2)
+
+        self.assertEqual((F().x, F().y), (10, 2))
+        self.assertIs(F.__elk_new__, F.__elk_new__)
@@ -0,0 +1,152 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import importlib
+import re
+import unittest
+
+from . import elk
+
+
+class Named(elk.ElkRole):
+    name = elk.ElkAttribute(type=str, default='')
+
+
+class Labelled(elk.ElkRole):
+    __with__ = Named
+
+    label = elk.ElkAttribute(type=str, init_arg='text', lazy=True,
+                             builder='_build_label')
+
+    def _build_label(self):
+        return self.name.upper()
+
+
+class Item(elk.Elk):
+    __with__ = Labelled
+
+    id = elk.ElkAttribute(mode='ro', type=int, required=True)
+    price = elk.ElkAttribute(type=float, builder='_build_price')
+    note = elk.ElkAttribute(init_arg=None, handles=('upper', 'strip'))
+    size = elk.ElkAttribute(depends_on='id', default=lambda self: self.id)
+
+    def _build_price(self):
+        return 1.0
+
+    def save(self):
+        pass
+
+    @elk.before('save')
+    def _check(self):
+        pass
+
+
+class Special(Item):
+    @elk.around(re.compile('^save$'))
+    def _wrap(self, orig):
+        return orig()
+
+
+class MetaobjectTestCase(unittest.TestCase):
+    def test_attributes_in_declared_order(self):
+        m = elk.meta(Item)
+        self.assertEqual(
+            [a.name for a in m.attributes],
+            ['name', 'label', 'id', 'price', 'note', 'size'],
+        )
+        self.assertIs(m.cls, Item)
+        self.assertIs(m.by_name['id'], m.attributes[2])
+
+    def test_attribute_metadata(self):
+        m = elk.meta(Item)
+        id_ = m.by_name['id']
+        self.assertEqual(
+            (id_.init_arg, id_.type, id_.mode, id_.required),
+            ('id', int, 'ro', True),
+        )
+        self.assertIs(id_.descriptor, Item.__elk_attrs__['id'])
+        label = m.by_name['label']
+        self.assertEqual(
+            (label.init_arg, label.lazy, label.builder),
+            ('text', True, '_build_label'),
+        )
+        note = m.by_name['note']
+        self.assertIsNone(note.init_arg)
+        self.assertEqual(note.handles, ('upper', 'strip'))
+        self.assertEqual(m.by_name['size'].depends_on, frozenset(['id']))
+        self.assertEqual(m.by_name['price'].depends_on, frozenset())
+
+    def test_init_args(self):
+        m = elk.meta(Item)
+        self.assertEqual(m.init_args, ('name', 'text', 'id', 'price', 'size'))
+        self.assertIs(m.by_init_arg['text'], m.by_name['label'])
+        self.assertNotIn('note', m.by_init_arg)
+
+    def test_partitions(self):
+        m = elk.meta(Item)
+        names = lambda attrs: [a.name for a in attrs]  # noqa: E731
+        self.assertEqual(names(m.required), ['id'])
+        self.assertEqual(names(m.lazy), ['label'])
+        self.assertEqual(names(m.defaults), ['name', 'price', 'size'])
+
+    def test_roles(self):
+        self.assertEqual(elk.meta(Item).roles, frozenset([Labelled, Named]))
+
+    def test_modifiers(self):
+        (before,) = elk.meta(Item).modifiers
+        self.assertEqual(
+            (before.kind, before.names, before.owner),
+            ('before', ('save',), Item),
+        )
+        self.assertIs(before.function, vars(Item)['_check']._f)
+        self.assertEqual(
+            [(mod.kind, mod.names, mod.owner)
+             for mod in elk.meta(Special).modifiers],
+            [('before', ('save',), Item), ('around', ('save',), Special)],
+        )
+
+    def test_computed_once(self):
+        self.assertIs(elk.meta(Item), elk.meta(Item))
+        self.assertIsNot(elk.meta(Special), elk.meta(Item))
+
+    def test_object(self):
+        self.assertIs(elk.meta(Item(id=1)), elk.meta(Item))
+
+    def test_immutable(self):
+        m = elk.meta(Item)
+        with self.assertRaises(TypeError):
+            m.by_name['id'] = None
+        with self.assertRaises(TypeError):
+            m.by_init_arg['id'] = None
+        with self.assertRaises(AttributeError):
+            m.attributes = ()
+
+    def test_not_elk(self):
+        with self.assertRaises(TypeError):
+            elk.meta(object)
+        with self.assertRaises(TypeError):
+            elk.meta(1)
+
+    def test_metaclasses_exported(self):
+        # the package's ``meta`` is the function; the module is still
+        # importable by name, as by ``from elk.meta import ElkMeta``
+        package = importlib.import_module('elk')
+        module = importlib.import_module('elk.meta')
+        self.assertIs(package.meta, elk.meta)
+        self.assertIs(package.ElkMeta, module.ElkMeta)
+        self.assertIs(package.ElkRoleMeta, module.ElkRoleMeta)
+        self.assertIs(type(Item), elk.ElkMeta)
+        self.assertIs(type(Named), elk.ElkRoleMeta)
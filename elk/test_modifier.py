@@ -14,6 +14,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import re
 import unittest
 
 from . import elk
@@ -128,6 +129,116 @@ class MethodModifiersTestCase(unittest.TestCase):
         self.assertEqual(x.x, 1)
 
 
+class CombinedModifiersTestCase(unittest.TestCase):
+    def test_modifiers_of_a_method_are_combined(self):
+        code = getattr(A.orig, '__func__', A.orig).__code__
+        self.assertEqual(code.co_filename, '<elk modifiers>')
+        self.assertEqual(A.orig.__name__, 'orig')
+
+    def test_orig_is_bound_method(self):
+        class Example(elk.Elk):
+            def method(self, x):
+                return x
+
+            @elk.around('method')
+            def _around(self, orig, x):
+                self.orig = orig
+                return orig(x)
+
+        obj = Example()
+        self.assertEqual(obj.method(3), 3)
+        self.assertIs(obj.orig.__self__, obj)
+
+    def test_modifiers_of_different_methods(self):
+        class Example(elk.Elk):
+            log = elk.ElkAttribute(default=lambda self: [])
+
+            def one(self):
+                self.log.append('one')
+
+            def two(self):
+                self.log.append('two')
+
+            @elk.before('one')
+            def _before_one(self):
+                self.log.append('b1')
+
+            @elk.after('two')
+            def _after_two(self):
+                self.log.append('a2')
+
+        obj = Example()
+        obj.one()
+        obj.two()
+        self.assertEqual(obj.log, ['b1', 'one', 'two', 'a2'])
+
+
+class Audited(elk.Elk):
+    log = elk.ElkAttribute(default=lambda self: [])
+
+    def get_name(self):
+        return 'name'
+
+    def _helper(self):
+        return 'helper'
+
+
+class AuditedChild(Audited):
+    def get_size(self):
+        return 'size'
+
+    def set_size(self, size):
+        pass
+
+    @elk.before(re.compile('^[gs]et_'))
+    def _audit(self, *args):
+        self.log.append('audit')
+
+    @elk.after(['get_size', '_helper'])
+    def _after(self, *args):
+        self.log.append('after')
+
+    @elk.around(re.compile('^get_'))
+    def _around(self, orig, *args):
+        return orig(*args).upper()
+
+
+class ManyMethodsTestCase(unittest.TestCase):
+    def test_regex_matches_inherited_and_own_methods(self):
+        obj = AuditedChild()
+        self.assertEqual(obj.get_name(), 'NAME')
+        self.assertEqual(obj.log, ['audit'])
+        obj.set_size(1)
+        self.assertEqual(obj.log, ['audit', 'audit'])
+
+    def test_list_of_names(self):
+        obj = AuditedChild()
+        self.assertEqual(obj._helper(), 'helper')
+        self.assertEqual(obj.log, ['after'])
+        self.assertEqual(obj.get_size(), 'SIZE')
+        self.assertEqual(obj.log, ['after', 'audit', 'after'])
+
+    def test_base_unmodified(self):
+        obj = Audited()
+        self.assertEqual(obj.get_name(), 'name')
+        self.assertEqual(obj.log, [])
+
+    def test_special_methods_not_matched(self):
+        class Example(elk.Elk):
+            @elk.before(re.compile(''))
+            def _before(self, *args, **kwargs):
+                raise AssertionError
+
+        Example()
+
+    def test_missing_name_in_list(self):
+        with self.assertRaises(AttributeError):
+            class Example(elk.Elk):
+                @elk.before(['missing'])
+                def _before(self):
+                    pass
+
+
 class OrigRole(elk.ElkRole):
     s = elk.ElkAttribute(default='')
 
@@ -0,0 +1,164 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import copy
+import pickle
+import unittest
+
+from . import elk
+
+
+class Record(elk.Elk):
+    id = elk.ElkAttribute(mode='ro', type=int, required=True)
+    name = elk.ElkAttribute(mode='rw', type=str, default='')
+    note = elk.ElkAttribute(mode='rw')
+    stamp = elk.ElkAttribute(mode='ro', builder='_build_stamp')
+    summary = elk.ElkAttribute(
+        mode='ro', lazy=True, builder='_build_summary')
+
+    calls = []
+
+    def _build_stamp(self):
+        self.calls.append('stamp')
+        return len(self.calls)
+
+    def _build_summary(self):
+        self.calls.append('summary')
+        return '{}: {}'.format(self.id, self.name)
+
+
+class SlotRecord(elk.Elk):
+    __elk_slots__ = True
+    id = elk.ElkAttribute(mode='ro', type=int, required=True)
+    note = elk.ElkAttribute(mode='rw')
+    summary = elk.ElkAttribute(
+        mode='ro', lazy=True, default=lambda self: 'record {}'.format(self.id))
+
+
+class ExtraSlotRecord(SlotRecord):
+    __slots__ = ('extra', '__private')
+
+    def set_private(self, value):
+        self.__private = value
+
+    def get_private(self):
+        return self.__private
+
+
+class FrozenRecord(elk.Elk):
+    __elk_frozen__ = True
+    id = elk.ElkAttribute(mode='ro', type=int, required=True)
+
+
+class PickleTestCase(unittest.TestCase):
+    def setUp(self):
+        del Record.calls[:]
+
+    def roundtrip(self, obj):
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            yield pickle.loads(pickle.dumps(obj, protocol))
+
+    def test_roundtrip(self):
+        r = Record(id=1, name='a', note='n')
+        for other in self.roundtrip(r):
+            self.assertEqual(
+                (other.id, other.name, other.note, other.stamp),
+                (1, 'a', 'n', r.stamp)
+            )
+
+    def test_builders_not_run_again(self):
+        r = Record(id=1)
+        r.summary
+        del Record.calls[:]
+        for other in self.roundtrip(r):
+            self.assertEqual(other.summary, '1: ')
+        self.assertEqual(Record.calls, [])
+
+    def test_unread_lazy_values_stay_lazy(self):
+        r = Record(id=1)
+        self.assertNotIn('partial', repr(r.__getstate__()))
+        for other in self.roundtrip(r):
+            del Record.calls[:]
+            other.name = 'b'
+            self.assertEqual(other.summary, '1: b')
+            self.assertEqual(Record.calls, ['summary'])
+
+    def test_unset_attributes(self):
+        r = Record(id=1)
+        for other in self.roundtrip(r):
+            self.assertFalse(hasattr(other, 'note'))
+
+    def test_state_is_compact(self):
+        r = Record(id=1, name='a')
+        values, unset, pending, extra = r.__getstate__()
+        self.assertEqual(values, (1, 'a', None, r.stamp, None))
+        self.assertEqual((unset, pending, extra), ((2,), (4,), None))
+
+    def test_other_state(self):
+        r = Record(id=1)
+        r.extra = 'x'
+        for other in self.roundtrip(r):
+            self.assertEqual(other.extra, 'x')
+
+    def test_slots(self):
+        r = SlotRecord(id=2, note='n')
+        for other in self.roundtrip(r):
+            self.assertEqual((other.id, other.note), (2, 'n'))
+            self.assertEqual(other.summary, 'record 2')
+
+    def test_other_slots(self):
+        r = ExtraSlotRecord(id=2)
+        r.extra = 'x'
+        r.set_private('p')
+        copies = list(self.roundtrip(r)) + [copy.copy(r), copy.deepcopy(r)]
+        for other in copies:
+            self.assertEqual((other.id, other.extra), (2, 'x'))
+            self.assertEqual(other.get_private(), 'p')
+        r = ExtraSlotRecord(id=2)
+        for other in self.roundtrip(r):
+            self.assertFalse(hasattr(other, 'extra'))
+
+    def test_table_rows(self):
+        table = elk.ElkTable(Record, [{'id': 1, 'name': 'a'}])
+        row = table[0]
+        for other in list(self.roundtrip(row)) + [copy.copy(row)]:
+            self.assertIs(type(other), Record)
+            self.assertEqual((other.id, other.name), (1, 'a'))
+            self.assertEqual(other.stamp, row.stamp)
+            self.assertEqual(other.summary, '1: a')
+
+    def test_frozen(self):
+        r = FrozenRecord(id=3)
+        hash(r)
+        for other in self.roundtrip(r):
+            self.assertEqual(other, r)
+            self.assertEqual(hash(other), hash(r))
+            with self.assertRaises(AttributeError):
+                other.id = 4
+
+    def test_copy(self):
+        r = Record(id=1, note=['a'])
+        for other in (copy.copy(r), copy.deepcopy(r)):
+            self.assertEqual((other.id, other.note), (1, ['a']))
+            other.name = 'c'
+            self.assertEqual(other.summary, '1: c')
+        self.assertIs(copy.copy(r).note, r.note)
+        self.assertIsNot(copy.deepcopy(r).note, r.note)
+
+    def test_mismatched_state(self):
+        r = Record.__new__(Record)
+        with self.assertRaises(ValueError):
+            r.__setstate__(((1,), (), (), None))
@@ -0,0 +1,138 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from . import elk
+
+
+class Message(elk.Elk):
+    id = elk.ElkAttribute(mode='ro', type=int, required=True)
+    body = elk.ElkAttribute(mode='rw', type=str, default='')
+    size = elk.ElkAttribute(mode='ro', lazy=True, builder='_build_size')
+    note = elk.ElkAttribute(mode='rw')
+
+    def _build_size(self):
+        return len(self.body)
+
+
+class SlotMessage(elk.Elk):
+    __elk_slots__ = True
+    id = elk.ElkAttribute(mode='ro', type=int, required=True)
+    body = elk.ElkAttribute(mode='rw', type=str, default='')
+    size = elk.ElkAttribute(mode='ro', lazy=True, builder='_build_size')
+    note = elk.ElkAttribute(mode='rw')
+
+    def _build_size(self):
+        return len(self.body)
+
+
+class BuildMessage(elk.Elk):
+    x = elk.ElkAttribute(mode='rw', type=int)
+
+    @classmethod
+    def __buildargs__(cls, x):
+        return {'x': x}
+
+    def __build__(self, **kwargs):
+        self.built = True
+
+
+class PoolTestCase(unittest.TestCase):
+    def test_acquire_without_release_constructs(self):
+        pool = Message.pool(size=2)
+        a = pool.acquire(id=1)
+        b = pool.acquire(id=2)
+        self.assertIsNot(a, b)
+        self.assertEqual((a.id, b.id), (1, 2))
+        self.assertEqual(len(pool), 0)
+
+    def test_release_and_reuse(self):
+        for cls in (Message, SlotMessage):
+            pool = cls.pool(size=2)
+            a = pool.acquire(id=1, body='hello', note='n')
+            self.assertEqual(a.size, 5)
+            pool.release(a)
+            self.assertEqual(len(pool), 1)
+            b = pool.acquire(id=2, body='hi')
+            self.assertIs(a, b)
+            self.assertEqual((b.id, b.body, b.size), (2, 'hi', 2))
+            self.assertFalse(hasattr(b, 'note'))
+            self.assertEqual(len(pool), 0)
+
+    def test_reuse_clears_other_state(self):
+        pool = Message.pool()
+        a = pool.acquire(id=1)
+        a.extra = 'x'
+        pool.release(a)
+        b = pool.acquire(id=2)
+        self.assertIs(a, b)
+        self.assertFalse(hasattr(b, 'extra'))
+
+    def test_reuse_validates(self):
+        pool = Message.pool()
+        pool.release(pool.acquire(id=1))
+        with self.assertRaises(TypeError):
+            pool.acquire(id='x')
+        with self.assertRaises(AttributeError):
+            pool.acquire()
+        with self.assertRaises(TypeError):
+            pool.acquire(id=1, bogus=2)
+        with self.assertRaises(TypeError):
+            pool.acquire(1)
+
+    def test_size_limit(self):
+        pool = Message.pool(size=1)
+        a, b = pool.acquire(id=1), pool.acquire(id=2)
+        pool.release(a)
+        pool.release(b)
+        self.assertEqual(len(pool), 1)
+        self.assertIs(pool.acquire(id=3), a)
+        self.assertEqual(b.id, 2)
+
+    def test_negative_size(self):
+        with self.assertRaises(ValueError):
+            Message.pool(size=-1)
+
+    def test_release_other_class(self):
+        pool = Message.pool()
+        with self.assertRaises(TypeError):
+            pool.release(SlotMessage(id=1))
+
+    def test_buildargs_and_build(self):
+        pool = BuildMessage.pool()
+        a = pool.acquire(1)
+        pool.release(a)
+        self.assertFalse(hasattr(a, 'built'))
+        b = pool.acquire(2)
+        self.assertIs(a, b)
+        self.assertEqual(b.x, 2)
+        self.assertTrue(b.built)
+
+    def test_borrow(self):
+        pool = Message.pool()
+        with pool.borrow(id=1) as a:
+            self.assertEqual(a.id, 1)
+        self.assertEqual(len(pool), 1)
+        with pool.borrow(id=2) as b:
+            self.assertIs(a, b)
+            self.assertEqual(b.id, 2)
+
+    def test_context_manager_clears(self):
+        with Message.pool() as pool:
+            pool.release(pool.acquire(id=1))
+            self.assertEqual(len(pool), 1)
+        self.assertEqual(len(pool), 0)
@@ -98,6 +98,18 @@ class RoleTestCase(unittest.TestCase):
         self.assertTrue(hasattr(SubConsumer, 'role_method'))
         self.assertEqual(SubConsumer().role_method(), 'value')
 
+    def test_consumer_does_not_receive_role_metadata(self):
+        class Documented(elk.ElkRole):
+            """A role."""
+            __require__ = 'role_method'
+
+        class DocumentedConsumer(elk.Elk):
+            __with__ = Role, Documented
+
+        self.assertIsNone(DocumentedConsumer.__doc__)
+        self.assertNotIn('__require__', vars(DocumentedConsumer))
+        self.assertNotIn('__doc__', Documented.__elk_role_attrs__)
+
     def test_consume_non_role(self):
         class NonRole(object):
             a = 1
@@ -111,6 +123,71 @@ class RoleTestCase(unittest.TestCase):
             Role()
 
 
+class ComposedRole(elk.ElkRole):
+    __with__ = Role
+
+    composed_attr = elk.ElkAttribute(default='c')
+
+    def role_method(self):
+        return 'composed value'
+
+
+class ComposedConsumer(elk.Elk):
+    __with__ = ComposedRole
+
+
+class SubRoleConsumer(Consumer):
+    __with__ = AnotherRole
+
+
+class TransitiveRoleTestCase(unittest.TestCase):
+    def test_consumer_does_composed_roles(self):
+        self.assertTrue(isinstance(ComposedConsumer(), ComposedRole))
+        self.assertTrue(isinstance(ComposedConsumer(), Role))
+        self.assertTrue(issubclass(ComposedConsumer, Role))
+        self.assertFalse(issubclass(ComposedConsumer, AnotherRole))
+
+    def test_role_does_composed_roles(self):
+        self.assertTrue(issubclass(ComposedRole, Role))
+        self.assertTrue(issubclass(ComposedRole, ComposedRole))
+        self.assertFalse(issubclass(Role, ComposedRole))
+
+    def test_consumer_receives_composed_attributes(self):
+        obj = ComposedConsumer()
+        self.assertEqual(obj.role_attr, 'a')
+        self.assertEqual(obj.composed_attr, 'c')
+        self.assertEqual(obj.role_method(), 'composed value')
+
+    def test_subclass_with_own_roles_does_inherited_roles(self):
+        self.assertTrue(isinstance(SubRoleConsumer(), Role))
+        self.assertTrue(isinstance(SubRoleConsumer(), AnotherRole))
+        self.assertFalse(issubclass(Consumer, AnotherRole))
+
+    def test_non_elk(self):
+        self.assertFalse(isinstance(object(), Role))
+        self.assertFalse(isinstance(1, Role))
+        self.assertFalse(issubclass(int, Role))
+
+    def test_composed_role_requirements(self):
+        class Composed(elk.ElkRole):
+            __with__ = SingleRequireRole
+
+        with self.assertRaises(TypeError):
+            class A(elk.Elk):
+                __with__ = Composed
+
+        class B(elk.Elk):
+            __with__ = Composed
+            x = elk.ElkAttribute()
+
+        self.assertTrue(issubclass(B, SingleRequireRole))
+
+    def test_compose_non_role(self):
+        with self.assertRaises(TypeError):
+            class BogoRole(elk.ElkRole):
+                __with__ = int
+
+
 class Breakable(elk.ElkRole):
     is_broken = elk.ElkAttribute(mode='rw', type=bool, default=False)
 
@@ -0,0 +1,119 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from . import elk
+
+
+class Role(elk.ElkRole):
+    role_attr = elk.ElkAttribute(default='r')
+
+
+class Base(elk.Elk):
+    base_attr = elk.ElkAttribute(default='b')
+
+
+class Point(elk.Elk):
+    __elk_slots__ = True
+    __with__ = Role
+
+    x = elk.ElkAttribute(mode='ro', type=int)
+    y = elk.ElkAttribute(type=int, default=0)
+    label = elk.ElkAttribute(lazy=True, builder='_build_label')
+    tag = elk.ElkAttribute(lazy=True, default=lambda self: self.x * 2)
+
+    def _build_label(self):
+        return '({}, {})'.format(self.x, self.y)
+
+
+class Point3D(Point):
+    z = elk.ElkAttribute(type=int, default=0)
+
+    def _build_label(self):
+        return '({}, {}, {})'.format(self.x, self.y, self.z)
+
+
+class SlottedFromBase(Base):
+    __elk_slots__ = True
+
+
+class SlotsTestCase(unittest.TestCase):
+    def test_instances_have_no_dict(self):
+        self.assertFalse(hasattr(Point(x=1), '__dict__'))
+        self.assertFalse(hasattr(Point3D(x=1), '__dict__'))
+
+    def test_values_defaults_and_lazy_values(self):
+        p = Point(x=1)
+        self.assertEqual(p.x, 1)
+        self.assertEqual(p.y, 0)
+        self.assertEqual(p.label, '(1, 0)')
+        self.assertEqual(p.tag, 2)
+        p.y = 5
+        self.assertEqual(p.y, 5)
+        self.assertEqual(p.label, '(1, 0)')
+
+    def test_attribute_options_are_honoured(self):
+        p = Point(x=1)
+        with self.assertRaises(AttributeError):
+            p.x = 2
+        with self.assertRaises(TypeError):
+            p.y = 'one'
+        with self.assertRaises(TypeError):
+            Point(x='one')
+        del p.y
+        with self.assertRaises(AttributeError):
+            p.y
+        with self.assertRaises(AttributeError):
+            del p.y
+
+    def test_role_attributes_use_slots(self):
+        p = Point(x=1)
+        self.assertEqual(p.role_attr, 'r')
+        self.assertIn('_elk_slot_role_attr', Point.__slots__)
+        self.assertIsInstance(
+            Point.__elk_attrs__['role_attr'],
+            elk.SlotAttributeDescriptor
+        )
+        self.assertNotIsInstance(
+            Role.role_attr,
+            elk.SlotAttributeDescriptor
+        )
+
+    def test_subclass_reuses_base_slots(self):
+        p = Point3D(x=1, z=3)
+        self.assertEqual((p.x, p.y, p.z), (1, 0, 3))
+        self.assertEqual(p.label, '(1, 0, 3)')
+        self.assertEqual(Point3D.__slots__, ('_elk_slot_z',))
+        self.assertIs(Point3D.__elk_attrs__['x'], Point.__elk_attrs__['x'])
+
+    def test_attributes_inherited_from_unslotted_base_use_slots(self):
+        obj = SlottedFromBase()
+        self.assertEqual(obj.base_attr, 'b')
+        self.assertEqual(Base().base_attr, 'b')
+        self.assertIn('_elk_slot_base_attr', SlottedFromBase.__slots__)
+
+    def test_unslotted_subclass_of_slotted_class(self):
+        class Sub(Point):
+            __elk_slots__ = False
+            w = elk.ElkAttribute(default=4)
+
+            def _build_label(self):
+                return 'sub'
+
+        s = Sub(x=1)
+        self.assertEqual((s.x, s.w), (1, 4))
+        self.assertTrue(hasattr(s, '__dict__'))
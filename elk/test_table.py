@@ -0,0 +1,234 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import array
+import sys
+import unittest
+
+from . import elk
+
+
+class Tag(elk.Elk):
+    name = elk.ElkAttribute(type=str)
+
+    def upper(self):
+        return self.name.upper()
+
+
+class Sale(elk.Elk):
+    id = elk.ElkAttribute(mode='ro', type=int, required=True)
+    amount = elk.ElkAttribute(type=float, default=0.0)
+    paid = elk.ElkAttribute(type=bool, default=False)
+    note = elk.ElkAttribute(type=str)
+    tag = elk.ElkAttribute(type=Tag, handles=['upper'])
+    summary = elk.ElkAttribute(lazy=True, builder='_build_summary')
+
+    def _build_summary(self):
+        return '{}: {}'.format(self.id, self.amount)
+
+    def double(self):
+        return self.amount * 2
+
+
+class ElkTableTestCase(unittest.TestCase):
+    def setUp(self):
+        self.table = elk.ElkTable(Sale, [
+            {'id': 3, 'amount': 1.5, 'paid': True},
+            (1, 4.0, False, 'x'),
+            {'id': 2, 'tag': Tag(name='t')},
+        ])
+
+    def test_numeric_columns_are_arrays(self):
+        self.assertIsInstance(self.table.column('id'), array.array)
+        self.assertIsInstance(self.table.column('amount'), array.array)
+        self.assertIsInstance(self.table.column('paid'), array.array)
+        self.assertIsInstance(self.table._columns['note'], list)
+
+    def test_rows_behave_like_instances(self):
+        self.assertEqual(len(self.table), 3)
+        row = self.table[0]
+        self.assertIsInstance(row, Sale)
+        self.assertEqual((row.id, row.amount, row.paid), (3, 1.5, True))
+        self.assertIs(row.paid, True)
+        self.assertEqual(row.double(), 3.0)
+        self.assertEqual(row.summary, '3: 1.5')
+        self.assertEqual(self.table[-1].upper(), 'T')
+        with self.assertRaises(AttributeError):
+            row.note
+        self.assertEqual([r.id for r in self.table], [3, 1, 2])
+        self.assertEqual([r.id for r in self.table[1:]], [1, 2])
+        with self.assertRaises(IndexError):
+            self.table[3]
+
+    def test_rows_are_validated(self):
+        with self.assertRaises(TypeError):
+            self.table.append(id='four')
+        with self.assertRaises(AttributeError):
+            self.table.append(amount=1.0)
+        with self.assertRaises(TypeError):
+            self.table[0].amount = 'lots'
+        with self.assertRaises(AttributeError):
+            self.table[0].id = 10
+        with self.assertRaises(AttributeError):
+            del self.table[0].id
+        self.assertEqual(len(self.table), 3)
+
+    def test_rows_can_be_modified(self):
+        row = self.table[1]
+        row.amount = 5.0
+        row.note = 'y'
+        self.assertEqual(self.table.column('amount').tolist(), [1.5, 5.0, 0.0])
+        self.assertEqual(row.note, 'y')
+        del row.note
+        with self.assertRaises(AttributeError):
+            row.note
+
+    def test_deleting_unboxed_value_converts_column(self):
+        del self.table[0].amount
+        self.assertIsInstance(self.table._columns['amount'], list)
+        with self.assertRaises(AttributeError):
+            self.table.sum('amount')
+        self.table[0].amount = 2.0
+        self.assertEqual(self.table.sum('amount'), 6.0)
+
+    @unittest.skipIf(sys.version_info < (3,), 'large ints are long')
+    def test_big_int_converts_column(self):
+        self.table.append(id=2 ** 100)
+        self.assertEqual(self.table[3].id, 2 ** 100)
+        self.assertEqual(self.table.column('id'), [3, 1, 2, 2 ** 100])
+
+    def test_sum(self):
+        self.assertEqual(self.table.sum('amount'), 5.5)
+        self.assertEqual(self.table.sum('paid'), 1)
+
+    def test_column_generates_lazy_values(self):
+        self.assertEqual(
+            self.table.column('summary'),
+            ['3: 1.5', '1: 4.0', '2: 0.0']
+        )
+
+    def test_filter(self):
+        paid = self.table.filter('amount', lambda amount: amount > 1)
+        self.assertEqual([r.id for r in paid], [3, 1])
+        self.assertEqual(len(paid), 2)
+        self.assertEqual([r.id for r in self.table], [3, 1, 2])
+        with self.assertRaises(AttributeError):
+            paid[0].note
+        self.assertEqual(paid[1].note, 'x')
+
+    def test_sort(self):
+        self.table.sort('id')
+        self.assertEqual([r.id for r in self.table], [1, 2, 3])
+        self.assertEqual(self.table.column('amount').tolist(), [4.0, 0.0, 1.5])
+        self.table.sort('amount', reverse=True)
+        self.assertEqual([r.id for r in self.table], [1, 3, 2])
+
+    def test_errors_are_collected(self):
+        errors = []
+        self.table.extend([{'id': 'x'}, {'id': 9}], errors=errors)
+        self.assertEqual(len(self.table), 4)
+        self.assertEqual([i for i, _ in errors], [0])
+
+    def test_evolve(self):
+        row = self.table[0]
+        obj = row.evolve(amount=2.5)
+        self.assertIs(type(obj), Sale)
+        self.assertEqual((obj.id, obj.amount, obj.paid), (3, 2.5, True))
+        self.assertEqual(obj.summary, '3: 2.5')
+        self.assertEqual(row.amount, 1.5)
+        with self.assertRaises(AttributeError):
+            obj.note
+        with self.assertRaises(TypeError):
+            row.evolve(amount='x')
+
+    def test_async_attributes_rejected(self):
+        try:
+            import asyncio  # noqa: F401
+        except ImportError:
+            self.skipTest('asyncio not available')
+
+        class Remote(elk.Elk):
+            value = elk.ElkAttribute(lazy='async', default=lambda self: 1)
+
+        with self.assertRaises(TypeError):
+            elk.ElkTable(Remote)
+
+    def test_weak_ref_attributes_rejected(self):
+        class Child(elk.Elk):
+            parent = elk.ElkAttribute(type=Tag, weak_ref=True)
+
+        with self.assertRaises(TypeError):
+            elk.ElkTable(Child)
+
+    def test_works_with_slotted_classes(self):
+        class Point(elk.Elk):
+            __elk_slots__ = True
+            x = elk.ElkAttribute(type=int, default=0)
+            y = elk.ElkAttribute(type=int, default=0)
+
+        table = elk.ElkTable(Point, [(1, 2), (3, 4)])
+        self.assertEqual(table.sum('x'), 4)
+        self.assertEqual(table[1].y, 4)
+        point = table[1].evolve(x=5)
+        self.assertIs(type(point), Point)
+        self.assertEqual((point.x, point.y), (5, 4))
+
+
+class Key(elk.Elk):
+    __elk_frozen__ = True
+    x = elk.ElkAttribute(type=int, required=True)
+    label = elk.ElkAttribute(lazy=True, builder='_build_label')
+
+    def _build_label(self):
+        return str(self.x)
+
+
+class SlotKey(Key):
+    __elk_slots__ = True
+
+
+class FrozenRowTestCase(unittest.TestCase):
+    cls = Key
+
+    def setUp(self):
+        self.table = elk.ElkTable(self.cls, [(1,), (2,), (1,)])
+
+    def test_rows_compare_by_value(self):
+        a, b, c = self.table
+        self.assertNotEqual(a, b)
+        self.assertEqual(a, c)
+        self.assertTrue(a != b)
+        self.assertFalse(a != c)
+        self.assertEqual(hash(a), hash(c))
+        self.assertEqual(len(set(self.table)), 2)
+
+    def test_evolve(self):
+        key = self.table[0].evolve(x=5)
+        self.assertIs(type(key), self.cls)
+        self.assertEqual((key.x, key.label), (5, '5'))
+
+    def test_hash_follows_sort(self):
+        first = self.table[0]
+        hash(first)
+        self.table.sort('x', reverse=True)
+        self.assertEqual(first.x, 2)
+        other = elk.ElkTable(self.cls, [(2,)])[0]
+        self.assertEqual(hash(first), hash(other))
+        self.assertEqual(first, other)
+
+
+class SlotFrozenRowTestCase(FrozenRowTestCase):
+    cls = SlotKey
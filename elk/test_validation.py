@@ -0,0 +1,203 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from . import elk
+from . import validation
+
+
+class Strict(elk.Elk):
+    n = elk.ElkAttribute(mode='rw', type=int, default=0)
+    ro = elk.ElkAttribute(mode='ro', type=int, default=0)
+    req = elk.ElkAttribute(mode='rw', required=True)
+
+
+class Trusted(elk.Elk):
+    __elk_validation__ = 'trusted'
+    n = elk.ElkAttribute(mode='rw', type=int, default=0)
+    ro = elk.ElkAttribute(mode='ro', type=int, default=0)
+    req = elk.ElkAttribute(mode='rw', required=True)
+
+
+class SlotTrusted(elk.Elk):
+    __elk_validation__ = 'trusted'
+    __elk_slots__ = True
+    n = elk.ElkAttribute(mode='rw', type=int, default=0)
+    req = elk.ElkAttribute(mode='rw', required=True)
+
+
+class SubTrusted(Trusted):
+    m = elk.ElkAttribute(mode='rw', type=int, default=0)
+
+
+class StrictSubTrusted(Trusted):
+    __elk_validation__ = 'full'
+
+
+class StrictSubSlotTrusted(SlotTrusted):
+    __elk_validation__ = 'full'
+
+
+class TrustedSubStrict(Strict):
+    __elk_validation__ = 'trusted'
+
+
+class Sampled(elk.Elk):
+    __elk_validation__ = 'sampled'
+    __elk_sample_rate__ = 0.5
+    n = elk.ElkAttribute(mode='rw', type=int, default=0)
+
+
+class Built(elk.Elk):
+    __elk_validation__ = 'trusted'
+    n = elk.ElkAttribute(mode='rw', type=int, default=0)
+
+    @classmethod
+    def __buildargs__(cls, n):
+        return {'n': n}
+
+
+class Counted(elk.ElkRole):
+    count = elk.ElkAttribute(mode='rw', type=int, default=0)
+
+
+class StrictCounted(elk.Elk):
+    __with__ = Counted
+
+
+class TrustedCounted(elk.Elk):
+    __elk_validation__ = 'trusted'
+    __with__ = Counted
+
+
+class ValidationTestCase(unittest.TestCase):
+    def tearDown(self):
+        elk.set_validation('full', rate=0.01)
+
+    def test_full(self):
+        with self.assertRaises(TypeError):
+            Strict(n='x', req=1)
+        obj = Strict(req=1)
+        with self.assertRaises(TypeError):
+            obj.n = 'x'
+
+    def test_trusted(self):
+        for cls in (Trusted, SlotTrusted, SubTrusted):
+            obj = cls(n='x', req=1)
+            self.assertEqual(obj.n, 'x')
+            obj.n = 'y'
+            self.assertEqual(obj.n, 'y')
+        self.assertEqual(SubTrusted(m='x', req=1).m, 'x')
+        self.assertEqual(Built('x').n, 'x')
+        self.assertEqual(Trusted.build_many([{'n': 'x', 'req': 1}])[0].n, 'x')
+
+    def test_trusted_keeps_ro_and_required(self):
+        with self.assertRaises(AttributeError):
+            Trusted()
+        obj = Trusted(req=1)
+        with self.assertRaises(AttributeError):
+            obj.ro = 1
+        with self.assertRaises(TypeError):
+            Trusted(req=1, bogus=1)
+
+    def test_sampled(self):
+        failures = 0
+        for i in range(400):
+            try:
+                Sampled(n='x')
+            except TypeError:
+                failures += 1
+        self.assertTrue(100 < failures < 300, failures)
+        obj = Sampled()
+        failures = 0
+        for i in range(400):
+            try:
+                obj.n = 'x'
+            except TypeError:
+                failures += 1
+        self.assertTrue(100 < failures < 300, failures)
+        obj.n = 1
+        self.assertEqual(obj.n, 1)
+
+    def test_global(self):
+        previous = elk.set_validation('trusted')
+        self.assertEqual(previous, ('full', 0.01))
+        obj = Strict(n='x', req=1)
+        obj.n = 'y'
+        self.assertEqual(obj.n, 'y')
+
+        elk.set_validation('sampled', rate=0)
+        obj = Strict(n='x', req=1)
+        obj.n = 'y'
+        elk.set_validation('sampled', rate=1)
+        with self.assertRaises(TypeError):
+            Strict(n='x', req=1)
+        with self.assertRaises(TypeError):
+            obj.n = 'z'
+
+        elk.set_validation('full')
+        with self.assertRaises(TypeError):
+            Strict(n='x', req=1)
+        with self.assertRaises(TypeError):
+            obj.n = 'z'
+
+    def test_global_does_not_override_class(self):
+        elk.set_validation('full')
+        self.assertEqual(Trusted(n='x', req=1).n, 'x')
+        self.assertEqual(validation.policy(Sampled), ('sampled', 0.5))
+
+    def test_role_attributes_follow_consumer(self):
+        for _ in range(2):
+            obj = StrictCounted()
+            with self.assertRaises(TypeError):
+                obj.count = 'x'
+            obj = TrustedCounted()
+            obj.count = 'x'
+            self.assertEqual(obj.count, 'x')
+            # the policies are applied again, in some order
+            elk.set_validation('full')
+
+    def test_inherited_attributes_follow_subclass(self):
+        for cls in (StrictSubTrusted, StrictSubSlotTrusted):
+            obj = cls(n=1, req=1)
+            with self.assertRaises(TypeError):
+                obj.n = 'x'
+            self.assertEqual(obj.n, 1)
+            obj = cls.__bases__[0](n=1, req=1)
+            obj.n = 'x'
+            self.assertEqual(obj.n, 'x')
+        obj = TrustedSubStrict(req=1)
+        obj.n = 'x'
+        self.assertEqual(obj.n, 'x')
+        self.assertEqual(Strict.n.__get__(obj, Strict), 'x')
+        with self.assertRaises(TypeError):
+            Strict(req=1).n = 'x'
+
+    def test_inherited_attributes_follow_global(self):
+        elk.set_validation('trusted')
+        obj = StrictSubTrusted(n=1, req=1)
+        with self.assertRaises(TypeError):
+            obj.n = 'x'
+
+    def test_bad_policy(self):
+        with self.assertRaises(ValueError):
+            elk.set_validation('lax')
+        with self.assertRaises(ValueError):
+            elk.set_validation('sampled', rate=2)
+        with self.assertRaises(ValueError):
+            class Bad(elk.Elk):
+                __elk_validation__ = 'lax'
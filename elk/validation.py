@@ -0,0 +1,89 @@
+# This file is part of elk
+# Copyright (C) 2014 Fraser Tweedale
+#
+# elk is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Validation policy: how thoroughly attribute values are type checked.
+
+There are three levels.  ``'full'`` checks every value.
+``'sampled'`` checks a random fraction (the sample rate) of
+constructions and assignments.  ``'trusted'`` checks no values.
+Read-only and required attributes are enforced at every level.
+
+The policy of a class is given by its ``__elk_validation__`` and
+``__elk_sample_rate__`` attributes, if set, and otherwise by the
+global policy set with ``set_validation``.  Changing the policy does
+not add a test to every check; instead the checks and constructors of
+the affected classes are generated again.
+
+"""
+
+import random
+import weakref
+
+FULL = 'full'
+SAMPLED = 'sampled'
+TRUSTED = 'trusted'
+LEVELS = (FULL, SAMPLED, TRUSTED)
+
+_level = FULL
+_rate = 0.01
+
+# every Elk class, so that they can be updated when the policy changes
+_classes = weakref.WeakSet()
+
+
+def _check_policy(level, rate):
+    if level not in LEVELS:
+        raise ValueError(
+            'validation level must be one of {}'.format(', '.join(LEVELS)))
+    if not 0 <= rate <= 1:
+        raise ValueError('sample rate must be between 0 and 1')
+
+
+def set_validation(level, rate=None):
+    """Set the global validation policy.
+
+    ``rate`` is the fraction of constructions and assignments that are
+    checked at the ``'sampled'`` level; if it is not given, the
+    current rate is kept.  Classes that set their own policy are not
+    affected.  Return the previous ``(level, rate)``.
+
+    """
+    global _level, _rate
+    from .meta import _apply_validation
+    previous = _level, _rate
+    rate = _rate if rate is None else rate
+    _check_policy(level, rate)
+    _level, _rate = level, rate
+    for cls in list(_classes):
+        _apply_validation(cls)
+    return previous
+
+
+def policy(cls):
+    """Return the ``(level, rate)`` validation policy of a class."""
+    level = getattr(cls, '__elk_validation__', None)
+    rate = getattr(cls, '__elk_sample_rate__', None)
+    level = _level if level is None else level
+    rate = _rate if rate is None else rate
+    _check_policy(level, rate)
+    return level, rate
+
+
+def sampled(check, rate):
+    """Return a check that only checks a fraction ``rate`` of values."""
+    def sampled_check(value, random=random.random):
+        return random() >= rate or check(value)
+    return sampled_check